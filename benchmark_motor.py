@@ -0,0 +1,323 @@
+# benchmark_motor.py
+# Medições de tempo, memória e convergência do motor hidráulico sobre redes sintéticas.
+#
+# Uso: python benchmark_motor.py                       (compara com as referências)
+#      python benchmark_motor.py --gravar-referencia   (regrava as referências nesta máquina)
+#
+# benchmark_referencia.json, versionado, guarda só métricas que não dependem da máquina (convergência, erro do
+# fator de atrito, dependências carregadas na importação, etapas recalculadas). Tempos e memória ficam em
+# benchmark_referencia_local.json, fora do controle de versão: grave-o uma vez em cada máquina antes de comparar.
+
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from cache_resultados import CacheResultados, PipelineResultados
+from hidraulica import (MATERIAIS, K_FACTORS, FLUIDOS, MODO_PADRAO, MODOS_ATRITO, compilar_rede, avaliar_curva_sistema, calcular_perda_serie,
+                        calcular_perdas_paralelo, criar_funcao_curva, encontrar_ponto_operacao, fator_atrito, gerar_grafico_sensibilidade_diametro,
+                        ler_perfis, resumir_simulacao, simular_periodo_em_fluxo)
+
+ARQUIVO_REFERENCIA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_referencia.json')
+ARQUIVO_REFERENCIA_LOCAL = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_referencia_local.json')
+METRICAS_DA_MAQUINA = ('tempo_mediano_ms', 'tempo_min_ms', 'memoria_pico_kb', 'rerun_ms')
+FLUIDO_PADRAO = "Água a 20°C"
+EQUIPAMENTOS_PADRAO = {'eficiencia_bomba_percent': 70.0, 'eficiencia_motor_percent': 90.0, 'horas_dia': 8.0, 'custo_kwh': 0.75}
+
+# (nome, trechos em série, ramais paralelos, trechos por ramal, acessórios por trecho)
+CENARIOS_PADRAO = [
+    ('pequena', 4, 2, 1, 2),
+    ('media', 20, 4, 3, 3),
+    ('grande', 100, 8, 10, 4),
+]
+
+
+def gerar_rede_sintetica(num_trechos, num_ramais=0, trechos_por_ramal=1, acessorios_por_trecho=2, materiais=None, semente=0):
+    """Gera um sistema no formato da interface ({'antes', 'paralelo', 'depois'}) com dimensões aleatórias reprodutíveis.
+
+    `num_trechos` é dividido entre antes e depois do bloco paralelo; `materiais` restringe a mistura
+    de materiais sorteados (padrão: todos de MATERIAIS).
+    """
+    gerador = np.random.default_rng(semente)
+    materiais = list(materiais or MATERIAIS.keys())
+    nomes_acessorios = list(K_FACTORS.keys())
+    contador = iter(range(1, 10**9))
+
+    def trecho(diametro_base):
+        acessorios = [{"nome": nome, "k": K_FACTORS[nome], "quantidade": int(gerador.integers(1, 4))}
+                      for nome in gerador.choice(nomes_acessorios, size=acessorios_por_trecho, replace=False)]
+        return {"id": float(next(contador)), "comprimento": float(np.round(gerador.uniform(5.0, 80.0), 1)),
+                "diametro": float(np.round(diametro_base * gerador.uniform(0.8, 1.25))), "material": str(gerador.choice(materiais)), "acessorios": acessorios}
+
+    n_antes = num_trechos // 2
+    return {
+        'antes': [trecho(150.0) for _ in range(n_antes)],
+        'paralelo': {f"Ramal {i+1}": [trecho(100.0) for _ in range(trechos_por_ramal)] for i in range(num_ramais)},
+        'depois': [trecho(150.0) for _ in range(num_trechos - n_antes)],
+    }
+
+
+def gerar_curvas_bomba(sistema, h_geometrica, fluido=FLUIDO_PADRAO, vazao_projeto=50.0):
+    """Curvas de altura e eficiência (DataFrames da interface) de uma bomba que atende `sistema` perto de `vazao_projeto`."""
+    altura = avaliar_curva_sistema(compilar_rede(sistema), [vazao_projeto], h_geometrica, FLUIDOS[fluido]["nu"])['altura'][0]
+    if not np.isfinite(altura): altura = h_geometrica + 10.0
+    shutoff = h_geometrica + 1.4 * (altura - h_geometrica) + 5.0
+    vazoes = np.array([0.0, vazao_projeto, 2 * vazao_projeto])
+    alturas = shutoff - (shutoff - altura) * (vazoes / vazao_projeto)**2
+    curva_altura = pd.DataFrame({"Vazão (m³/h)": vazoes, "Altura (m)": alturas})
+    curva_eficiencia = pd.DataFrame({"Vazão (m³/h)": vazoes, "Eficiência (%)": [0.0, 72.0, 60.0]})
+    return curva_altura, curva_eficiencia
+
+
+def medir(funcao, repeticoes=5):
+    """Tempo mediano e mínimo (ms) de `funcao()` em `repeticoes` execuções e pico de memória (kB) de uma execução extra."""
+    funcao()  # aquecimento (importações tardias, caches do NumPy)
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter(); funcao(); tempos.append((time.perf_counter() - inicio) * 1000)
+    tracemalloc.start()
+    try:
+        funcao()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'tempo_mediano_ms': float(np.median(tempos)), 'tempo_min_ms': float(np.min(tempos)), 'memoria_pico_kb': pico / 1024}
+
+
+def executar_rerun(sistema, h_geometrica, fluido, curva_altura, curva_eficiencia, equipamentos=EQUIPAMENTOS_PADRAO, modo_atrito=MODO_PADRAO):
+    """Caminho principal de cálculo de um rerun da interface, sem o cache de resultados."""
+    func_curva_bomba = criar_funcao_curva(curva_altura, "Vazão (m³/h)", "Altura (m)")
+    func_curva_eficiencia = criar_funcao_curva(curva_eficiencia, "Vazão (m³/h)", "Eficiência (%)")
+    rede = compilar_rede(sistema, modo_atrito)
+    vazao_op, altura_op, _ = encontrar_ponto_operacao(sistema, h_geometrica, fluido, func_curva_bomba, rede=rede)
+    if vazao_op is None: return None
+    func_curva_eficiencia(vazao_op)
+    nu = FLUIDOS[fluido]["nu"]
+    avaliar_curva_sistema(rede, [vazao_op], h_geometrica, nu)
+    avaliar_curva_sistema(rede, np.linspace(0, max(vazao_op * 1.5, 1.0), 100), h_geometrica, nu)
+    return gerar_grafico_sensibilidade_diametro(sistema, (50, 200), rede=rede, h_geo=h_geometrica, fluido=fluido, vazao_op=vazao_op, equipamentos=equipamentos)
+
+
+def executar_rerun_pipeline(pipeline, sistema, h_geometrica, fluido, curva_altura, curva_eficiencia, faixa=(50, 200), equipamentos=EQUIPAMENTOS_PADRAO, modo_atrito=MODO_PADRAO, rede=None):
+    """Mesmo caminho de `executar_rerun`, pelas etapas com dependências da interface; retorna as etapas recalculadas."""
+    inicio = len(pipeline.recalculadas)
+    func_curva_bomba = pipeline.etapa('curva_altura', lambda: criar_funcao_curva(curva_altura, "Vazão (m³/h)", "Altura (m)"), entradas={'pontos': curva_altura})
+    pipeline.etapa('curva_eficiencia', lambda: criar_funcao_curva(curva_eficiencia, "Vazão (m³/h)", "Eficiência (%)"), entradas={'pontos': curva_eficiencia})
+    rede = rede or compilar_rede(sistema, modo_atrito)  # na interface a rede compilada fica na sessão
+    vazao_op, _ = pipeline.etapa('ponto_operacao', lambda: encontrar_ponto_operacao(sistema, h_geometrica, fluido, func_curva_bomba, rede=rede)[:2],
+                                 entradas={'rede': sistema, 'fluido': fluido, 'h_geo': h_geometrica, 'atrito': modo_atrito}, depende=('curva_altura',))
+    nu = FLUIDOS[fluido]["nu"]
+    pipeline.etapa('curva_sistema_operacao', lambda: avaliar_curva_sistema(rede, [vazao_op], h_geometrica, nu), depende=('ponto_operacao',))
+    pipeline.etapa('curva_sistema_grafico', lambda: avaliar_curva_sistema(rede, np.linspace(0, max(vazao_op * 1.5, 1.0), 100), h_geometrica, nu), depende=('curva_altura', 'ponto_operacao'))
+    pipeline.etapa('sensibilidade_diametro', lambda: gerar_grafico_sensibilidade_diametro(sistema, faixa, rede=rede, h_geo=h_geometrica, fluido=fluido, vazao_op=vazao_op, equipamentos=equipamentos),
+                   entradas={'faixa': faixa, 'equipamentos': equipamentos}, depende=('ponto_operacao',))
+    return pipeline.recalculadas[inicio:]
+
+
+def medir_rerun_sensibilidade(sistema, h_geometrica, fluido, curva_altura, curva_eficiencia, repeticoes=5):
+    """Rerun em que só a faixa do slider de sensibilidade muda: tempo e etapas recalculadas (deve ser apenas a varredura)."""
+    pipeline, rede = PipelineResultados(CacheResultados('benchmark'), {}), compilar_rede(sistema)
+    faixas = iter([(50 + i, 200) for i in range(repeticoes + 3)])
+    executar_rerun_pipeline(pipeline, sistema, h_geometrica, fluido, curva_altura, curva_eficiencia, faixa=next(faixas), rede=rede)
+    recalculadas = []
+    metricas = medir(lambda: recalculadas.append(executar_rerun_pipeline(pipeline, sistema, h_geometrica, fluido, curva_altura, curva_eficiencia, faixa=next(faixas), rede=rede)), repeticoes)
+    return {**metricas, 'etapas_recalculadas': sorted({nome for lista in recalculadas for nome in lista})}
+
+
+def gerar_perfil_anual(h_geometrica, horas=8760, semente=0):
+    """CSV (texto) de um ano horário: nível oscilando ao longo do dia, válvula estrangulada de madrugada e tarifa de ponta."""
+    gerador = np.random.default_rng(semente)
+    hora = np.arange(horas) % 24
+    perfil = pd.DataFrame({'data_hora': pd.date_range('2025-01-01', periods=horas, freq='h'),
+                           'h_geometrica': h_geometrica + 3 * np.sin(2 * np.pi * hora / 24) + gerador.normal(0, 0.5, horas),
+                           'k_valvula': np.where(hora < 6, 5.0, 0.0), 'tarifa_kwh': np.where((hora >= 18) & (hora < 21), 2.1, 0.6),
+                           'ligada': (hora != 3).astype(int)})
+    return perfil.to_csv(index=False)
+
+
+def simular_ano(rede, perfil_csv, curva_altura, curva_eficiencia, fluido=FLUIDO_PADRAO, eficiencia_motor_percent=EQUIPAMENTOS_PADRAO['eficiencia_motor_percent']):
+    """Simulação de período estendido completa (leitura em fluxo do CSV + solução em lote + totais)."""
+    func_curva_bomba = criar_funcao_curva(curva_altura, "Vazão (m³/h)", "Altura (m)")
+    func_curva_eficiencia = criar_funcao_curva(curva_eficiencia, "Vazão (m³/h)", "Eficiência (%)")
+    return resumir_simulacao(simular_periodo_em_fluxo(rede, ler_perfis(io.StringIO(perfil_csv)), func_curva_bomba, func_curva_eficiencia, fluido, eficiencia_motor_percent))
+
+
+def medir_convergencia(num_trechos, num_ramais, trechos_por_ramal, acessorios_por_trecho, amostras=20, h_geometrica=15.0, fluido=FLUIDO_PADRAO, modo_atrito=MODO_PADRAO):
+    """Fração de redes sintéticas com ponto de operação encontrado e fração resolvida pelo Newton acoplado sem fallback."""
+    encontrados = acoplados = 0
+    iteracoes = []
+    for semente in range(amostras):
+        sistema = gerar_rede_sintetica(num_trechos, num_ramais, trechos_por_ramal, acessorios_por_trecho, semente=1000 + semente)
+        curva_altura, _ = gerar_curvas_bomba(sistema, h_geometrica, fluido, vazao_projeto=float(np.random.default_rng(semente).uniform(20, 120)))
+        info = {}
+        vazao_op, _, _ = encontrar_ponto_operacao(sistema, h_geometrica, fluido, criar_funcao_curva(curva_altura, "Vazão (m³/h)", "Altura (m)"), info=info, modo_atrito=modo_atrito)
+        encontrados += vazao_op is not None
+        acoplados += vazao_op is not None and info.get('metodo') == 'acoplado'
+        if info.get('metodo') == 'acoplado': iteracoes.append(info['iteracoes'])
+    return {'taxa_convergencia': encontrados / amostras, 'taxa_acoplado': acoplados / amostras,
+            'iteracoes_media': float(np.mean(iteracoes)) if iteracoes else None}
+
+
+def comparar_modos_atrito(pontos=100_000, repeticoes=5, amostras=20, h_geometrica=15.0, fluido=FLUIDO_PADRAO, cenario=CENARIOS_PADRAO[1]):
+    """Custo e precisão de cada modelo de fator de atrito.
+
+    Para cada modo: tempo de `pontos` avaliações de f (Re 10⁴..10⁸, ε/D 10⁻⁶..10⁻²), maior erro
+    relativo contra Colebrook exato nesses pontos, tempo do rerun completo e convergência do
+    ponto de operação na rede `cenario`.
+    """
+    gerador = np.random.default_rng(0)
+    reynolds = 10.0**gerador.uniform(4, 8, pontos)
+    rugosidade_relativa = 10.0**gerador.uniform(-6, -2, pontos)
+    exato = fator_atrito(reynolds, rugosidade_relativa, 'colebrook')
+    _, num_trechos, num_ramais, trechos_por_ramal, acessorios = cenario
+    sistema = gerar_rede_sintetica(num_trechos, num_ramais, trechos_por_ramal, acessorios)
+    curva_altura, curva_eficiencia = gerar_curvas_bomba(sistema, h_geometrica, fluido)
+    resultados = {}
+    for modo in MODOS_ATRITO:
+        resultados[modo] = {
+            **medir(lambda: fator_atrito(reynolds, rugosidade_relativa, modo), repeticoes),
+            'erro_relativo_max': float(np.max(np.abs(fator_atrito(reynolds, rugosidade_relativa, modo) / exato - 1))),
+            'rerun_ms': medir(lambda: executar_rerun(sistema, h_geometrica, fluido, curva_altura, curva_eficiencia, modo_atrito=modo), repeticoes)['tempo_mediano_ms'],
+            **medir_convergencia(num_trechos, num_ramais, trechos_por_ramal, acessorios, amostras, h_geometrica, fluido, modo),
+        }
+    return resultados
+
+
+def executar_benchmarks(cenarios=CENARIOS_PADRAO, repeticoes=5, amostras=20, h_geometrica=15.0, fluido=FLUIDO_PADRAO):
+    """Executa todas as medições e retorna {cenário: {ponto de entrada: métricas}}."""
+    resultados = {}
+    for nome, num_trechos, num_ramais, trechos_por_ramal, acessorios in cenarios:
+        sistema = gerar_rede_sintetica(num_trechos, num_ramais, trechos_por_ramal, acessorios)
+        curva_altura, curva_eficiencia = gerar_curvas_bomba(sistema, h_geometrica, fluido)
+        func_curva_bomba = criar_funcao_curva(curva_altura, "Vazão (m³/h)", "Altura (m)")
+        rede = compilar_rede(sistema)
+        vazao_op, _, _ = encontrar_ponto_operacao(sistema, h_geometrica, fluido, func_curva_bomba, rede=rede)
+        vazao_ref = vazao_op if vazao_op is not None else 50.0
+        serie = sistema['antes'] + sistema['depois']
+        perfil_anual = gerar_perfil_anual(h_geometrica)
+        resultados[nome] = {
+            'calcular_perda_serie': medir(lambda: calcular_perda_serie(serie, vazao_ref, fluido), repeticoes),
+            'calcular_perdas_paralelo': medir(lambda: calcular_perdas_paralelo(sistema['paralelo'], vazao_ref, fluido), repeticoes),
+            'encontrar_ponto_operacao': medir(lambda: encontrar_ponto_operacao(sistema, h_geometrica, fluido, func_curva_bomba, rede=rede), repeticoes),
+            'gerar_grafico_sensibilidade_diametro': medir(lambda: gerar_grafico_sensibilidade_diametro(sistema, (50, 200), rede=rede, h_geo=h_geometrica, fluido=fluido, vazao_op=vazao_ref, equipamentos=EQUIPAMENTOS_PADRAO), repeticoes),
+            'rerun_completo': medir(lambda: executar_rerun(sistema, h_geometrica, fluido, curva_altura, curva_eficiencia), repeticoes),
+            'rerun_sensibilidade': medir_rerun_sensibilidade(sistema, h_geometrica, fluido, curva_altura, curva_eficiencia, repeticoes),
+            'convergencia': medir_convergencia(num_trechos, num_ramais, trechos_por_ramal, acessorios, amostras, h_geometrica, fluido),
+            'periodo_estendido_8760h': medir(lambda: simular_ano(rede, perfil_anual, curva_altura, curva_eficiencia, fluido), max(1, min(repeticoes, 3))),
+        }
+    resultados['inicializacao'] = {'importacao_motor': medir_importacao(repeticoes)}
+    resultados['fator_atrito'] = comparar_modos_atrito(repeticoes=repeticoes, amostras=amostras, h_geometrica=h_geometrica, fluido=fluido)
+    return resultados
+
+
+def medir_importacao(repeticoes=5, modulo='hidraulica', nomes=('compilar_rede', 'encontrar_ponto_operacao', 'avaliar_curva_sistema', 'varrer_parametros',
+                                                                'simular_periodo_em_fluxo', 'otimizar_diametros', 'EstacaoBombeamento', 'analisar_incerteza')):
+    """Tempo (ms) de importação a frio de `nomes` em um interpretador novo, sem o custo de subir o próprio Python."""
+    codigo = (f"import time; inicio = time.perf_counter(); from {modulo} import {', '.join(nomes)}; "
+              "import sys; print((time.perf_counter() - inicio) * 1000, int('scipy' in sys.modules), int('pandas' in sys.modules))")
+    pasta = os.path.dirname(os.path.abspath(__file__))
+    tempos = []
+    for _ in range(repeticoes + 1):
+        saida = subprocess.run([sys.executable, '-c', codigo], cwd=pasta, capture_output=True, text=True, check=True).stdout.split()
+        tempos.append(float(saida[0]))
+    tempos = tempos[1:]  # a primeira execução aquece o cache de bytecode e do disco
+    return {'tempo_mediano_ms': float(np.median(tempos)), 'tempo_min_ms': float(np.min(tempos)),
+            'carrega_scipy': bool(int(saida[1])), 'carrega_pandas': bool(int(saida[2]))}
+
+
+def metricas_portaveis(resultados):
+    """Os resultados sem as métricas de tempo e memória, que só são comparáveis na mesma máquina."""
+    portaveis = {}
+    for cenario, medicoes in resultados.items():
+        for entrada, metricas in medicoes.items():
+            restantes = {chave: valor for chave, valor in metricas.items() if chave not in METRICAS_DA_MAQUINA}
+            if restantes: portaveis.setdefault(cenario, {})[entrada] = restantes
+    return portaveis
+
+
+def carregar_referencia(*arquivos):
+    """Junta as referências dos arquivos existentes (os últimos completam as métricas dos primeiros)."""
+    referencia = {}
+    for arquivo in arquivos:
+        if not os.path.exists(arquivo): continue
+        with open(arquivo, encoding='utf-8') as f:
+            for cenario, medicoes in json.load(f).items():
+                for entrada, metricas in medicoes.items():
+                    referencia.setdefault(cenario, {}).setdefault(entrada, {}).update(metricas)
+    return referencia
+
+
+def comparar_com_referencia(resultados, referencia, tolerancia_tempo=2.0, tolerancia_convergencia=0.0):
+    """Lista as regressões: tempo mediano acima de `tolerancia_tempo` × referência, taxa de convergência abaixo da
+    referência, SciPy ou pandas carregados na importação ou etapas recalculadas diferentes. Métricas ausentes da
+    referência (ex.: tempos, sem a referência local) não são comparadas."""
+    regressoes = []
+    for cenario, medicoes in resultados.items():
+        for entrada, metricas in medicoes.items():
+            ref = referencia.get(cenario, {}).get(entrada)
+            if ref is None: continue
+            if 'tempo_mediano_ms' in metricas and 'tempo_mediano_ms' in ref and metricas['tempo_mediano_ms'] > tolerancia_tempo * ref['tempo_mediano_ms']:
+                regressoes.append(f"{cenario}/{entrada}: {metricas['tempo_mediano_ms']:.2f} ms (referência {ref['tempo_mediano_ms']:.2f} ms)")
+            for taxa in ('taxa_convergencia', 'taxa_acoplado'):
+                if taxa in metricas and taxa in ref and metricas[taxa] < ref[taxa] - tolerancia_convergencia:
+                    regressoes.append(f"{cenario}/{entrada}: {taxa} {metricas[taxa]:.2%} (referência {ref[taxa]:.2%})")
+            for dependencia in ('carrega_scipy', 'carrega_pandas'):
+                if metricas.get(dependencia) and ref.get(dependencia) is False:
+                    regressoes.append(f"{cenario}/{entrada}: {dependencia} (a referência não carrega)")
+            if 'etapas_recalculadas' in metricas and 'etapas_recalculadas' in ref and metricas['etapas_recalculadas'] != ref['etapas_recalculadas']:
+                regressoes.append(f"{cenario}/{entrada}: recalculou {metricas['etapas_recalculadas']} (referência {ref['etapas_recalculadas']})")
+    return regressoes
+
+
+def formatar_tabela(resultados):
+    linhas = []
+    for cenario, medicoes in resultados.items():
+        for entrada, metricas in medicoes.items():
+            linhas.append({'cenario': cenario, 'entrada': entrada, **metricas})
+    return pd.DataFrame(linhas)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks do motor hidráulico sobre redes sintéticas.")
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--amostras', type=int, default=20, help="Redes sorteadas por cenário na medição de convergência.")
+    parser.add_argument('--referencia', default=ARQUIVO_REFERENCIA, help="Arquivo JSON com as métricas de referência independentes da máquina.")
+    parser.add_argument('--referencia-local', default=ARQUIVO_REFERENCIA_LOCAL, help="Arquivo JSON com os tempos e a memória de referência desta máquina.")
+    parser.add_argument('--gravar-referencia', action='store_true', help="Grava os resultados como novas referências.")
+    parser.add_argument('--tolerancia', type=float, default=2.0, help="Razão máxima entre o tempo medido e o de referência.")
+    parser.add_argument('--saida', help="Grava também os resultados completos neste arquivo JSON.")
+    args = parser.parse_args(argv)
+
+    resultados = executar_benchmarks(repeticoes=args.repeticoes, amostras=args.amostras)
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(formatar_tabela(resultados).to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f: json.dump(resultados, f, indent=2, ensure_ascii=False)
+    if args.gravar_referencia:
+        with open(args.referencia, 'w', encoding='utf-8') as f: json.dump(metricas_portaveis(resultados), f, indent=2, ensure_ascii=False)
+        with open(args.referencia_local, 'w', encoding='utf-8') as f: json.dump(resultados, f, indent=2, ensure_ascii=False)
+        print(f"Referências gravadas em {args.referencia} e {args.referencia_local}")
+        return 0
+    referencia = carregar_referencia(args.referencia, args.referencia_local)
+    if not referencia:
+        print(f"Sem referência em {args.referencia}; use --gravar-referencia.")
+        return 0
+    if not os.path.exists(args.referencia_local):
+        print(f"Sem tempos de referência desta máquina em {args.referencia_local} (use --gravar-referencia); comparando só as métricas independentes da máquina.")
+    regressoes = comparar_com_referencia(resultados, referencia, args.tolerancia)
+    if regressoes:
+        print("REGRESSÕES DETECTADAS:\n  " + "\n  ".join(regressoes))
+        return 1
+    print("Sem regressões em relação à referência.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,189 @@
+# cache_resultados.py
+# Memoização dos resultados de cálculo, endereçada pelo conteúdo das entradas.
+
+import base64
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from database import save_cached_result, load_cached_result
+
+TAMANHO_MAXIMO_PADRAO = 128
+_AUSENTE = object()
+
+
+def _normalizar(valor):
+    """Converte as entradas em estruturas JSON estáveis (ignora os `id`s de trecho, que vêm de time.time())."""
+    if isinstance(valor, dict):
+        return {str(k): _normalizar(v) for k, v in valor.items() if k != 'id'}
+    if isinstance(valor, (list, tuple)):
+        return [_normalizar(v) for v in valor]
+    if isinstance(valor, pd.DataFrame):
+        return _normalizar(valor.to_dict('records'))
+    if isinstance(valor, np.poly1d):
+        return _normalizar(valor.coeffs)
+    if isinstance(valor, np.ndarray):
+        return _normalizar(valor.tolist())
+    if isinstance(valor, np.generic):
+        return valor.item()
+    return valor
+
+
+def chave_estavel(nome, entradas):
+    """Hash SHA-256 estável de um cálculo (`nome`) e das entradas que determinam seu resultado."""
+    texto = json.dumps([nome, _normalizar(entradas)], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+
+def _codificar(valor):
+    """Serializa resultados (arrays, DataFrames, poly1d, tuplas, bytes) em JSON com marcação de tipo."""
+    if isinstance(valor, bytes):
+        return {"__tipo__": "bytes", "base64": base64.b64encode(valor).decode('ascii')}
+    if isinstance(valor, np.poly1d):
+        return {"__tipo__": "poly1d", "coef": valor.coeffs.tolist()}
+    if isinstance(valor, np.ndarray):
+        return {"__tipo__": "ndarray", "dados": valor.tolist(), "dtype": str(valor.dtype)}
+    if isinstance(valor, pd.DataFrame):
+        return {"__tipo__": "dataframe", "dados": valor.to_dict('list')}
+    if isinstance(valor, tuple):
+        return {"__tipo__": "tuple", "itens": [_codificar(v) for v in valor]}
+    if isinstance(valor, list):
+        return [_codificar(v) for v in valor]
+    if isinstance(valor, dict):
+        return {k: _codificar(v) for k, v in valor.items()}
+    if isinstance(valor, np.generic):
+        return valor.item()
+    return valor
+
+
+def _decodificar(valor):
+    if isinstance(valor, list):
+        return [_decodificar(v) for v in valor]
+    if not isinstance(valor, dict):
+        return valor
+    tipo = valor.get("__tipo__")
+    if tipo == "poly1d": return np.poly1d(valor["coef"])
+    if tipo == "ndarray": return np.array(valor["dados"], dtype=valor["dtype"])
+    if tipo == "dataframe": return pd.DataFrame(valor["dados"])
+    if tipo == "tuple": return tuple(_decodificar(v) for v in valor["itens"])
+    if tipo == "bytes": return base64.b64decode(valor["base64"])
+    return {k: _decodificar(v) for k, v in valor.items()}
+
+
+class CacheResultados:
+    """Cache LRU de resultados de um usuário, com persistência opcional no SQLite (tabela result_cache).
+
+    O cache é compartilhado entre as sessões do usuário; por isso `obter`, `guardar` e `memoizar` aceitam
+    `persistir` por chamada (None usa o padrão do construtor) em vez de cada sessão alterar o objeto.
+    """
+
+    def __init__(self, username, tamanho_maximo=TAMANHO_MAXIMO_PADRAO, persistir=False):
+        self.username = username
+        self.tamanho_maximo = tamanho_maximo
+        self.persistir = persistir
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    def obter(self, chave, persistir=None):
+        with self._lock:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return self._itens[chave]
+        if self.persistir if persistir is None else persistir:
+            salvo = load_cached_result(self.username, chave)
+            if salvo is not None:
+                valor = _decodificar(json.loads(salvo))
+                self._guardar_memoria(chave, valor)
+                with self._lock: self.acertos += 1
+                return valor
+        with self._lock: self.falhas += 1
+        return _AUSENTE
+
+    def guardar(self, chave, valor, persistir=None):
+        self._guardar_memoria(chave, valor)
+        if self.persistir if persistir is None else persistir:
+            save_cached_result(self.username, chave, json.dumps(_codificar(valor)))
+
+    def _guardar_memoria(self, chave, valor):
+        with self._lock:
+            self._itens[chave] = valor
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.tamanho_maximo:
+                self._itens.popitem(last=False)
+
+    def limpar(self):
+        with self._lock: self._itens.clear()
+
+    def memoizar(self, nome, entradas, funcao, persistir=None):
+        """Retorna o resultado em cache para (nome, entradas) ou executa `funcao()` e guarda o resultado."""
+        chave = chave_estavel(nome, entradas)
+        valor = self.obter(chave, persistir)
+        if valor is _AUSENTE:
+            valor = funcao()
+            self.guardar(chave, valor, persistir)
+        return valor
+
+
+class PipelineResultados:
+    """Etapas de cálculo encadeadas por dependências declaradas.
+
+    A impressão digital de uma etapa é o hash das entradas que ela lê diretamente mais as impressões das etapas
+    de que depende: uma mudança invalida só o que está abaixo dela, e as entradas grandes (a rede) são
+    serializadas uma única vez por rerun. O último valor de cada etapa fica em `estado` (ex.: um dicionário no
+    st.session_state) e é devolvido direto enquanto a impressão não muda; senão passa pelo CacheResultados,
+    persistindo conforme a opção `persistir` desta sessão. Etapas que só desenham (imagens, diagramas) passam
+    `persistir=False`: são refeitas a partir das etapas numéricas em cache em vez de ocupar o banco.
+    """
+
+    def __init__(self, cache, estado, persistir=False):
+        self.cache = cache
+        self.estado = estado
+        self.persistir = persistir
+        self.impressoes = {}
+        self.recalculadas = []
+
+    def etapa(self, nome, funcao, entradas=None, depende=(), persistir=True):
+        """Valor da etapa `nome`; executa `funcao()` só se `entradas` ou alguma etapa de `depende` mudou.
+
+        Com `persistir` False a etapa nunca vai para o banco, mesmo que a sessão persista os resultados.
+        """
+        impressao = chave_estavel(nome, {'entradas': entradas, 'depende': {d: self.impressoes[d] for d in depende}})
+        self.impressoes[nome] = impressao
+        anterior = self.estado.get(nome)
+        if anterior is not None and anterior[0] == impressao:
+            return anterior[1]
+        persistir = self.persistir and persistir
+        valor = self.cache.obter(impressao, persistir)
+        if valor is _AUSENTE:
+            valor = funcao()
+            self.cache.guardar(impressao, valor, persistir)
+            self.recalculadas.append(nome)
+        self.estado[nome] = (impressao, valor)
+        return valor
+
+    def memoizar(self, nome, entradas, funcao):
+        """`CacheResultados.memoizar` com a opção de persistência desta sessão (cálculos fora das etapas)."""
+        return self.cache.memoizar(nome, entradas, funcao, self.persistir)
+
+
+_caches_por_usuario = {}
+_lock_registro = threading.Lock()
+
+
+def obter_cache_usuario(username, tamanho_maximo=TAMANHO_MAXIMO_PADRAO):
+    """Cache isolado de cada usuário, compartilhado entre as sessões e reruns do mesmo processo.
+
+    A persistência não é um estado do cache: cada sessão a informa por chamada (ver `PipelineResultados`).
+    """
+    with _lock_registro:
+        cache = _caches_por_usuario.get(username)
+        if cache is None:
+            cache = _caches_por_usuario[username] = CacheResultados(username, tamanho_maximo)
+    return cache
@@ -0,0 +1,156 @@
+# catalogo_bombas.py
+# Catálogo de bombas: curvas ajustadas uma vez, na importação, e triagem vetorizada de todos os modelos contra a curva do sistema.
+
+import numpy as np
+import pandas as pd
+
+from database import count_pump_models, find_pump_candidates, save_pump_models
+from hidraulica import FLUIDOS, CurvaSistema, avaliar_curva_sistema, bisseccao, registrar_solver
+from hidraulica.estacao_bombeamento import ITERACOES_BISSECCAO
+
+GRAU_CURVAS = 2
+COLUNAS_PONTOS = ('fabricante', 'modelo', 'vazao_m3h', 'altura_m', 'eficiencia_percent')  # CSV de importação, um ponto por linha
+ORDENACOES = {'custo_anual': "Custo anual", 'eficiencia_percent': "Eficiência no ponto de operação"}
+LIMITE_LISTA_PADRAO = 20
+
+
+def _ajustar(vazoes, valores):
+    """Ajusta o polinômio aos pares (vazão, valor) sem NaN; retorna (polinômio ou None, vazões usadas)."""
+    vazoes, valores = np.asarray(vazoes, dtype=float), np.asarray(valores, dtype=float)
+    if vazoes.shape != valores.shape: raise ValueError(f"{len(vazoes)} vazões para {len(valores)} valores.")
+    validos = ~(np.isnan(vazoes) | np.isnan(valores))
+    if validos.sum() < GRAU_CURVAS + 1: return None, vazoes[validos]
+    return np.poly1d(np.polyfit(vazoes[validos], valores[validos], GRAU_CURVAS)), vazoes[validos]
+
+
+def ajustar_modelo(fabricante, modelo, vazoes, alturas, eficiencias, vazoes_eficiencia=None, rotacao_rpm=None, diametro_rotor_mm=None):
+    """Ajusta as curvas de um modelo (uma única vez) e calcula o envelope usado na poda do catálogo.
+
+    Mesmo ajuste de `criar_funcao_curva`, direto nos arrays. `vazoes_eficiencia` permite pontos de
+    eficiência em outras vazões. A faixa de vazão do modelo é a dos pontos de altura: a triagem não
+    extrapola a curva.
+    """
+    # Cada curva descarta só os próprios pontos incompletos: a eficiência usa as vazões originais, não as da altura.
+    altura, vazoes_altura = _ajustar(vazoes, alturas)
+    eficiencia, _ = _ajustar(vazoes if vazoes_eficiencia is None else vazoes_eficiencia, eficiencias)
+    if altura is None or eficiencia is None: raise ValueError(f"O modelo '{fabricante} {modelo}' precisa de pelo menos {GRAU_CURVAS + 1} pontos completos em cada curva.")
+    if vazoes_altura.max() <= 0: raise ValueError(f"O modelo '{fabricante} {modelo}' não tem pontos de altura com vazão positiva.")
+    faixa = np.linspace(0.0, float(vazoes_altura.max()), 256)
+    eficiencias_faixa = eficiencia(faixa)
+    return {'manufacturer': str(fabricante), 'model': str(modelo), 'rotation_rpm': rotacao_rpm, 'impeller_mm': diametro_rotor_mm,
+            'head_coefficients': altura.coeffs.tolist(), 'efficiency_coefficients': eficiencia.coeffs.tolist(),
+            'shutoff_head_m': float(altura(faixa).max()), 'min_flow_m3h': float(vazoes_altura.min()), 'max_flow_m3h': float(vazoes_altura.max()),
+            'bep_flow_m3h': float(faixa[np.argmax(eficiencias_faixa)]), 'bep_efficiency': float(eficiencias_faixa.max())}
+
+
+def importar_catalogo_csv(fonte):
+    """Importa um CSV com um ponto de curva por linha (colunas de `COLUNAS_PONTOS`; opcionais
+    `rotacao_rpm` e `diametro_rotor_mm`). Modelos já existentes são substituídos. Um modelo que não pode ser
+    ajustado é deixado de fora sem interromper os demais. Retorna (total importado, mensagens dos rejeitados)."""
+    pontos = pd.read_csv(fonte)
+    faltando = [c for c in COLUNAS_PONTOS if c not in pontos.columns]
+    if faltando: raise ValueError(f"Colunas ausentes no catálogo: {', '.join(faltando)}.")
+    # Um groupby do pandas por modelo custa mais que o ajuste: agrupa uma vez e fatia os arrays.
+    codigos, chaves = pd.factorize(pd.MultiIndex.from_frame(pontos[['fabricante', 'modelo']]))
+    ordem = np.argsort(codigos, kind='stable')
+    inicios = np.searchsorted(codigos[ordem], np.arange(len(chaves) + 1))
+    numericas = {c: pd.to_numeric(pontos[c], errors='coerce').to_numpy()[ordem] for c in ('vazao_m3h', 'altura_m', 'eficiencia_percent', 'rotacao_rpm', 'diametro_rotor_mm') if c in pontos}
+    modelos, rejeitados = [], []
+    for k, (fabricante, modelo) in enumerate(chaves):
+        fatia = slice(inicios[k], inicios[k + 1])
+        extras = {c: float(numericas[c][fatia][0]) for c in ('rotacao_rpm', 'diametro_rotor_mm') if c in numericas and not np.isnan(numericas[c][fatia][0])}
+        try:
+            modelos.append(ajustar_modelo(fabricante, modelo, numericas['vazao_m3h'][fatia], numericas['altura_m'][fatia], numericas['eficiencia_percent'][fatia], **extras))
+        except ValueError as e:
+            rejeitados.append(str(e))
+    return save_pump_models(modelos), rejeitados
+
+
+def pontos_do_modelo(modelo, pontos=5):
+    """Tabelas de pontos (altura e eficiência) do modelo na faixa do catálogo, no formato dos editores da interface."""
+    vazoes = np.linspace(modelo['min_flow_m3h'], modelo['max_flow_m3h'], pontos)
+    altura, eficiencia = np.poly1d(modelo['head_coefficients']), np.poly1d(modelo['efficiency_coefficients'])
+    return (pd.DataFrame({"Vazão (m³/h)": vazoes.round(2), "Altura (m)": altura(vazoes).round(2)}),
+            pd.DataFrame({"Vazão (m³/h)": vazoes.round(2), "Eficiência (%)": np.clip(eficiencia(vazoes), 0.0, 100.0).round(2)}))
+
+
+def _matriz_coeficientes(listas):
+    """Coeficientes (maior grau primeiro) de K modelos numa matriz (K, grau + 1), completada com zeros à esquerda."""
+    colunas = max(len(c) for c in listas)
+    return np.array([[0.0] * (colunas - len(c)) + list(c) for c in listas])
+
+
+def _polival(coeficientes, vazoes):
+    """Avalia o polinômio de cada linha de `coeficientes` na vazão correspondente (Horner, em lote)."""
+    resultado = np.zeros(len(vazoes))
+    for coluna in coeficientes.T: resultado = resultado * vazoes + coluna
+    return resultado
+
+
+def _intersecao(curva, coef_altura, vazoes_min, vazoes_max):
+    """Função de `correcao` para `CurvaSistema.intersecao_corrigida`: vazão em que cada curva cruza a do
+    sistema (deslocada de `correcao`) dentro da faixa do modelo, e se o cruzamento existe."""
+    def cruzar(correcao):
+        def folga(vazao): return _polival(coef_altura, vazao) - curva.altura(vazao) - correcao
+        return bisseccao(folga, vazoes_min, vazoes_max), (folga(vazoes_min) > 0) & (folga(vazoes_max) <= 0)
+    return cruzar
+
+
+def triar_bombas(rede, h_geometrica, fluido, eficiencia_motor_percent, horas_dia, custo_kwh, vazao_min=0.0, vazao_max=None,
+                 ordenar_por='custo_anual', limite=LIMITE_LISTA_PADRAO):
+    """Lista curta dos modelos do catálogo para a rede, pelo ponto de operação de cada um.
+
+    O índice de envelope do banco descarta primeiro os modelos que não alcançam a altura do sistema
+    em `vazao_min` ou cuja faixa de vazão não chega a ela; os restantes são cruzados com a curva do
+    sistema interpolada numa única bissecção vetorizada. Os `limite` melhores por `ordenar_por`
+    ('custo_anual' ou 'eficiencia_percent') têm o ponto corrigido com a curva exata. Retorna
+    (DataFrame ordenado, estatísticas da poda).
+    """
+    if ordenar_por not in ORDENACOES: raise ValueError(f"Ordenação desconhecida: '{ordenar_por}'.")
+    nu, rho = FLUIDOS[fluido]["nu"], FLUIDOS[fluido]["rho"]
+    altura_min = float(avaliar_curva_sistema(rede, [vazao_min], h_geometrica, nu)['altura'][0])
+    if altura_min != altura_min: raise ValueError("A divisão de vazão da rede não convergiu na vazão mínima.")
+    candidatos = find_pump_candidates(altura_min, vazao_min, vazao_max)
+    estatisticas = {'catalogo': count_pump_models(), 'candidatos': len(candidatos), 'com_ponto': 0}
+    if not candidatos: return pd.DataFrame(), estatisticas
+
+    coef_altura = _matriz_coeficientes([c['head_coefficients'] for c in candidatos])
+    coef_eficiencia = _matriz_coeficientes([c['efficiency_coefficients'] for c in candidatos])
+    vazoes_min = np.maximum(np.array([c['min_flow_m3h'] for c in candidatos]), vazao_min)
+    vazoes_max = np.array([c['max_flow_m3h'] for c in candidatos])
+    if vazao_max is not None: vazoes_max = np.minimum(vazoes_max, vazao_max)
+    curva = CurvaSistema(rede, h_geometrica, nu, vazoes_max.max())
+    (vazoes, existe), _ = curva.intersecao_corrigida(_intersecao(curva, coef_altura, vazoes_min, vazoes_max), len(candidatos), passes=0)
+    registrar_solver('catalogo_bisseccao', iteracoes=ITERACOES_BISSECCAO, casos=len(candidatos), falhas=int((~existe).sum()))
+
+    def desempenho(indices, vazoes):
+        alturas = _polival(coef_altura[indices], vazoes)
+        eficiencias = np.clip(_polival(coef_eficiencia[indices], vazoes), 0.0, 100.0)
+        rendimento = eficiencias / 100 * eficiencia_motor_percent / 100
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Mesma potência e custo anual de `calcular_analise_energetica`, em lote.
+            potencias = np.where(rendimento > 0, vazoes / 3600 * rho * 9.81 * alturas / rendimento / 1000, np.inf)
+        return alturas, eficiencias, potencias, potencias * horas_dia * 30 * 12 * custo_kwh
+
+    def ordem(eficiencias, custos): return np.lexsort((custos, -eficiencias)) if ordenar_por == 'eficiencia_percent' else np.lexsort((-eficiencias, custos))
+
+    indices = np.flatnonzero(existe)
+    estatisticas['com_ponto'] = len(indices)
+    if not len(indices): return pd.DataFrame(), estatisticas
+    _, eficiencias, _, custos = desempenho(indices, vazoes[indices])
+    posicao_eficiencia = np.empty(len(indices), dtype=int); posicao_eficiencia[np.argsort(-eficiencias, kind='stable')] = np.arange(1, len(indices) + 1)
+    posicao_custo = np.empty(len(indices), dtype=int); posicao_custo[np.argsort(custos, kind='stable')] = np.arange(1, len(indices) + 1)
+    lista = ordem(eficiencias, custos)[:limite]
+    indices, posicao_eficiencia, posicao_custo = indices[lista], posicao_eficiencia[lista], posicao_custo[lista]
+
+    # Correção da lista curta com a curva do sistema exata (poucos pontos: o custo fica no ajuste fino).
+    (vazoes_lista, _), _ = curva.intersecao_corrigida(_intersecao(curva, coef_altura[indices], vazoes_min[indices], vazoes_max[indices]), len(indices))
+    alturas, eficiencias, potencias, custos = desempenho(indices, vazoes_lista)
+    bep = np.array([candidatos[i]['bep_flow_m3h'] for i in indices])
+    tabela = pd.DataFrame({
+        'fabricante': [candidatos[i]['manufacturer'] for i in indices], 'modelo': [candidatos[i]['model'] for i in indices],
+        'rotacao_rpm': [candidatos[i]['rotation_rpm'] for i in indices], 'diametro_rotor_mm': [candidatos[i]['impeller_mm'] for i in indices],
+        'vazao_m3h': vazoes_lista, 'altura_m': alturas, 'eficiencia_percent': eficiencias, 'potencia_kW': potencias, 'custo_anual': custos,
+        'energia_especifica_kWh_m3': potencias / vazoes_lista, 'vazao_bep_percent': vazoes_lista / bep * 100,
+        'posicao_eficiencia': posicao_eficiencia, 'posicao_custo': posicao_custo, 'id': [candidatos[i]['id'] for i in indices]})
+    return tabela.iloc[ordem(eficiencias, custos)].reset_index(drop=True), estatisticas
@@ -1,88 +1,430 @@
-# database.py (Versão 2.0 com Projetos e Cenários)
+# database.py (Versão 4.0 com armazenamento compacto, metadados indexados e histórico de versões)
 
+import os
+import queue
 import sqlite3
 import json
+import threading
+import time
+import zlib
+from contextlib import contextmanager
 from datetime import datetime
 
 DB_NAME = 'plataforma_hidraulica.db'
 
+# Listagens de projetos/cenários são consultadas a cada rerun; guardamos por poucos segundos.
+TTL_LISTAGENS_S = 5.0
+
+# Formato do payload dos cenários: JSON compacto, opcionalmente comprimido com zlib.
+VERSAO_FORMATO = 2
+COMPRIMIR_CENARIOS = True
+
+# Resultados de cálculo persistidos por usuário: acima disso os mais antigos são descartados a cada gravação.
+MAX_RESULTADOS_CACHE = 500
+
+# Conexões ociosas mantidas por processo e arquivo de banco. O Streamlit executa cada rerun em uma thread nova,
+# então as conexões são compartilhadas entre threads (uma por vez) em vez de presas à thread que as abriu.
+TAMANHO_POOL = 4
+
+_pools = {}
+_lock_pools = threading.Lock()
+_cache_listagens = {}
+_geracoes_listagens = {}  # (DB_NAME, username) -> contador incrementado a cada invalidação
+_lock_listagens = threading.Lock()
+
+def _abrir_conexao():
+    conn = sqlite3.connect(DB_NAME, timeout=30, check_same_thread=False)
+    # WAL permite leitores simultâneos a um escritor; NORMAL é seguro com WAL e evita fsync a cada commit.
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-8000")
+    return conn
+
+@contextmanager
+def _conexao():
+    """Empresta uma conexão do pool do processo (abrindo uma nova se todas estiverem em uso) e a devolve ao final do bloco."""
+    chave = (os.getpid(), DB_NAME)
+    with _lock_pools:
+        pool = _pools.get(chave)
+        if pool is None:
+            pool = _pools[chave] = queue.Queue(TAMANHO_POOL)
+    try:
+        conn = pool.get_nowait()
+    except queue.Empty:
+        conn = _abrir_conexao()
+    try:
+        yield conn
+    finally:
+        if conn.in_transaction: conn.rollback()
+        try:
+            pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+@contextmanager
+def _transacao():
+    """Executa um bloco de escrita em uma única transação (commit ao final, rollback em caso de erro)."""
+    with _conexao() as conn:
+        try:
+            yield conn.cursor()
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+def _listagem_em_cache(chave, consulta):
+    agora = time.monotonic()
+    with _lock_listagens:
+        item = _cache_listagens.get(chave)
+        if item and agora - item[0] < TTL_LISTAGENS_S:
+            return list(item[1])
+        geracao = _geracoes_listagens.get(chave[:2], 0)
+    valor = consulta()
+    with _lock_listagens:
+        # Uma gravação invalidou as listagens durante a consulta: o resultado pode estar desatualizado, não guarda.
+        if _geracoes_listagens.get(chave[:2], 0) == geracao:
+            _cache_listagens[chave] = (agora, valor)
+    return list(valor)
+
+def _invalidar_listagens(username):
+    with _lock_listagens:
+        _geracoes_listagens[(DB_NAME, username)] = _geracoes_listagens.get((DB_NAME, username), 0) + 1
+        for chave in [c for c in _cache_listagens if c[0] == DB_NAME and c[1] == username]:
+            del _cache_listagens[chave]
+
 def setup_database():
-    """Cria a nova tabela 'scenarios' se ela não existir."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    # ALTERADO: A tabela agora se chama 'scenarios' e tem uma estrutura hierárquica.
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS scenarios (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT NOT NULL,
-            project_name TEXT NOT NULL,
-            scenario_name TEXT NOT NULL,
-            scenario_data TEXT NOT NULL, -- Armazenará os dados do cenário como um JSON
-            last_modified TIMESTAMP NOT NULL,
-            UNIQUE(username, project_name, scenario_name) -- A combinação dos três deve ser única
-        )
-    ''')
-    conn.commit()
-    conn.close()
-
-# ALTERADO: Função renomeada e adaptada para salvar cenários.
-def save_scenario(username, project_name, scenario_name, scenario_data):
-    """Salva ou atualiza um cenário dentro de um projeto para um usuário."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    
-    scenario_data_json = json.dumps(scenario_data)
-    timestamp = datetime.now()
-
-    # Lógica para inserir um novo cenário ou substituir um existente.
+    """Cria as tabelas e índices se eles não existirem."""
+    with _transacao() as cursor:
+        # ALTERADO: A tabela agora se chama 'scenarios' e tem uma estrutura hierárquica.
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS scenarios (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT NOT NULL,
+                project_name TEXT NOT NULL,
+                scenario_name TEXT NOT NULL,
+                scenario_data TEXT NOT NULL, -- Armazenará os dados do cenário como um JSON
+                last_modified TIMESTAMP NOT NULL,
+                UNIQUE(username, project_name, scenario_name) -- A combinação dos três deve ser única
+            )
+        ''')
+        # NOVO: Índice para a listagem de cenários ordenada por data (a UNIQUE já atende à de projetos).
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_scenarios_listagem ON scenarios (username, project_name, last_modified DESC, scenario_name)")
+        # NOVO: Payload compacto e metadados de resumo, lidos sem desserializar o cenário.
+        colunas = {row[1] for row in cursor.execute("PRAGMA table_info(scenarios)")}
+        for coluna, tipo in _COLUNAS_FORMATO.items():
+            if coluna not in colunas: cursor.execute(f"ALTER TABLE scenarios ADD COLUMN {coluna} {tipo}")
+        # NOVO: Histórico de versões como deltas reversos (da versão seguinte para a anterior).
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS scenario_revisions (
+                scenario_id INTEGER NOT NULL,
+                revision INTEGER NOT NULL,
+                delta BLOB NOT NULL,
+                last_modified TIMESTAMP NOT NULL,
+                PRIMARY KEY(scenario_id, revision)
+            )
+        ''')
+        _migrar_cenarios_antigos(cursor)
+        # NOVO: Resultados de cálculo endereçados pelo hash das entradas (ver cache_resultados.py).
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS result_cache (
+                username TEXT NOT NULL,
+                cache_key TEXT NOT NULL,
+                result_data TEXT NOT NULL, -- Resultado serializado em JSON
+                last_modified TIMESTAMP NOT NULL,
+                PRIMARY KEY(username, cache_key)
+            )
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_result_cache_idade ON result_cache (username, last_modified DESC)")
+        # NOVO: Catálogo de bombas com as curvas já ajustadas (coeficientes em JSON, maior grau primeiro).
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS pump_catalog (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                manufacturer TEXT NOT NULL,
+                model TEXT NOT NULL,
+                rotation_rpm REAL,
+                impeller_mm REAL,
+                head_coefficients TEXT NOT NULL,
+                efficiency_coefficients TEXT NOT NULL,
+                shutoff_head_m REAL NOT NULL, -- Maior altura da curva na faixa de vazão
+                min_flow_m3h REAL NOT NULL,
+                max_flow_m3h REAL NOT NULL,
+                bep_flow_m3h REAL,
+                bep_efficiency REAL,
+                last_modified TIMESTAMP NOT NULL,
+                UNIQUE(manufacturer, model)
+            )
+        ''')
+        # Poda da triagem: altura de shutoff acima da exigida e faixa de vazão que alcança a desejada.
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_pump_catalog_envelope ON pump_catalog (shutoff_head_m, max_flow_m3h, min_flow_m3h)")
+
+_COLUNAS_FORMATO = {
+    'format_version': 'INTEGER', 'encoding': 'TEXT', 'payload': 'BLOB', 'revision': 'INTEGER',
+    'segment_count': 'INTEGER', 'total_length_m': 'REAL', 'fluid': 'TEXT', 'op_flow_m3h': 'REAL', 'op_head_m': 'REAL',
+}
+
+def _codificar(dados, comprimir=None):
+    """Serializa em JSON compacto; comprime com zlib se `comprimir` (padrão: COMPRIMIR_CENARIOS)."""
+    bruto = json.dumps(dados, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    if COMPRIMIR_CENARIOS if comprimir is None else comprimir:
+        return 'json+zlib', zlib.compress(bruto, 6)
+    return 'json', bruto
+
+def _decodificar(encoding, payload):
+    if encoding == 'json+zlib': payload = zlib.decompress(payload)
+    return json.loads(payload)
+
+def _dados_da_linha(scenario_data, encoding, payload):
+    # Linhas do formato antigo guardam o JSON em 'scenario_data'; as novas, no payload.
+    return _decodificar(encoding, payload) if payload is not None else json.loads(scenario_data)
+
+def _resumo(dados):
+    """Metadados de resumo gravados em colunas próprias."""
+    trechos = list(dados.get('trechos_antes', [])) + list(dados.get('trechos_depois', []))
+    trechos += [t for ramal in dados.get('ramais_paralelos', {}).values() for t in ramal]
+    return len(trechos), float(sum(t.get('comprimento', 0) for t in trechos)), dados.get('fluido_selecionado')
+
+def _diferenca(novo, antigo):
+    """Delta que transforma `novo` em `antigo` (None se iguais).
+
+    Formato: {"=": valor} substitui; {"~": {chave: delta}, "-": [chaves]} altera um dicionário;
+    {"[": {índice: delta}} altera uma lista de mesmo tamanho.
+    """
+    if novo == antigo: return None
+    if isinstance(novo, dict) and isinstance(antigo, dict):
+        alteracoes = {}
+        for chave, valor in antigo.items():
+            if chave not in novo: alteracoes[chave] = {"=": valor}
+            else:
+                delta = _diferenca(novo[chave], valor)
+                if delta is not None: alteracoes[chave] = delta
+        return {"~": alteracoes, "-": [chave for chave in novo if chave not in antigo]}
+    if isinstance(novo, list) and isinstance(antigo, list) and len(novo) == len(antigo):
+        return {"[": {str(i): d for i, d in ((i, _diferenca(n, a)) for i, (n, a) in enumerate(zip(novo, antigo))) if d is not None}}
+    return {"=": antigo}
+
+def _aplicar_diferenca(dados, delta):
+    if delta is None: return dados
+    if "=" in delta: return delta["="]
+    if "[" in delta:
+        dados = list(dados)
+        for indice, sub in delta["["].items(): dados[int(indice)] = _aplicar_diferenca(dados[int(indice)], sub)
+        return dados
+    dados = {chave: valor for chave, valor in dados.items() if chave not in delta["-"]}
+    for chave, sub in delta["~"].items(): dados[chave] = _aplicar_diferenca(dados.get(chave), sub)
+    return dados
+
+def _migrar_cenarios_antigos(cursor):
+    """Converte uma única vez as linhas do formato JSON antigo para o payload compacto com metadados."""
+    linhas = cursor.execute("SELECT id, scenario_data FROM scenarios WHERE payload IS NULL").fetchall()
+    for id_cenario, scenario_data in linhas:
+        dados = json.loads(scenario_data)
+        encoding, payload = _codificar(dados)
+        cursor.execute("UPDATE scenarios SET scenario_data = '', format_version = ?, encoding = ?, payload = ?, revision = 1, segment_count = ?, total_length_m = ?, fluid = ? WHERE id = ?",
+                       (VERSAO_FORMATO, encoding, payload, *_resumo(dados), id_cenario))
+
+def _salvar_cenario(cursor, username, project_name, scenario_name, scenario_data, timestamp, operating_point=None):
+    """Grava o cenário e guarda a versão anterior como delta reverso em 'scenario_revisions'."""
+    encoding, payload = _codificar(scenario_data)
+    vazao_op, altura_op = operating_point if operating_point else (None, None)
+    atual = cursor.execute("SELECT id, scenario_data, encoding, payload, revision, last_modified FROM scenarios WHERE username = ? AND project_name = ? AND scenario_name = ?",
+                           (username, project_name, scenario_name)).fetchone()
+    if atual is None:
+        cursor.execute('''
+            INSERT INTO scenarios (username, project_name, scenario_name, scenario_data, last_modified, format_version, encoding, payload, revision,
+                                   segment_count, total_length_m, fluid, op_flow_m3h, op_head_m)
+            VALUES (?, ?, ?, '', ?, ?, ?, ?, 1, ?, ?, ?, ?, ?)
+        ''', (username, project_name, scenario_name, timestamp, VERSAO_FORMATO, encoding, payload, *_resumo(scenario_data), vazao_op, altura_op))
+        return
+    id_cenario, dados_antigos_json, encoding_antigo, payload_antigo, revisao, modificado = atual
+    revisao = revisao or 1
+    delta = _diferenca(scenario_data, _dados_da_linha(dados_antigos_json, encoding_antigo, payload_antigo))
+    if delta is not None:
+        _, delta_codificado = _codificar(delta, comprimir=True)
+        cursor.execute("INSERT OR REPLACE INTO scenario_revisions (scenario_id, revision, delta, last_modified) VALUES (?, ?, ?, ?)", (id_cenario, revisao, delta_codificado, modificado))
+        revisao += 1
     cursor.execute('''
-        INSERT OR REPLACE INTO scenarios (id, username, project_name, scenario_name, scenario_data, last_modified)
-        VALUES ((SELECT id FROM scenarios WHERE username = ? AND project_name = ? AND scenario_name = ?), ?, ?, ?, ?, ?)
-    ''', (username, project_name, scenario_name, username, project_name, scenario_name, scenario_data_json, timestamp))
-    
-    conn.commit()
-    conn.close()
+        UPDATE scenarios SET scenario_data = '', last_modified = ?, format_version = ?, encoding = ?, payload = ?, revision = ?,
+                             segment_count = ?, total_length_m = ?, fluid = ?, op_flow_m3h = ?, op_head_m = ?
+        WHERE id = ?
+    ''', (timestamp, VERSAO_FORMATO, encoding, payload, revisao, *_resumo(scenario_data), vazao_op, altura_op, id_cenario))
+
+# ALTERADO: Payload compacto, metadados de resumo e versão anterior guardada como delta.
+def save_scenario(username, project_name, scenario_name, scenario_data, operating_point=None):
+    """Salva ou atualiza um cenário dentro de um projeto para um usuário.
+
+    `operating_point` (vazão m³/h, altura m) é opcional e fica disponível na listagem resumida.
+    """
+    with _transacao() as cursor:
+        _salvar_cenario(cursor, username, project_name, scenario_name, scenario_data, datetime.now(), operating_point)
+    _invalidar_listagens(username)
     return True
 
+# NOVO: Salva vários cenários em uma única transação.
+def save_scenarios(username, scenarios):
+    """Salva vários cenários de uma vez. `scenarios` é um iterável de (project_name, scenario_name, scenario_data)."""
+    timestamp, total = datetime.now(), 0
+    with _transacao() as cursor:
+        for project_name, scenario_name, scenario_data in scenarios:
+            _salvar_cenario(cursor, username, project_name, scenario_name, scenario_data, timestamp); total += 1
+    _invalidar_listagens(username)
+    return total
+
 # ALTERADO: Função renomeada e adaptada para carregar cenários.
 def load_scenario(username, project_name, scenario_name):
     """Carrega os dados de um cenário específico de um projeto."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("SELECT scenario_data FROM scenarios WHERE username = ? AND project_name = ? AND scenario_name = ?", (username, project_name, scenario_name))
-    result = cursor.fetchone()
-    conn.close()
-    
+    with _conexao() as conn:
+        result = conn.execute("SELECT scenario_data, encoding, payload FROM scenarios WHERE username = ? AND project_name = ? AND scenario_name = ?", (username, project_name, scenario_name)).fetchone()
     if result:
-        return json.loads(result[0])
+        return _dados_da_linha(*result)
     return None
 
+# NOVO: Carrega todos (ou alguns) cenários de um projeto em uma única consulta.
+def load_scenarios(username, project_name, scenario_names=None):
+    """Retorna {nome_do_cenário: dados} para os cenários de um projeto (todos, se `scenario_names` for None)."""
+    sql = "SELECT scenario_name, scenario_data, encoding, payload FROM scenarios WHERE username = ? AND project_name = ?"
+    parametros = [username, project_name]
+    if scenario_names is not None:
+        scenario_names = list(scenario_names)
+        if not scenario_names: return {}
+        sql += f" AND scenario_name IN ({', '.join('?' * len(scenario_names))})"
+        parametros += scenario_names
+    with _conexao() as conn:
+        return {nome: _dados_da_linha(dados, encoding, payload) for nome, dados, encoding, payload in conn.execute(sql, parametros)}
+
 # ALTERADO: A query agora busca por nomes de projetos distintos.
 def get_user_projects(username):
     """Retorna uma lista com os nomes únicos de todos os projetos de um usuário."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("SELECT DISTINCT project_name FROM scenarios WHERE username = ? ORDER BY project_name ASC", (username,))
-    projects = [row[0] for row in cursor.fetchall()]
-    conn.close()
-    return projects
+    def consulta():
+        with _conexao() as conn:
+            return [row[0] for row in conn.execute("SELECT DISTINCT project_name FROM scenarios WHERE username = ? ORDER BY project_name ASC", (username,))]
+    return _listagem_em_cache((DB_NAME, username, 'projetos'), consulta)
 
 # NOVO: Função para buscar todos os cenários de um projeto específico.
 def get_scenarios_for_project(username, project_name):
     """Retorna uma lista com os nomes de todos os cenários de um projeto específico."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("SELECT scenario_name FROM scenarios WHERE username = ? AND project_name = ? ORDER BY last_modified DESC", (username, project_name))
-    scenarios = [row[0] for row in cursor.fetchall()]
-    conn.close()
-    return scenarios
+    def consulta():
+        with _conexao() as conn:
+            return [row[0] for row in conn.execute("SELECT scenario_name FROM scenarios WHERE username = ? AND project_name = ? ORDER BY last_modified DESC", (username, project_name))]
+    return _listagem_em_cache((DB_NAME, username, 'cenarios', project_name), consulta)
+
+# NOVO: Listagem resumida a partir das colunas de metadados (sem ler os payloads).
+def get_scenario_summaries(username, project_name):
+    """Retorna dicionários com nome, revisão, data, nº de trechos, comprimento total, fluido e último ponto de operação."""
+    with _conexao() as conn:
+        linhas = conn.execute('''
+            SELECT scenario_name, revision, last_modified, segment_count, total_length_m, fluid, op_flow_m3h, op_head_m
+            FROM scenarios WHERE username = ? AND project_name = ? ORDER BY last_modified DESC
+        ''', (username, project_name)).fetchall()
+    chaves = ('scenario_name', 'revision', 'last_modified', 'segment_count', 'total_length_m', 'fluid', 'op_flow_m3h', 'op_head_m')
+    return [dict(zip(chaves, row)) for row in linhas]
+
+# NOVO: Histórico de versões de um cenário.
+def get_scenario_revisions(username, project_name, scenario_name):
+    """Retorna [(revisão, data)] da mais recente (a atual) para a mais antiga."""
+    with _conexao() as conn:
+        atual = conn.execute("SELECT id, revision, last_modified FROM scenarios WHERE username = ? AND project_name = ? AND scenario_name = ?", (username, project_name, scenario_name)).fetchone()
+        if atual is None: return []
+        anteriores = conn.execute("SELECT revision, last_modified FROM scenario_revisions WHERE scenario_id = ? ORDER BY revision DESC", (atual[0],)).fetchall()
+    return [(atual[1] or 1, atual[2])] + anteriores
+
+def load_scenario_revision(username, project_name, scenario_name, revision):
+    """Reconstrói uma versão anterior aplicando os deltas reversos a partir da versão atual."""
+    with _conexao() as conn:
+        atual = conn.execute("SELECT id, scenario_data, encoding, payload, revision FROM scenarios WHERE username = ? AND project_name = ? AND scenario_name = ?", (username, project_name, scenario_name)).fetchone()
+        if atual is None: return None
+        deltas = conn.execute("SELECT delta FROM scenario_revisions WHERE scenario_id = ? AND revision >= ? ORDER BY revision DESC", (atual[0], revision)).fetchall()
+    dados = _dados_da_linha(*atual[1:4])
+    for (delta,) in deltas:
+        dados = _aplicar_diferenca(dados, _decodificar('json+zlib', delta))
+    return dados
+
+# NOVO: Comparação entre dois cenários (carrega apenas os dois payloads envolvidos).
+def diff_scenarios(username, project_name, scenario_a, scenario_b):
+    """Retorna o delta que transforma o cenário A no cenário B (None se forem iguais)."""
+    dados = load_scenarios(username, project_name, [scenario_a, scenario_b])
+    return _diferenca(dados[scenario_a], dados[scenario_b])
 
 # ALTERADO: Função renomeada e adaptada para deletar cenários.
 def delete_scenario(username, project_name, scenario_name):
-    """Deleta um cenário específico de um projeto."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM scenarios WHERE username = ? AND project_name = ? AND scenario_name = ?", (username, project_name, scenario_name))
-    conn.commit()
-    conn.close()
+    """Deleta um cenário específico de um projeto e seu histórico de versões."""
+    with _transacao() as cursor:
+        cursor.execute("DELETE FROM scenario_revisions WHERE scenario_id IN (SELECT id FROM scenarios WHERE username = ? AND project_name = ? AND scenario_name = ?)", (username, project_name, scenario_name))
+        cursor.execute("DELETE FROM scenarios WHERE username = ? AND project_name = ? AND scenario_name = ?", (username, project_name, scenario_name))
+    _invalidar_listagens(username)
+    return True
+
+# NOVO: Persistência dos resultados memoizados, para que cenários carregados já venham calculados.
+def save_cached_result(username, cache_key, result_data_json):
+    """Salva (ou substitui) um resultado calculado identificado pelo hash das entradas.
+
+    Mantém no máximo `MAX_RESULTADOS_CACHE` resultados por usuário, descartando os gravados há mais tempo.
+    """
+    with _transacao() as cursor:
+        cursor.execute("INSERT OR REPLACE INTO result_cache (username, cache_key, result_data, last_modified) VALUES (?, ?, ?, ?)", (username, cache_key, result_data_json, datetime.now()))
+        cursor.execute("""
+            DELETE FROM result_cache WHERE username = ? AND cache_key IN (
+                SELECT cache_key FROM result_cache WHERE username = ? ORDER BY last_modified DESC LIMIT -1 OFFSET ?)
+        """, (username, username, MAX_RESULTADOS_CACHE))
+    return True
+
+def load_cached_result(username, cache_key):
+    """Retorna o JSON de um resultado salvo para o hash informado, ou None."""
+    with _conexao() as conn:
+        result = conn.execute("SELECT result_data FROM result_cache WHERE username = ? AND cache_key = ?", (username, cache_key)).fetchone()
+    return result[0] if result else None
+
+# NOVO: Catálogo de bombas (compartilhado entre os usuários).
+_COLUNAS_CATALOGO = ('manufacturer', 'model', 'rotation_rpm', 'impeller_mm', 'head_coefficients', 'efficiency_coefficients',
+                     'shutoff_head_m', 'min_flow_m3h', 'max_flow_m3h', 'bep_flow_m3h', 'bep_efficiency')
+
+def save_pump_models(models):
+    """Salva (ou substitui, por fabricante e modelo) vários modelos de bomba em uma única transação.
+
+    Cada modelo é um dicionário com as chaves de `_COLUNAS_CATALOGO`; os coeficientes são listas.
+    """
+    timestamp, total = datetime.now(), 0
+    with _transacao() as cursor:
+        for modelo in models:
+            valores = [modelo.get(coluna) for coluna in _COLUNAS_CATALOGO]
+            valores[4], valores[5] = json.dumps(list(valores[4])), json.dumps(list(valores[5]))
+            cursor.execute(f"INSERT OR REPLACE INTO pump_catalog ({', '.join(_COLUNAS_CATALOGO)}, last_modified) VALUES ({', '.join('?' * len(_COLUNAS_CATALOGO))}, ?)", (*valores, timestamp))
+            total += 1
+    return total
+
+def find_pump_candidates(min_shutoff_head_m, min_flow_m3h=0.0, max_flow_m3h=None):
+    """Modelos cuja altura de shutoff passa de `min_shutoff_head_m` e cuja faixa de vazão alcança
+    `min_flow_m3h` (e começa antes de `max_flow_m3h`, se informado). Usa o índice de envelope."""
+    sql = f"SELECT id, {', '.join(_COLUNAS_CATALOGO)} FROM pump_catalog WHERE shutoff_head_m > ? AND max_flow_m3h >= ?"
+    parametros = [min_shutoff_head_m, min_flow_m3h]
+    if max_flow_m3h is not None:
+        sql += " AND min_flow_m3h <= ?"; parametros.append(max_flow_m3h)
+    with _conexao() as conn:
+        registros = conn.execute(sql, parametros).fetchall()
+    linhas = []
+    for linha in registros:
+        dados = dict(zip(('id',) + _COLUNAS_CATALOGO, linha))
+        dados['head_coefficients'], dados['efficiency_coefficients'] = json.loads(dados['head_coefficients']), json.loads(dados['efficiency_coefficients'])
+        linhas.append(dados)
+    return linhas
+
+def load_pump_model(pump_id):
+    """Carrega um modelo do catálogo pelo id (None se não existir)."""
+    with _conexao() as conn:
+        linha = conn.execute(f"SELECT id, {', '.join(_COLUNAS_CATALOGO)} FROM pump_catalog WHERE id = ?", (int(pump_id),)).fetchone()
+    if linha is None: return None
+    dados = dict(zip(('id',) + _COLUNAS_CATALOGO, linha))
+    dados['head_coefficients'], dados['efficiency_coefficients'] = json.loads(dados['head_coefficients']), json.loads(dados['efficiency_coefficients'])
+    return dados
+
+def count_pump_models():
+    """Número de modelos no catálogo."""
+    with _conexao() as conn:
+        return conn.execute("SELECT COUNT(*) FROM pump_catalog").fetchone()[0]
+
+def delete_pump_model(manufacturer, model):
+    """Remove um modelo do catálogo."""
+    with _transacao() as cursor:
+        cursor.execute("DELETE FROM pump_catalog WHERE manufacturer = ? AND model = ?", (manufacturer, model))
     return True
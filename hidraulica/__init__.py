@@ -0,0 +1,42 @@
+# hidraulica/__init__.py
+# Pacote do motor de cálculo. Os submódulos são importados sob demanda (PEP 562): `from hidraulica import X`
+# carrega apenas o submódulo que define X, e o núcleo só depende do NumPy — SciPy e pandas entram na primeira
+# chamada que precisa deles. Constantes de mesmo nome em submódulos distintos (ex.: TAMANHO_BLOCO_PADRAO)
+# ficam fora daqui e devem ser importadas de `hidraulica.<submódulo>`.
+
+import importlib
+
+_EXPORTACOES = {
+    'atrito': ('MODO_PADRAO', 'MODOS_ATRITO', 'fator_atrito', 'fator_atrito_e_derivada'),
+    'instrumentacao': ('Diagnostico', 'registrar_solver', 'coletor_ativo', 'configurar_log_json'),
+    'motor': ('GRAVIDADE', 'MATERIAIS', 'K_FACTORS', 'FLUIDOS', 'RedeCompilada', 'compilar_rede', 'calcular_coeficientes_trechos',
+              'calcular_perdas_coeficientes', 'calcular_perdas_vetorizado', 'calcular_analise_energetica', 'extrair_parametros_trechos',
+              'resolver_ponto_operacao_acoplado', 'resolver_divisao_ramais', 'avaliar_curva_sistema', 'calcular_perda_serie',
+              'calcular_perdas_trecho', 'calcular_perdas_paralelo', 'criar_funcao_curva', 'encontrar_ponto_operacao'),
+    'rede_malhada': ('RedeMalhada', 'resolver_rede_malhada', 'sistema_para_rede_malhada'),
+    'varredura': ('PARAMETROS_HIDRAULICOS', 'PARAMETROS_ECONOMICOS', 'varrer_parametros_em_fluxo', 'varrer_parametros',
+                  'gerar_grafico_sensibilidade_diametro'),
+    'simulacao_periodo': ('ler_perfis', 'resolver_ponto_operacao_lote', 'simular_periodo_em_fluxo', 'resumir_simulacao'),
+    'otimizacao_diametros': ('CATALOGO_PADRAO', 'VELOCIDADE_MIN_PADRAO', 'VELOCIDADE_MAX_PADRAO', 'otimizar_diametros',
+                             'aplicar_diametros'),
+    'estacao_bombeamento': ('ARRANJOS', 'ROTACAO_MIN_PADRAO', 'CurvaBomba', 'CurvaSistema', 'EstacaoBombeamento', 'bisseccao',
+                            'escalonamentos'),
+    'incerteza': ('AMOSTRAS_PADRAO', 'DISTRIBUICOES', 'INCERTEZAS_PADRAO', 'PARAMETROS_DISTRIBUICAO', 'ROTULOS_INCERTEZAS',
+                  'VARIAVEIS', 'amostrar', 'EstatisticasFluxo', 'analisar_incerteza_em_fluxo', 'analisar_incerteza',
+                  'tabela_percentis'),
+}
+_ORIGEM = {nome: modulo for modulo, nomes in _EXPORTACOES.items() for nome in nomes}
+
+__all__ = sorted(_ORIGEM)
+
+
+def __getattr__(nome):
+    if nome not in _ORIGEM:
+        raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+    valor = getattr(importlib.import_module(f".{_ORIGEM[nome]}", __name__), nome)
+    globals()[nome] = valor  # próximas consultas não passam mais por aqui
+    return valor
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,271 @@
+# hidraulica/estacao_bombeamento.py
+# Estação de bombeamento: várias bombas em série ou em paralelo, cada uma com a própria curva e inversor de
+# frequência (leis de afinidade), e a varredura de rotação x escalonamento contra a curva do sistema.
+
+import numpy as np
+
+from .instrumentacao import registrar_solver
+from .motor import FLUIDOS, avaliar_curva_sistema
+
+ARRANJOS = {'paralelo': "Paralelo (vazões somadas na mesma altura)", 'serie': "Série (alturas somadas na mesma vazão)"}
+ROTACAO_MIN_PADRAO = 0.5      # fração da rotação nominal; abaixo disso o inversor não opera
+PONTOS_ROTACAO_PADRAO = 51
+PONTOS_CURVA_SISTEMA = 512    # pontos da curva do sistema interpolada na varredura
+PONTOS_INVERSA = 2048         # pontos da inversa Q(H) de cada bomba na rotação nominal
+ITERACOES_BISSECCAO = 60
+PASSES_CORRECAO = 3           # correções da interseção contra a curva do sistema exata
+
+
+class CurvaBomba:
+    """Curvas de uma bomba na rotação nominal e as leis de afinidade para a rotação relativa `s`.
+
+    H(Q, s) = s²·H(Q/s) e η(Q, s) = η(Q/s). Só o ramo descendente da curva de altura é usado, da
+    vazão de altura máxima até a vazão em que a altura zera; a inversa Q(H) desse ramo é tabelada
+    uma vez e vale para qualquer rotação: Q(H, s) = s·Q(H/s²). Rotação 0 é a bomba desligada.
+    """
+
+    def __init__(self, curva_altura, curva_eficiencia, nome="Bomba"):
+        self.nome, self.curva_altura, self.curva_eficiencia = nome, curva_altura, curva_eficiencia
+        raizes = np.roots(curva_altura.coeffs)
+        positivas = np.sort(raizes[(np.abs(raizes.imag) < 1e-9) & (raizes.real > 0)].real)
+        if not len(positivas): raise ValueError(f"A curva de altura de '{nome}' não chega a altura zero.")
+        self.vazao_maxima = float(positivas[0])
+        grade = np.linspace(0.0, self.vazao_maxima, PONTOS_INVERSA)
+        alturas = curva_altura(grade)
+        inicio = int(np.argmax(alturas))
+        self.altura_maxima = float(alturas[inicio])
+        # np.interp pede abscissas crescentes: o ramo descendente é guardado invertido.
+        self._alturas_inversa = np.minimum.accumulate(alturas[inicio:])[::-1]
+        self._vazoes_inversa = grade[inicio:][::-1]
+
+    def altura(self, vazao, rotacao):
+        ligada = rotacao > 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(ligada, rotacao**2 * self.curva_altura(vazao / np.where(ligada, rotacao, 1.0)), 0.0)
+
+    def eficiencia(self, vazao, rotacao):
+        ligada = rotacao > 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(ligada, np.clip(self.curva_eficiencia(vazao / np.where(ligada, rotacao, 1.0)), 0.0, 100.0), 0.0)
+
+    def vazao(self, altura, rotacao):
+        """Vazão na `altura`; zero se a bomba está desligada ou não vence a altura nessa rotação."""
+        ligada = rotacao > 0
+        rotacao = np.where(ligada, rotacao, 1.0)
+        reduzida = altura / rotacao**2
+        vazao = rotacao * np.interp(reduzida, self._alturas_inversa, self._vazoes_inversa)
+        return np.where(ligada & (reduzida < self.altura_maxima), vazao, 0.0)
+
+
+def escalonamentos(num_bombas):
+    """Todas as combinações de bombas ligadas (C, num_bombas), das com menos bombas para as com mais."""
+    mascaras = np.arange(1, 2**num_bombas)[:, None] >> np.arange(num_bombas)[None, :] & 1
+    ordem = np.lexsort((np.arange(len(mascaras)), mascaras.sum(axis=1)))
+    return mascaras[ordem].astype(bool)
+
+
+def bisseccao(folga, baixo, alto):
+    """Raiz de `folga` em [baixo, alto], elemento a elemento (`folga` > 0 à esquerda da raiz), por `ITERACOES_BISSECCAO` passos."""
+    for _ in range(ITERACOES_BISSECCAO):
+        meio = (baixo + alto) / 2
+        positiva = folga(meio) > 0
+        baixo, alto = np.where(positiva, meio, baixo), np.where(positiva, alto, meio)
+    return (baixo + alto) / 2
+
+
+class CurvaSistema:
+    """Curva do sistema numa grade de vazões (calculada uma vez), com a avaliação exata para correção.
+
+    Usada pela estação e pela triagem do catálogo: cruzamentos com muitas curvas de bomba são feitos
+    na grade interpolada e depois corrigidos com a curva exata só nas vazões encontradas.
+    """
+
+    def __init__(self, rede, h_geometrica, nu, vazao_maxima):
+        self.rede, self.h_geometrica, self.nu = rede, h_geometrica, nu
+        vazoes = np.linspace(0.0, vazao_maxima, PONTOS_CURVA_SISTEMA)
+        curva = avaliar_curva_sistema(rede, vazoes, h_geometrica, nu)
+        valido = curva['convergiu']
+        self.vazoes, self.alturas = vazoes[valido], np.maximum.accumulate(curva['altura'][valido])
+
+    def altura(self, vazao): return np.interp(vazao, self.vazoes, self.alturas)
+
+    def vazao(self, altura): return np.interp(altura, self.alturas, self.vazoes)
+
+    def correcao(self, vazao):
+        """Diferença entre a curva exata e a interpolada em cada vazão (0 onde a divisão não convergiu)."""
+        exata = avaliar_curva_sistema(self.rede, vazao, self.h_geometrica, self.nu)['altura']
+        return np.nan_to_num(exata - self.altura(vazao))
+
+    def intersecao_corrigida(self, intersecao, casos, passes=PASSES_CORRECAO):
+        """Executa `intersecao(correcao)` e a corrige `passes` vezes com a curva exata na vazão encontrada.
+
+        `intersecao` recebe o deslocamento (casos,) da curva e retorna uma tupla (vazao, ..., existe).
+        Retorna (resultado da última interseção, passes feitos).
+        """
+        correcao = np.zeros(casos)
+        resultado, feitos = intersecao(correcao), 0
+        while feitos < passes and resultado[-1].any():
+            existe = resultado[-1]
+            correcao[existe] = self.correcao(resultado[0][existe])
+            resultado, feitos = intersecao(correcao), feitos + 1
+        return resultado, feitos
+
+
+class EstacaoBombeamento:
+    """Estação com as `bombas` (lista de `CurvaBomba`) em `arranjo` 'paralelo' ou 'serie' ligada à `rede`.
+
+    Em paralelo as bombas ligadas trabalham na mesma altura e as vazões se somam (cada uma com
+    válvula de retenção: não entrega vazão abaixo da própria altura de shutoff); em série passam a
+    mesma vazão e as alturas se somam (bombas desligadas ficam em bypass). As rotações são frações
+    da nominal, uma por bomba; 0 desliga a bomba.
+    """
+
+    def __init__(self, rede, bombas, arranjo, h_geometrica, fluido, eficiencia_motor_percent, rotacao_maxima=1.0):
+        if arranjo not in ARRANJOS: raise ValueError(f"Arranjo desconhecido: '{arranjo}'.")
+        if not bombas: raise ValueError("A estação precisa de ao menos uma bomba.")
+        self.bombas, self.arranjo, self.h_geometrica = list(bombas), arranjo, float(h_geometrica)
+        self.rho, self.eficiencia_motor = FLUIDOS[fluido]["rho"], eficiencia_motor_percent / 100
+        self.rotacao_maxima = float(rotacao_maxima)
+        vazoes_maximas = [b.vazao_maxima * self.rotacao_maxima for b in self.bombas]
+        vazao_maxima = sum(vazoes_maximas) if arranjo == 'paralelo' else max(vazoes_maximas)
+        self.curva_sistema = CurvaSistema(rede, self.h_geometrica, FLUIDOS[fluido]["nu"], vazao_maxima)
+
+    def _altura_serie(self, rotacoes, vazoes):
+        return sum(b.altura(vazoes, rotacoes[:, i]) for i, b in enumerate(self.bombas))
+
+    def _vazao_paralelo(self, rotacoes, alturas):
+        return sum(b.vazao(alturas, rotacoes[:, i]) for i, b in enumerate(self.bombas))
+
+    def curva_combinada(self, rotacoes, pontos=200):
+        """(vazões, alturas) da curva da estação com as `rotacoes` (N,) dadas, para gráficos."""
+        rotacoes = np.asarray(rotacoes, dtype=float)[None, :]
+        if self.arranjo == 'serie':
+            vazao_maxima = max(b.vazao_maxima * s for b, s in zip(self.bombas, rotacoes[0]))
+            vazoes = np.linspace(0.0, vazao_maxima, pontos)
+            alturas = self._altura_serie(np.repeat(rotacoes, pontos, axis=0), vazoes)
+            return vazoes[alturas >= 0], alturas[alturas >= 0]
+        altura_maxima = max(b.altura_maxima * s**2 for b, s in zip(self.bombas, rotacoes[0]))
+        alturas = np.linspace(0.0, altura_maxima, pontos)
+        return self._vazao_paralelo(np.repeat(rotacoes, pontos, axis=0), alturas), alturas
+
+    def _intersecao(self, rotacoes, correcao):
+        """Interseção com a curva do sistema (deslocada de `correcao`) por bissecção vetorizada."""
+        curva = self.curva_sistema
+        if self.arranjo == 'serie':
+            baixo, alto = np.zeros(len(rotacoes)), np.full(len(rotacoes), curva.vazoes[-1])
+            def folga(vazao): return self._altura_serie(rotacoes, vazao) - curva.altura(vazao) - correcao
+        else:
+            alturas_maximas = np.max(rotacoes**2 * np.array([b.altura_maxima for b in self.bombas]), axis=1)
+            baixo, alto = curva.alturas[0] + correcao, np.maximum(alturas_maximas, curva.alturas[0] + correcao)
+            def folga(altura): return self._vazao_paralelo(rotacoes, altura) - curva.vazao(altura - correcao)
+        existe = folga(baixo) > 0
+        meio = bisseccao(folga, baixo, alto)
+        if self.arranjo == 'serie': vazao, altura = meio, curva.altura(meio) + correcao
+        else: vazao, altura = self._vazao_paralelo(rotacoes, meio), meio
+        return np.where(existe, vazao, 0.0), np.where(existe, altura, np.nan), existe
+
+    def _desempenho(self, rotacoes, vazao, altura, existe):
+        """Vazão, altura, eficiência e potência de cada bomba e os totais da estação."""
+        ligadas = (rotacoes > 0) & existe[:, None]
+        altura_segura = np.nan_to_num(altura)
+        if self.arranjo == 'serie':
+            vazoes = np.where(ligadas, vazao[:, None], 0.0)
+            alturas = np.column_stack([b.altura(vazao, rotacoes[:, i]) for i, b in enumerate(self.bombas)])
+        else:
+            vazoes = np.column_stack([b.vazao(altura_segura, rotacoes[:, i]) for i, b in enumerate(self.bombas)])
+            alturas = np.where(ligadas, altura_segura[:, None], 0.0)
+        alturas = np.where(ligadas, alturas, 0.0)
+        eficiencias = np.where(ligadas, np.column_stack([b.eficiencia(vazoes[:, i], rotacoes[:, i]) for i, b in enumerate(self.bombas)]), 0.0)
+        # Bomba ligada sem vazão, com altura negativa ou eficiência nula: configuração fora da curva útil.
+        viavel = existe & np.all(~ligadas | ((vazoes > 1e-6) & (alturas > 0) & (eficiencias > 0)), axis=1)
+        rendimento = eficiencias / 100 * self.eficiencia_motor
+        with np.errstate(divide='ignore', invalid='ignore'):
+            potencias = np.where(ligadas & (rendimento > 0), vazoes / 3600 * self.rho * 9.81 * alturas / rendimento / 1000, 0.0)
+        potencia = np.where(viavel, potencias.sum(axis=1), np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            eficiencia_global = np.where(viavel & (potencia > 0), vazao / 3600 * self.rho * 9.81 * altura_segura / 1000 / potencia * 100, np.nan)
+        return {'vazao': vazao, 'altura': altura, 'existe': existe, 'viavel': viavel, 'potencia_kW': potencia,
+                'eficiencia_global_percent': eficiencia_global, 'vazoes_bombas': vazoes, 'alturas_bombas': alturas,
+                'eficiencias_bombas': eficiencias, 'potencias_bombas': potencias}
+
+    def resolver(self, rotacoes, exato=True):
+        """Ponto de operação para cada linha de `rotacoes` (C, N) ou (N,), em lote.
+
+        A interseção é feita na curva do sistema interpolada; com `exato=True` ela é corrigida
+        com a curva exata na vazão encontrada (`PASSES_CORRECAO` vezes), o que a leva à precisão
+        do cálculo ponto a ponto. Retorna um dicionário de arrays (ver `_desempenho`).
+        """
+        rotacoes = np.atleast_2d(np.asarray(rotacoes, dtype=float))
+        (vazao, altura, existe), passes = self.curva_sistema.intersecao_corrigida(lambda correcao: self._intersecao(rotacoes, correcao), len(rotacoes),
+                                                                                  PASSES_CORRECAO if exato else 0)
+        registrar_solver('estacao_bisseccao', iteracoes=(passes + 1) * ITERACOES_BISSECCAO, casos=len(rotacoes), falhas=int((~existe).sum()))
+        return self._desempenho(rotacoes, vazao, altura, existe)
+
+    def _rotulos(self, mascaras): return ["+".join(b.nome for b, ligada in zip(self.bombas, m) if ligada) for m in mascaras]
+
+    def varrer(self, rotacoes=None, vazao_alvo=None):
+        """Ponto de operação em cada combinação de rotação comum x bombas ligadas, numa chamada em lote.
+
+        Usa a curva do sistema interpolada (sem correção), suficiente para comparar configurações;
+        `escalonar` refina a melhor. Retorna um DataFrame com uma linha por combinação.
+        """
+        import pandas as pd
+        rotacoes = np.linspace(ROTACAO_MIN_PADRAO, self.rotacao_maxima, PONTOS_ROTACAO_PADRAO) if rotacoes is None else np.asarray(rotacoes, dtype=float)
+        mascaras = escalonamentos(len(self.bombas))
+        combinacoes = (mascaras[:, None, :] * rotacoes[None, :, None]).reshape(-1, len(self.bombas))
+        resultado = self.resolver(combinacoes, exato=False)
+        tabela = pd.DataFrame({
+            'bombas': np.repeat(self._rotulos(mascaras), len(rotacoes)),
+            'num_bombas': np.repeat(mascaras.sum(axis=1), len(rotacoes)),
+            'rotacao_percent': np.tile(rotacoes * 100, len(mascaras)),
+            'vazao_m3h': resultado['vazao'], 'altura_m': resultado['altura'], 'potencia_kW': resultado['potencia_kW'],
+            'eficiencia_global_percent': resultado['eficiencia_global_percent'], 'viavel': resultado['viavel']})
+        with np.errstate(divide='ignore', invalid='ignore'):
+            tabela['energia_especifica_kWh_m3'] = tabela['potencia_kW'] / tabela['vazao_m3h']
+        if vazao_alvo is not None: tabela['atende'] = tabela['viavel'] & (tabela['vazao_m3h'] >= vazao_alvo)
+        return tabela
+
+    def escalonar(self, vazao_alvo, rotacao_min=ROTACAO_MIN_PADRAO):
+        """Configuração de menor potência que entrega ao menos `vazao_alvo` (m³/h).
+
+        Para cada combinação de bombas ligadas (rotação comum), a altura exigida é a do sistema
+        na vazão alvo, e a rotação que a entrega é achada por bissecção, em lote. Combinações que
+        passam da vazão já na `rotacao_min` operam nela. Retorna (tabela por combinação ordenada
+        pela potência, dicionário da melhor ou None se nenhuma atende).
+        """
+        import pandas as pd
+        mascaras = escalonamentos(len(self.bombas))
+        altura_alvo = float(avaliar_curva_sistema(self.curva_sistema.rede, [vazao_alvo], self.h_geometrica, self.curva_sistema.nu)['altura'][0])
+        if altura_alvo != altura_alvo: raise ValueError("A divisão de vazão da rede não convergiu na vazão alvo.")
+
+        def entrega(rotacao):
+            rotacoes = mascaras * rotacao[:, None]
+            if self.arranjo == 'serie': return self._altura_serie(rotacoes, np.full(len(mascaras), float(vazao_alvo))) - altura_alvo
+            return self._vazao_paralelo(rotacoes, np.full(len(mascaras), altura_alvo)) - vazao_alvo
+
+        baixo, alto = np.full(len(mascaras), float(rotacao_min)), np.full(len(mascaras), self.rotacao_maxima)
+        atende = entrega(alto) >= 0
+        sobra = entrega(baixo) >= 0
+        for _ in range(ITERACOES_BISSECCAO):
+            meio = (baixo + alto) / 2
+            positiva = entrega(meio) >= 0
+            baixo, alto = np.where(positiva, baixo, meio), np.where(positiva, meio, alto)
+        rotacao = np.where(sobra, rotacao_min, alto)
+        rotacoes = mascaras * rotacao[:, None]
+        resultado = self._desempenho(rotacoes, np.full(len(mascaras), float(vazao_alvo)), np.full(len(mascaras), altura_alvo), atende)
+        if sobra.any():
+            # Na rotação mínima a vazão passa do alvo: ponto de operação real dessas combinações.
+            sobra_resultado = self.resolver(rotacoes[sobra])
+            for chave, valor in sobra_resultado.items(): resultado[chave][sobra] = valor
+        atende &= resultado['viavel']
+        registrar_solver('estacao_escalonamento', iteracoes=ITERACOES_BISSECCAO, casos=len(mascaras), falhas=int((~atende).sum()))
+        tabela = pd.DataFrame({
+            'bombas': self._rotulos(mascaras), 'num_bombas': mascaras.sum(axis=1), 'rotacao_percent': rotacao * 100,
+            'vazao_m3h': resultado['vazao'], 'altura_m': resultado['altura'], 'potencia_kW': np.where(atende, resultado['potencia_kW'], np.nan),
+            'eficiencia_global_percent': np.where(atende, resultado['eficiencia_global_percent'], np.nan), 'atende': atende})
+        tabela = tabela.sort_values(['atende', 'potencia_kW'], ascending=[False, True], kind='stable').reset_index(drop=True)
+        if not atende.any(): return tabela, None
+        indice = int(np.nanargmin(np.where(atende, resultado['potencia_kW'], np.nan)))
+        melhor = {'bombas': self._rotulos(mascaras[indice:indice + 1])[0], 'rotacoes': rotacoes[indice],
+                  **{chave: valor[indice] for chave, valor in resultado.items()}}
+        return tabela, melhor
@@ -0,0 +1,221 @@
+# hidraulica/incerteza.py
+# Análise de incerteza por Monte Carlo: rugosidades, fatores K, altura geométrica e degradação da bomba amostrados
+# de distribuições, ponto de operação resolvido em lote (opcionalmente em vários processos) e estatísticas em fluxo.
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .motor import FLUIDOS, calcular_coeficientes_trechos, resolver_ponto_operacao_acoplado
+from .simulacao_periodo import resolver_ponto_operacao_lote
+
+AMOSTRAS_PADRAO = 20_000
+TAMANHO_BLOCO_PADRAO = 2000
+BARRAS_HISTOGRAMA = 2048   # resolução interna dos histogramas em fluxo (os percentis erram no máximo uma barra)
+PERCENTIS_PADRAO = (10, 50, 90)
+DISTRIBUICOES = {'fixo': "Fixo (valor)", 'uniforme': "Uniforme (mín., máx.)", 'triangular': "Triangular (mín., moda, máx.)",
+                 'normal': "Normal truncada em 0 (média, desvio)"}
+# Fatores multiplicativos, exceto 'h_geometrica' (m; None = valor nominal). Rugosidade e K são amostrados trecho a trecho.
+INCERTEZAS_PADRAO = {
+    'rugosidade': ('triangular', (0.8, 1.0, 3.0)),          # envelhecimento dos tubos
+    'k_acessorios': ('uniforme', (0.8, 1.2)),               # variação entre fabricantes de conexões e válvulas
+    'h_geometrica': None,
+    'altura_bomba': ('triangular', (0.9, 0.97, 1.0)),       # desgaste: fator sobre a curva de altura
+    'eficiencia_bomba': ('triangular', (0.9, 0.97, 1.0)),   # desgaste: fator sobre a curva de eficiência
+}
+ROTULOS_INCERTEZAS = {'rugosidade': "Rugosidade (fator, por trecho)", 'k_acessorios': "Fatores K (fator, por trecho)",
+                      'h_geometrica': "Altura Geométrica (m)", 'altura_bomba': "Curva de Altura (fator)", 'eficiencia_bomba': "Curva de Eficiência (fator)"}
+PARAMETROS_DISTRIBUICAO = {'fixo': 1, 'uniforme': 2, 'triangular': 3, 'normal': 2}
+VARIAVEIS = {'vazao_m3h': "Vazão (m³/h)", 'altura_m': "Altura (m)", 'eficiencia_percent': "Eficiência da Bomba (%)",
+             'potencia_kW': "Potência Elétrica (kW)", 'custo_anual': "Custo Anual (R$)"}
+
+
+def amostrar(distribuicao, tamanho, gerador):
+    """Amostras de `distribuicao` = (tipo, parâmetros) (ver `DISTRIBUICOES`).
+
+    A normal é truncada em zero (reamostrada, não cortada): amostragem pela inversa da CDF restrita a x > 0,
+    sem massa concentrada em zero.
+    """
+    tipo, parametros = distribuicao
+    if tipo == 'fixo': return np.full(tamanho, float(parametros[0]))
+    if tipo == 'uniforme': return gerador.uniform(parametros[0], parametros[1], tamanho)
+    if tipo == 'triangular':
+        minimo, moda, maximo = parametros
+        return np.full(tamanho, float(moda)) if maximo <= minimo else gerador.triangular(minimo, moda, maximo, tamanho)
+    if tipo == 'normal':
+        media, desvio = float(parametros[0]), float(parametros[1])
+        if desvio <= 0: return np.full(tamanho, max(media, 0.0))
+        from scipy.special import ndtr, ndtri
+        # x = μ - σ Φ⁻¹(u Φ(μ/σ)), u em (0, 1]: usar a cauda inferior evita a perda de precisão de 1 - Φ;
+        # o máximo só absorve arredondamento (x ≥ 0 por construção).
+        return np.maximum(media - desvio * ndtri((1.0 - gerador.random(tamanho)) * ndtr(media / desvio)), 0.0)
+    raise ValueError(f"Distribuição desconhecida: '{tipo}'.")
+
+
+class EstatisticasFluxo:
+    """Média, desvio, extremos e histograma de uma variável, atualizados bloco a bloco.
+
+    O histograma tem `barras` de mesma largura; quando chega um valor fora da faixa, a largura dobra
+    (barras vizinhas somadas) e a faixa cresce para o lado do valor. A memória é fixa e os percentis,
+    interpolados dentro da barra, erram no máximo a largura de uma barra.
+    """
+
+    def __init__(self, barras=BARRAS_HISTOGRAMA):
+        self.barras, self.contagens = barras, np.zeros(barras)
+        self.inicio, self.largura = None, None
+        self.total, self.media, self.m2 = 0, 0.0, 0.0
+        self.minimo, self.maximo = np.inf, -np.inf
+
+    def _expandir(self, minimo, maximo):
+        while minimo < self.inicio or maximo >= self.inicio + self.barras * self.largura:
+            somadas = self.contagens.reshape(-1, 2).sum(axis=1)
+            self.contagens = np.zeros(self.barras)
+            if minimo < self.inicio:
+                self.inicio -= self.barras * self.largura
+                self.contagens[self.barras // 2:] = somadas
+            else:
+                self.contagens[:self.barras // 2] = somadas
+            self.largura *= 2
+
+    def adicionar(self, valores):
+        valores = np.asarray(valores, dtype=float)
+        valores = valores[np.isfinite(valores)]
+        if not len(valores): return
+        minimo, maximo = float(valores.min()), float(valores.max())
+        if self.inicio is None:
+            margem = max(maximo - minimo, abs(maximo) * 1e-6, 1e-9)
+            self.inicio, self.largura = minimo - 0.5 * margem, 2.0 * margem / self.barras
+        self._expandir(minimo, maximo)
+        indices = np.minimum(((valores - self.inicio) / self.largura).astype(int), self.barras - 1)
+        self.contagens += np.bincount(indices, minlength=self.barras)
+        # Média e variância combinadas por bloco (Chan et al.), sem guardar as amostras.
+        n, media, m2 = len(valores), float(valores.mean()), float(((valores - valores.mean())**2).sum())
+        total = self.total + n
+        delta = media - self.media
+        self.media += delta * n / total
+        self.m2 += m2 + delta**2 * self.total * n / total
+        self.total = total
+        self.minimo, self.maximo = min(self.minimo, minimo), max(self.maximo, maximo)
+
+    @property
+    def desvio(self): return float(np.sqrt(self.m2 / (self.total - 1))) if self.total > 1 else 0.0
+
+    def percentil(self, p):
+        if not self.total: return np.nan
+        acumulado = np.cumsum(self.contagens)
+        alvo = p / 100 * self.total
+        barra = min(int(np.searchsorted(acumulado, alvo)), self.barras - 1)
+        anterior = acumulado[barra - 1] if barra else 0.0
+        fracao = (alvo - anterior) / self.contagens[barra] if self.contagens[barra] else 0.0
+        return float(np.clip(self.inicio + (barra + fracao) * self.largura, self.minimo, self.maximo))
+
+    def histograma(self, barras=40):
+        """(bordas, contagens) reagrupados em `barras` barras entre o mínimo e o máximo observados."""
+        if not self.total: return np.array([]), np.array([])
+        bordas = np.linspace(self.minimo, self.maximo, barras + 1) if self.maximo > self.minimo else np.array([self.minimo, self.minimo + 1.0])
+        centros = self.inicio + (np.arange(self.barras) + 0.5) * self.largura
+        contagens, _ = np.histogram(np.clip(centros, bordas[0], bordas[-1]), bins=bordas, weights=self.contagens)
+        return bordas, contagens
+
+
+def _resolver_bloco(rede, func_curva_bomba, func_curva_eficiencia, incertezas, h_geometrica, nu, rho, eficiencia_motor_percent,
+                    horas_dia, custo_kwh, ponto_nominal, semente, tamanho):
+    """Executado no processo trabalhador: amostra um bloco, resolve os pontos de operação e calcula energia e custo."""
+    gerador = np.random.default_rng(semente)
+    m = rede.num_trechos
+    fatores_rugosidade = amostrar(incertezas['rugosidade'], tamanho * m, gerador).reshape(tamanho, m) if incertezas.get('rugosidade') else np.ones((tamanho, m))
+    fatores_k = amostrar(incertezas['k_acessorios'], tamanho * m, gerador).reshape(tamanho, m) if incertezas.get('k_acessorios') else np.ones((tamanho, m))
+    alturas_geometricas = amostrar(incertezas['h_geometrica'], tamanho, gerador) if incertezas.get('h_geometrica') else np.full(tamanho, h_geometrica)
+    fator_altura = amostrar(incertezas['altura_bomba'], tamanho, gerador) if incertezas.get('altura_bomba') else np.ones(tamanho)
+    fator_eficiencia = amostrar(incertezas['eficiencia_bomba'], tamanho, gerador) if incertezas.get('eficiencia_bomba') else np.ones(tamanho)
+
+    coeficientes = calcular_coeficientes_trechos(rede.comprimentos, rede.diametros_mm, rede.rugosidades_mm * fatores_rugosidade)
+    # Sem altura de shutoff acima da geométrica não há ponto de operação: nem entra no Newton.
+    existe = fator_altura * func_curva_bomba(0.0) > alturas_geometricas
+    vazao_nominal, vazoes_ramais_nominais = ponto_nominal
+    resolver = np.flatnonzero(existe)
+    vazoes, convergiu = np.zeros(tamanho), np.zeros(tamanho, dtype=bool)
+    if len(resolver):
+        vazoes_sol, _, convergiu_sol = resolver_ponto_operacao_lote(
+            rede, alturas_geometricas[resolver], np.zeros(len(resolver)), nu, func_curva_bomba, np.full(len(resolver), vazao_nominal),
+            np.repeat(vazoes_ramais_nominais[None, :], len(resolver), axis=0) if len(vazoes_ramais_nominais) else None,
+            coeficientes=tuple(np.broadcast_to(c, (tamanho, m))[resolver] for c in coeficientes), k_totais=(rede.k_totais * fatores_k)[resolver],
+            fator_altura=fator_altura[resolver])
+        convergiu[resolver] = convergiu_sol & (vazoes_sol > 1e-3)
+        vazoes[resolver] = vazoes_sol
+    validas = existe & convergiu
+    vazoes = vazoes[validas]
+    alturas = fator_altura[validas] * func_curva_bomba(vazoes)
+    eficiencias = np.clip(fator_eficiencia[validas] * func_curva_eficiencia(vazoes), 0.0, 100.0)
+    rendimento = eficiencias / 100 * eficiencia_motor_percent / 100
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Mesma potência e custo anual de `calcular_analise_energetica`, em lote.
+        potencias = np.where(rendimento > 0, vazoes / 3600 * rho * 9.81 * alturas / rendimento / 1000, np.nan)
+    resultados = {'vazao_m3h': vazoes, 'altura_m': alturas, 'eficiencia_percent': eficiencias, 'potencia_kW': potencias,
+                  'custo_anual': potencias * horas_dia * 30 * 12 * custo_kwh}
+    return resultados, int((~existe).sum()), int((existe & ~convergiu).sum())
+
+
+def analisar_incerteza_em_fluxo(rede, func_curva_bomba, func_curva_eficiencia, h_geometrica, fluido, eficiencia_motor_percent, horas_dia, custo_kwh,
+                                incertezas=None, amostras=AMOSTRAS_PADRAO, tamanho_bloco=TAMANHO_BLOCO_PADRAO, processos=1, semente=0):
+    """Monte Carlo do ponto de operação e do custo anual, gerando o resumo parcial a cada bloco resolvido.
+
+    `incertezas` mapeia as chaves de `INCERTEZAS_PADRAO` para (tipo, parâmetros) ou None (valor
+    nominal). Cada bloco tem a própria semente derivada de `semente`, então o resultado não depende
+    de `processos`; com `processos` > 1 os blocos vão para um ProcessPoolExecutor, com poucos blocos
+    em andamento, e as amostras de cada bloco são descartadas depois de somadas às estatísticas.
+    Gera dicionários com amostras, validas, sem_ponto, nao_convergidas e estatisticas
+    ({variável: `EstatisticasFluxo`}).
+    """
+    incertezas = dict(INCERTEZAS_PADRAO if incertezas is None else incertezas)
+    nu, rho = FLUIDOS[fluido]["nu"], FLUIDOS[fluido]["rho"]
+    nominal = resolver_ponto_operacao_acoplado(rede, h_geometrica, nu, func_curva_bomba)
+    if not nominal['convergiu']: raise ValueError("O ponto de operação nominal não convergiu; ele é o ponto de partida das amostras.")
+    argumentos = (rede, func_curva_bomba, func_curva_eficiencia, incertezas, h_geometrica, nu, rho, eficiencia_motor_percent,
+                  horas_dia, custo_kwh, (nominal['vazao'], nominal['vazoes_ramais']))
+    tamanhos = [min(tamanho_bloco, amostras - inicio) for inicio in range(0, amostras, tamanho_bloco)]
+    sementes = np.random.SeedSequence(semente).spawn(len(tamanhos))
+    resumo = {'amostras': 0, 'validas': 0, 'sem_ponto': 0, 'nao_convergidas': 0, 'estatisticas': {v: EstatisticasFluxo() for v in VARIAVEIS}}
+
+    def acumular(bloco, tamanho):
+        resultados, sem_ponto, nao_convergidas = bloco
+        for variavel, valores in resultados.items(): resumo['estatisticas'][variavel].adicionar(valores)
+        resumo['amostras'] += tamanho; resumo['validas'] += len(resultados['vazao_m3h'])
+        resumo['sem_ponto'] += sem_ponto; resumo['nao_convergidas'] += nao_convergidas
+        return resumo
+
+    if processos is None or processos > 1:
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            # Janela de blocos em andamento, consumidos na ordem: memória limitada e histogramas reprodutíveis.
+            janela, limite = deque(), 2 * (processos or os.cpu_count() or 1)
+            for tamanho, semente_bloco in zip(tamanhos, sementes):
+                janela.append((executor.submit(_resolver_bloco, *argumentos, semente_bloco, tamanho), tamanho))
+                if len(janela) >= limite:
+                    futuro, tamanho_pronto = janela.popleft()
+                    yield acumular(futuro.result(), tamanho_pronto)
+            while janela:
+                futuro, tamanho_pronto = janela.popleft()
+                yield acumular(futuro.result(), tamanho_pronto)
+    else:
+        for tamanho, semente_bloco in zip(tamanhos, sementes):
+            yield acumular(_resolver_bloco(*argumentos, semente_bloco, tamanho), tamanho)
+
+
+def analisar_incerteza(*args, **kwargs):
+    """Executa a análise completa e retorna o resumo final (ver `analisar_incerteza_em_fluxo`)."""
+    resumo = None
+    for resumo in analisar_incerteza_em_fluxo(*args, **kwargs): pass
+    return resumo
+
+
+def tabela_percentis(estatisticas, percentis=PERCENTIS_PADRAO):
+    """DataFrame com média, desvio, extremos e percentis (P10/P50/P90 por padrão) de cada variável."""
+    import pandas as pd
+    linhas = []
+    for variavel, rotulo in VARIAVEIS.items():
+        estatistica = estatisticas[variavel]
+        linhas.append({'Variável': rotulo, 'Média': estatistica.media, 'Desvio': estatistica.desvio,
+                       **{f"P{p}": estatistica.percentil(p) for p in percentis}, 'Mínimo': estatistica.minimo, 'Máximo': estatistica.maximo})
+    return pd.DataFrame(linhas)
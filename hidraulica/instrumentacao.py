@@ -0,0 +1,107 @@
+# hidraulica/instrumentacao.py
+# Tempo por etapa do rerun e estatísticas dos solvers, para o painel de diagnóstico e logs JSON.
+
+import contextvars
+import json
+import logging
+import os
+import time
+import traceback
+import uuid
+from contextlib import contextmanager
+
+LOGGER = logging.getLogger('pumps.diagnostico')
+VARIAVEL_ARQUIVO_LOG = 'PUMPS_LOG_DIAGNOSTICO'  # caminho opcional do arquivo de log (JSON por linha)
+
+_coletor_atual = contextvars.ContextVar('coletor_diagnostico', default=None)
+
+
+class Diagnostico:
+    """Coleta tempos de etapa, estatísticas dos solvers e o erro (se houver) de uma execução."""
+
+    def __init__(self, **contexto):
+        self.id = uuid.uuid4().hex[:12]
+        self.contexto = contexto
+        self.etapas = []
+        self.solvers = {}
+        self.erro = None
+        self._inicio = time.perf_counter()
+        self._token = None
+
+    def ativar(self):
+        """Torna este coletor o destino de `registrar_solver` no contexto atual (até `desativar`)."""
+        self._token = _coletor_atual.set(self)
+        return self
+
+    def desativar(self):
+        if self._token is not None:
+            _coletor_atual.reset(self._token); self._token = None
+
+    @contextmanager
+    def ativo(self):
+        self.ativar()
+        try:
+            yield self
+        finally:
+            self.desativar()
+
+    @contextmanager
+    def etapa(self, nome):
+        """Mede o tempo de parede de um bloco; exceções são registradas e propagadas."""
+        inicio, status = time.perf_counter(), 'ok'
+        try:
+            yield
+        except Exception:
+            status = 'erro'; raise
+        except BaseException:
+            status = 'interrompida'; raise  # st.stop() e reruns do Streamlit
+        finally:
+            self.etapas.append({'etapa': nome, 'tempo_ms': (time.perf_counter() - inicio) * 1000, 'status': status})
+
+    def registrar_solver(self, nome, iteracoes=None, avaliacoes=None, residuo=None, convergiu=True, casos=1, falhas=None):
+        """Acumula uma chamada de solver. `casos`/`falhas` permitem registrar lotes de uma vez."""
+        estatisticas = self.solvers.setdefault(nome, {'chamadas': 0, 'casos': 0, 'falhas': 0, 'iteracoes': 0, 'avaliacoes': 0, 'residuo_max': 0.0})
+        estatisticas['chamadas'] += 1
+        estatisticas['casos'] += casos
+        estatisticas['falhas'] += (0 if convergiu else casos) if falhas is None else falhas
+        if iteracoes is not None: estatisticas['iteracoes'] += int(iteracoes)
+        if avaliacoes is not None: estatisticas['avaliacoes'] += int(avaliacoes)
+        if residuo is not None and residuo == residuo: estatisticas['residuo_max'] = max(estatisticas['residuo_max'], float(residuo))
+
+    def registrar_erro(self, excecao):
+        self.erro = {'tipo': type(excecao).__name__, 'mensagem': str(excecao),
+                     'traceback': ''.join(traceback.format_exception(type(excecao), excecao, excecao.__traceback__))}
+
+    def para_dict(self):
+        return {'id': self.id, **self.contexto, 'tempo_total_ms': (time.perf_counter() - self._inicio) * 1000,
+                'etapas': list(self.etapas), 'solvers': {nome: dict(valores) for nome, valores in self.solvers.items()}, 'erro': self.erro}
+
+    def emitir_log(self, logger=LOGGER):
+        """Emite o diagnóstico como uma linha JSON (nível WARNING se houve erro)."""
+        logger.log(logging.WARNING if self.erro else logging.INFO, json.dumps({'evento': 'diagnostico', **self.para_dict()}, ensure_ascii=False, default=str))
+
+
+def registrar_solver(nome, **dados):
+    """Registra uma chamada de solver no coletor ativo; sem coletor ativo não faz nada."""
+    coletor = _coletor_atual.get()
+    if coletor is not None: coletor.registrar_solver(nome, **dados)
+
+
+def coletor_ativo():
+    """Diagnóstico ativo no contexto atual, ou None (ex.: num rerun que não passou por `Diagnostico.ativar`)."""
+    return _coletor_atual.get()
+
+
+def configurar_log_json(caminho=None, nivel=logging.INFO):
+    """Configura (uma vez) o logger de diagnóstico para gravar uma linha JSON por execução.
+
+    Usa `caminho`, a variável de ambiente PUMPS_LOG_DIAGNOSTICO ou, na falta de ambos, stderr.
+    """
+    if LOGGER.handlers: return LOGGER
+    caminho = caminho or os.environ.get(VARIAVEL_ARQUIVO_LOG)
+    handler = logging.FileHandler(caminho, encoding='utf-8') if caminho else logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    LOGGER.addHandler(handler)
+    LOGGER.setLevel(nivel)
+    LOGGER.propagate = False
+    return LOGGER
@@ -0,0 +1,467 @@
+# hidraulica/motor.py
+# Motor vetorizado de perdas de carga (Darcy-Weisbach; modelos de fator de atrito em atrito.py).
+# Só o NumPy é importado com o módulo: SciPy (solvers de fallback) e pandas (ajuste de curvas) na primeira chamada.
+
+import numpy as np
+
+from .atrito import MODO_PADRAO, fator_atrito, fator_atrito_e_derivada
+from .instrumentacao import registrar_solver
+
+GRAVIDADE = 9.81
+PERDA_DIAMETRO_INVALIDO = 1e12
+VAZAO_MINIMA_DERIVADA = 1e-9  # m³/h; evita derivada nula em vazão zero
+
+MATERIAIS = {
+    "Aço Carbono (novo)": 0.046, "Aço Carbono (pouco uso)": 0.1, "Aço Carbono (enferrujado)": 0.2,
+    "Aço Inox": 0.002, "Ferro Fundido": 0.26, "PVC / Plástico": 0.0015, "Concreto": 0.5
+}
+K_FACTORS = {
+    "Entrada de Borda Viva": 0.5, "Entrada Levemente Arredondada": 0.2, "Entrada Bem Arredondada": 0.04,
+    "Saída de Tubulação": 1.0, "Válvula Gaveta (Totalmente Aberta)": 0.2, "Válvula Gaveta (1/2 Aberta)": 5.6,
+    "Válvula Globo (Totalmente Aberta)": 10.0, "Válvula de Retenção (Tipo Portinhola)": 2.5,
+    "Cotovelo 90° (Raio Longo)": 0.6, "Cotovelo 90° (Raio Curto)": 0.9, "Cotovelo 45°": 0.4,
+    "Curva de Retorno 180°": 2.2, "Tê (Fluxo Direto)": 0.6, "Tê (Fluxo Lateral)": 1.8,
+}
+FLUIDOS = { "Água a 20°C": {"rho": 998.2, "nu": 1.004e-6}, "Etanol a 20°C": {"rho": 789.0, "nu": 1.51e-6} }
+
+
+def calcular_coeficientes_trechos(comprimentos_m, diametros_mm, rugosidades_mm):
+    """Pré-calcula as constantes geométricas dos trechos, que só mudam quando a rede é editada.
+
+    Retorna (diametros_m, areas, rugosidade_relativa, l_sobre_d, diametro_valido). Trechos com
+    diâmetro não positivo recebem valores seguros e são marcados em `diametro_valido`.
+    """
+    diametros_m = np.asarray(diametros_mm, dtype=float) / 1000
+    diametro_valido = diametros_m > 0
+    d_seguro = np.where(diametro_valido, diametros_m, 1.0)
+    areas = np.pi * d_seguro**2 / 4
+    rugosidade_relativa = np.asarray(rugosidades_mm, dtype=float) / 1000 / d_seguro
+    l_sobre_d = np.asarray(comprimentos_m, dtype=float) / d_seguro
+    return d_seguro, areas, rugosidade_relativa, l_sobre_d, diametro_valido
+
+
+def calcular_perdas_coeficientes(coeficientes, k_totais, vazoes_m3h, nu, modo_atrito=MODO_PADRAO):
+    """Calcula as perdas a partir das constantes de `calcular_coeficientes_trechos`.
+
+    `modo_atrito` escolhe o modelo de fator de atrito (ver `atrito.MODOS_ATRITO`).
+    """
+    diametros_m, areas, rugosidade_relativa, l_sobre_d, diametro_valido = coeficientes
+    vazoes_m3s = np.maximum(np.asarray(vazoes_m3h, dtype=float), 0) / 3600
+    velocidade = np.where(diametro_valido, vazoes_m3s / areas, 0.0)
+    reynolds = velocidade * diametros_m / nu if nu > 0 else np.zeros_like(velocidade)
+
+    re_seguro = np.where(reynolds > 0, reynolds, 1.0)
+    fator = np.where(reynolds > 0, fator_atrito(re_seguro, rugosidade_relativa, modo_atrito), 0.0)
+
+    carga_cinetica = velocidade**2 / (2 * GRAVIDADE)
+    perda_principal = np.where(diametro_valido, fator * l_sobre_d * carga_cinetica, PERDA_DIAMETRO_INVALIDO)
+    perda_localizada = np.where(diametro_valido, np.asarray(k_totais, dtype=float) * carga_cinetica, 0.0)
+    return {"principal": perda_principal, "localizada": perda_localizada, "velocidade": velocidade}
+
+
+def calcular_derivadas_coeficientes(coeficientes, k_totais, vazoes_m3h, nu, modo_atrito=MODO_PADRAO):
+    """Derivada analítica da perda total (principal + localizada) de cada trecho em relação à vazão.
+
+    Usa o mesmo modelo de fator de atrito de `calcular_perdas_coeficientes` (com df/dRe
+    analítico). O resultado está em m por m³/h.
+    """
+    diametros_m, areas, rugosidade_relativa, l_sobre_d, diametro_valido = coeficientes
+    vazoes_m3h = np.maximum(np.asarray(vazoes_m3h, dtype=float), VAZAO_MINIMA_DERIVADA)
+    dv_dq = 1 / (3600 * areas)
+    velocidade = vazoes_m3h * dv_dq
+    reynolds = velocidade * diametros_m / nu
+    fator, dfator_dre = fator_atrito_e_derivada(reynolds, rugosidade_relativa, modo_atrito)
+
+    carga_cinetica = velocidade**2 / (2 * GRAVIDADE)
+    dre_dq = diametros_m / nu * dv_dq
+    derivada = (dfator_dre * dre_dq * l_sobre_d * carga_cinetica
+                + (fator * l_sobre_d + np.asarray(k_totais, dtype=float)) * velocidade / GRAVIDADE * dv_dq)
+    return np.where(diametro_valido, derivada, 0.0)
+
+
+def calcular_perdas_vetorizado(comprimentos_m, diametros_mm, rugosidades_mm, k_totais, vazoes_m3h, nu, modo_atrito=MODO_PADRAO):
+    """Calcula perdas principais, localizadas e velocidades de vários trechos em uma única chamada.
+
+    Os parâmetros dos trechos são arrays de mesma forma e as vazões seguem as regras de
+    broadcasting do NumPy: um escalar aplica a mesma vazão a todos os trechos (série), um
+    array (n,) associa uma vazão a cada trecho e um array (m, 1) avalia m vazões em todos.
+    Reproduz exatamente o comportamento de `calcular_perdas_trecho`.
+    """
+    coeficientes = calcular_coeficientes_trechos(comprimentos_m, diametros_mm, rugosidades_mm)
+    return calcular_perdas_coeficientes(coeficientes, k_totais, vazoes_m3h, nu, modo_atrito)
+
+
+def calcular_analise_energetica(vazao_m3h, h_man, eficiencia_bomba_percent, eficiencia_motor_percent, horas_dia, custo_kwh, fluido_selecionado):
+    rho = FLUIDOS[fluido_selecionado]["rho"]
+    ef_bomba = eficiencia_bomba_percent / 100
+    ef_motor = eficiencia_motor_percent / 100
+    potencia_eletrica_kW = (vazao_m3h / 3600 * rho * 9.81 * h_man) / (ef_bomba * ef_motor) / 1000 if ef_bomba * ef_motor > 0 else 0
+    custo_anual = potencia_eletrica_kW * horas_dia * 30 * 12 * custo_kwh
+    return {"potencia_eletrica_kW": potencia_eletrica_kW, "custo_anual": custo_anual}
+
+
+def extrair_parametros_trechos(lista_trechos):
+    comprimentos = np.array([t["comprimento"] for t in lista_trechos], dtype=float)
+    diametros = np.array([t["diametro"] for t in lista_trechos], dtype=float)
+    rugosidades = np.array([MATERIAIS[t["material"]] for t in lista_trechos], dtype=float)
+    k_totais = np.array([sum(ac["k"] * ac["quantidade"] for ac in t["acessorios"]) for t in lista_trechos], dtype=float)
+    return comprimentos, diametros, rugosidades, k_totais
+
+
+class RedeCompilada:
+    """Representação em arrays (struct-of-arrays) de um `sistema` antes/paralelo/depois.
+
+    Os trechos são concatenados na ordem antes -> ramais -> depois. `secao` indica a parte de
+    cada trecho (0 = antes, 1 = paralelo, 2 = depois) e `ramal` o índice do ramal (-1 fora do
+    bloco paralelo). `modo_atrito` é o modelo de fator de atrito usado em todas as perdas da rede.
+    Deve ser recompilada sempre que a rede for editada.
+    """
+    __slots__ = ("comprimentos", "diametros_mm", "rugosidades_mm", "k_totais", "coeficientes",
+                 "secao", "ramal", "nomes_ramais", "num_ramais", "modo_atrito")
+
+    ANTES, PARALELO, DEPOIS = 0, 1, 2
+
+    def __init__(self, comprimentos, diametros_mm, rugosidades_mm, k_totais, secao, ramal, nomes_ramais, modo_atrito=MODO_PADRAO):
+        self.comprimentos = comprimentos
+        self.diametros_mm = diametros_mm
+        self.rugosidades_mm = rugosidades_mm
+        self.k_totais = k_totais
+        self.secao = secao
+        self.ramal = ramal
+        self.nomes_ramais = nomes_ramais
+        self.num_ramais = len(nomes_ramais)
+        self.modo_atrito = modo_atrito
+        self.coeficientes = calcular_coeficientes_trechos(comprimentos, diametros_mm, rugosidades_mm)
+
+    @property
+    def num_trechos(self):
+        return len(self.comprimentos)
+
+    def com_diametros_escalados(self, escala):
+        """Nova rede com todos os diâmetros multiplicados por `escala`, sem copiar dicionários."""
+        return RedeCompilada(self.comprimentos, self.diametros_mm * escala, self.rugosidades_mm,
+                             self.k_totais, self.secao, self.ramal, self.nomes_ramais, self.modo_atrito)
+
+    def perdas_trechos(self, vazoes_trechos, nu):
+        """Perdas por trecho para um array de vazões já distribuídas trecho a trecho."""
+        return calcular_perdas_coeficientes(self.coeficientes, self.k_totais, vazoes_trechos, nu, self.modo_atrito)
+
+    def vazoes_trechos(self, vazao_total_m3h, vazoes_ramais=None):
+        """Distribui a vazão total pelos trechos em série e as vazões dos ramais pelos trechos paralelos."""
+        vazoes = np.full(self.num_trechos, float(vazao_total_m3h))
+        if vazoes_ramais is not None and self.num_ramais:
+            mascara = self.secao == self.PARALELO
+            vazoes[mascara] = np.asarray(vazoes_ramais, dtype=float)[self.ramal[mascara]]
+        return vazoes
+
+    def _subconjunto(self, mascara):
+        return tuple(c[mascara] for c in self.coeficientes), self.k_totais[mascara]
+
+    def perda_series(self, vazao_m3h, nu):
+        """Perda total dos trechos antes e depois do bloco paralelo (mesma vazão)."""
+        mascara = self.secao != self.PARALELO
+        if not mascara.any(): return 0.0
+        perdas = calcular_perdas_coeficientes(*self._subconjunto(mascara), vazao_m3h, nu, self.modo_atrito)
+        return float(np.sum(perdas["principal"] + perdas["localizada"]))
+
+    def perda_series_e_derivada(self, vazao_m3h, nu):
+        """Perda dos trechos em série e sua derivada em relação à vazão total."""
+        mascara = self.secao != self.PARALELO
+        if not mascara.any(): return 0.0, 0.0
+        coef, k_totais = self._subconjunto(mascara)
+        perdas = calcular_perdas_coeficientes(coef, k_totais, vazao_m3h, nu, self.modo_atrito)
+        derivadas = calcular_derivadas_coeficientes(coef, k_totais, vazao_m3h, nu, self.modo_atrito)
+        return float(np.sum(perdas["principal"] + perdas["localizada"])), float(np.sum(derivadas))
+
+    def perdas_ramais(self, vazoes_ramais, nu):
+        """Perda total de cada ramal paralelo para as vazões informadas (uma por ramal)."""
+        mascara = self.secao == self.PARALELO
+        ramal = self.ramal[mascara]
+        perdas = calcular_perdas_coeficientes(*self._subconjunto(mascara), np.asarray(vazoes_ramais, dtype=float)[ramal], nu, self.modo_atrito)
+        return np.bincount(ramal, weights=perdas["principal"] + perdas["localizada"], minlength=self.num_ramais)
+
+    def perdas_ramais_e_derivadas(self, vazoes_ramais, nu):
+        """Perda de cada ramal e sua derivada em relação à vazão do próprio ramal."""
+        mascara = self.secao == self.PARALELO
+        ramal = self.ramal[mascara]
+        coef, k_totais = self._subconjunto(mascara)
+        vazoes = np.asarray(vazoes_ramais, dtype=float)[ramal]
+        perdas = calcular_perdas_coeficientes(coef, k_totais, vazoes, nu, self.modo_atrito)
+        derivadas = calcular_derivadas_coeficientes(coef, k_totais, vazoes, nu, self.modo_atrito)
+        return (np.bincount(ramal, weights=perdas["principal"] + perdas["localizada"], minlength=self.num_ramais),
+                np.bincount(ramal, weights=derivadas, minlength=self.num_ramais))
+
+
+def compilar_rede(sistema, modo_atrito=MODO_PADRAO):
+    """Constrói uma `RedeCompilada` a partir do dicionário `sistema` (antes/paralelo/depois)."""
+    trechos, secoes, ramais = [], [], []
+    for trecho in sistema.get('antes', []):
+        trechos.append(trecho); secoes.append(RedeCompilada.ANTES); ramais.append(-1)
+    nomes_ramais = list(sistema.get('paralelo', {}).keys())
+    for i, nome_ramal in enumerate(nomes_ramais):
+        for trecho in sistema['paralelo'][nome_ramal]:
+            trechos.append(trecho); secoes.append(RedeCompilada.PARALELO); ramais.append(i)
+    for trecho in sistema.get('depois', []):
+        trechos.append(trecho); secoes.append(RedeCompilada.DEPOIS); ramais.append(-1)
+    comprimentos, diametros, rugosidades, k_totais = extrair_parametros_trechos(trechos)
+    return RedeCompilada(comprimentos, diametros, rugosidades, k_totais,
+                         np.array(secoes, dtype=int), np.array(ramais, dtype=int), nomes_ramais, modo_atrito)
+
+
+def _newton_amortecido(residuos, x, tol, max_iter):
+    """Newton com Jacobiano analítico, mantendo x >= 0 e com busca linear no resíduo.
+
+    `residuos(x)` retorna (F, J). Retorna (x, F, iteracoes, avaliacoes, convergiu).
+    """
+    F, J = residuos(x)
+    avaliacoes, convergiu, iteracao = 1, False, 0
+    for iteracao in range(1, max_iter + 1):
+        try:
+            passo = np.linalg.solve(J, -F)
+        except np.linalg.LinAlgError:
+            break
+        # Mantém as vazões positivas (fração até a fronteira) e faz busca linear no resíduo.
+        negativos = passo < 0
+        alfa = min(1.0, 0.9 * np.min(x[negativos] / -passo[negativos])) if negativos.any() else 1.0
+        norma = np.linalg.norm(F)
+        while True:
+            x_novo = x + alfa * passo
+            F_novo, J_novo = residuos(x_novo); avaliacoes += 1
+            if np.linalg.norm(F_novo) < norma or alfa < 1e-6: break
+            alfa *= 0.5
+        if alfa < 1e-6: break  # busca linear estagnada: o chamador decide o fallback
+        x, F, J = x_novo, F_novo, J_novo
+        if np.all(np.abs(alfa * passo) <= tol * (np.abs(x) + tol)) or np.linalg.norm(F) < tol:
+            convergiu = bool(np.all(np.isfinite(x)) and np.linalg.norm(F) < 1e-6)
+            break
+    return x, F, iteracao, avaliacoes, convergiu
+
+
+def _newton_amortecido_lote(residuos, x, tol, max_iter):
+    """Versão em lote de `_newton_amortecido`: P sistemas independentes resolvidos juntos, linha a linha.
+
+    `x` (P, k) é atualizado no lugar; `residuos(x, linhas)` retorna (F (len(linhas), k), J (len(linhas), k, k))
+    das linhas indicadas. Linhas que convergem, estagnam ou têm Jacobiano singular saem do lote. Retorna
+    (x, convergiu (P,), iteracoes).
+    """
+    convergiu = np.zeros(len(x), dtype=bool)
+    ativos = np.arange(len(x))
+    F, J = residuos(x, ativos)
+    iteracoes = 0
+    for _ in range(max_iter):
+        if not len(ativos): break
+        iteracoes += 1
+        try:
+            passo = np.linalg.solve(J, -F[..., None])[..., 0]
+        except np.linalg.LinAlgError:
+            # Uma linha singular não derruba o lote: resolve linha a linha e tira as singulares (ficam não convergidas).
+            passo, regulares = np.zeros_like(F), np.ones(len(ativos), dtype=bool)
+            for i in range(len(ativos)):
+                try: passo[i] = np.linalg.solve(J[i], -F[i])
+                except np.linalg.LinAlgError: regulares[i] = False
+            ativos, F, J, passo = ativos[regulares], F[regulares], J[regulares], passo[regulares]
+            if not len(ativos): break
+        xa = x[ativos]
+        # Mantém as vazões positivas (fração até a fronteira) e faz busca linear no resíduo, linha a linha.
+        with np.errstate(divide='ignore', invalid='ignore'):
+            alfa = np.minimum(1.0, np.where(passo < 0, 0.9 * xa / -passo, np.inf).min(axis=1))
+        norma = np.linalg.norm(F, axis=1)
+        aceito = np.zeros(len(ativos), dtype=bool)
+        x_novo, F_novo, J_novo = xa.copy(), F.copy(), J.copy()
+        while True:
+            pendentes = np.flatnonzero(~aceito)
+            tentativa = xa[pendentes] + alfa[pendentes, None] * passo[pendentes]
+            F_t, J_t = residuos(tentativa, ativos[pendentes])
+            ok = (np.linalg.norm(F_t, axis=1) < norma[pendentes]) | (alfa[pendentes] < 1e-6)
+            idx = pendentes[ok]
+            x_novo[idx], F_novo[idx], J_novo[idx] = tentativa[ok], F_t[ok], J_t[ok]
+            aceito[idx] = True
+            if aceito.all(): break
+            alfa[~aceito] *= 0.5
+        estagnado = alfa < 1e-6
+        x[ativos] = x_novo
+        pequeno = np.all(np.abs(alfa[:, None] * passo) <= tol * (np.abs(x_novo) + tol), axis=1) | (np.linalg.norm(F_novo, axis=1) < tol)
+        terminado = pequeno & ~estagnado
+        convergiu[ativos[terminado]] = np.linalg.norm(F_novo[terminado], axis=1) < 1e-6
+        continua = ~(pequeno | estagnado)
+        ativos, F, J = ativos[continua], F_novo[continua], J_novo[continua]
+    return x, convergiu, iteracoes
+
+
+def resolver_ponto_operacao_acoplado(rede, h_geometrica, nu, func_curva_bomba, vazao_inicial=50.0,
+                                     vazoes_ramais_iniciais=None, tol=1e-8, max_iter=50):
+    """Resolve vazão total e divisão entre ramais como um único sistema não linear (Newton).
+
+    Incógnitas: x = [Q, q_1, ..., q_n] (m³/h). Equações:
+      H_bomba(Q) - h_geo - perdas_série(Q) - P_n(q_n) = 0
+      P_i(q_i) - P_n(q_n) = 0, i = 1..n-1
+      sum(q_i) - Q = 0
+    O Jacobiano é analítico (derivada de Darcy/Swamee-Jain e do `np.poly1d` da bomba). Com menos
+    de dois ramais o bloco paralelo é ignorado, como em `calcular_perdas_paralelo`.
+    Retorna um dicionário com vazao, vazoes_ramais, iteracoes, avaliacoes, residuo e convergiu.
+    """
+    derivada_bomba = np.polyder(func_curva_bomba)
+    n = rede.num_ramais if rede.num_ramais >= 2 else 0
+    x = np.empty(n + 1)
+    x[0] = vazao_inicial
+    if n:
+        x[1:] = vazoes_ramais_iniciais if vazoes_ramais_iniciais is not None else vazao_inicial / n
+
+    def residuos(x):
+        perda_series, dperda_series = rede.perda_series_e_derivada(x[0], nu)
+        F = np.empty(n + 1); J = np.zeros((n + 1, n + 1))
+        F[0] = func_curva_bomba(x[0]) - h_geometrica - perda_series
+        J[0, 0] = derivada_bomba(x[0]) - dperda_series
+        if n:
+            perdas, derivadas = rede.perdas_ramais_e_derivadas(x[1:], nu)
+            F[0] -= perdas[-1]; J[0, n] = -derivadas[-1]
+            F[1:n] = perdas[:-1] - perdas[-1]
+            J[1:n, 1:n] = np.diag(derivadas[:-1]); J[1:n, n] = -derivadas[-1]
+            F[n] = x[1:].sum() - x[0]; J[n, 0] = -1.0; J[n, 1:] = 1.0
+        return F, J
+
+    x, F, iteracao, avaliacoes, convergiu = _newton_amortecido(residuos, x, tol, max_iter)
+    registrar_solver('ponto_operacao_newton', iteracoes=iteracao, avaliacoes=avaliacoes, residuo=float(np.linalg.norm(F)), convergiu=convergiu)
+    return {"vazao": float(x[0]), "vazoes_ramais": x[1:].copy() if n else np.array([]),
+            "iteracoes": iteracao, "avaliacoes": avaliacoes, "residuo": float(np.linalg.norm(F)), "convergiu": convergiu}
+
+
+def resolver_divisao_ramais(rede, vazao_total_m3h, nu, vazoes_iniciais=None, tol=1e-8, max_iter=50):
+    """Divide a vazão total entre os ramais paralelos igualando as perdas (Newton analítico).
+
+    Retorna (vazoes_ramais, perda_paralelo, convergiu). Com menos de dois ramais o bloco
+    paralelo é ignorado, como em `calcular_perdas_paralelo`.
+    """
+    n = rede.num_ramais
+    if n < 2: return np.array([]), 0.0, True
+    if vazao_total_m3h <= 0: return np.zeros(n), 0.0, True
+    x = np.array(vazoes_iniciais, dtype=float) if vazoes_iniciais is not None else np.full(n, vazao_total_m3h / n)
+
+    def residuos(x):
+        perdas, derivadas = rede.perdas_ramais_e_derivadas(x, nu)
+        F = np.empty(n); J = np.zeros((n, n))
+        F[:-1] = perdas[:-1] - perdas[-1]
+        J[:-1, :-1] = np.diag(derivadas[:-1]); J[:-1, -1] = -derivadas[-1]
+        F[-1] = x.sum() - vazao_total_m3h; J[-1, :] = 1.0
+        return F, J
+
+    x, F, iteracao, avaliacoes, convergiu = _newton_amortecido(residuos, x, tol, max_iter)
+    registrar_solver('divisao_ramais_newton', iteracoes=iteracao, avaliacoes=avaliacoes, residuo=float(np.linalg.norm(F)), convergiu=convergiu)
+    return x, float(rede.perdas_ramais(x, nu)[0]), convergiu
+
+
+def avaliar_curva_sistema(rede, vazoes_m3h, h_geometrica, nu):
+    """Avalia a curva do sistema para um vetor de vazões em uma única chamada.
+
+    A divisão entre ramais de cada ponto parte da solução do ponto vizinho (escalada pela
+    vazão), e as perdas em série e as velocidades são calculadas em lote. Retorna um dicionário
+    com arrays: vazao (m,), altura (m,) com NaN onde a divisão não convergiu, vazoes_ramais
+    (m, n_ramais), velocidades (m, n_trechos) na ordem da `RedeCompilada` e convergiu (m,).
+    """
+    vazoes = np.atleast_1d(np.asarray(vazoes_m3h, dtype=float))
+    n = rede.num_ramais if rede.num_ramais >= 2 else 0
+    vazoes_ramais = np.full((len(vazoes), n), np.nan)
+    perdas_paralelo = np.zeros(len(vazoes))
+    convergiu = np.ones(len(vazoes), dtype=bool)
+    anterior, vazao_anterior = None, 0.0
+    for j, vazao in enumerate(vazoes):
+        if not n: break
+        chute = anterior * (vazao / vazao_anterior) if anterior is not None and vazao_anterior > 0 else None
+        vazoes_j, perda_j, convergiu[j] = resolver_divisao_ramais(rede, vazao, nu, chute)
+        if convergiu[j]:
+            vazoes_ramais[j], perdas_paralelo[j] = vazoes_j, perda_j
+            if vazao > 0: anterior, vazao_anterior = vazoes_j, vazao
+
+    series = rede.secao != RedeCompilada.PARALELO
+    perdas_series = np.zeros(len(vazoes))
+    if series.any():
+        perdas = calcular_perdas_coeficientes(*rede._subconjunto(series), vazoes[:, None], nu, rede.modo_atrito)
+        perdas_series = np.sum(perdas["principal"] + perdas["localizada"], axis=1)
+    altura = np.where(convergiu, h_geometrica + perdas_series + perdas_paralelo, np.nan)
+    altura = np.where(vazoes < 0, h_geometrica, altura)
+
+    vazoes_trechos = np.repeat(vazoes[:, None], rede.num_trechos, axis=1)
+    if n:
+        paralelo = rede.secao == RedeCompilada.PARALELO
+        vazoes_trechos[:, paralelo] = vazoes_ramais[:, rede.ramal[paralelo]]
+    velocidades = rede.perdas_trechos(vazoes_trechos, nu)["velocidade"]
+    return {"vazao": vazoes, "altura": altura, "vazoes_ramais": vazoes_ramais, "velocidades": velocidades, "convergiu": convergiu}
+
+
+# --- API escalar usada pela interface e pelo processamento em lote ---
+def calcular_perda_serie(lista_trechos, vazao_m3h, fluido_selecionado, modo_atrito=MODO_PADRAO):
+    if not lista_trechos: return 0
+    perdas = calcular_perdas_vetorizado(*extrair_parametros_trechos(lista_trechos), vazao_m3h, FLUIDOS[fluido_selecionado]["nu"], modo_atrito)
+    return float(np.sum(perdas["principal"] + perdas["localizada"]))
+
+
+def calcular_perdas_trecho(trecho, vazao_m3h, fluido_selecionado, modo_atrito=MODO_PADRAO):
+    perdas = calcular_perdas_vetorizado(*extrair_parametros_trechos([trecho]), vazao_m3h, FLUIDOS[fluido_selecionado]["nu"], modo_atrito)
+    return {chave: float(valor[0]) for chave, valor in perdas.items()}
+
+
+def calcular_perdas_paralelo(ramais, vazao_total_m3h, fluido_selecionado, rede=None, modo_atrito=MODO_PADRAO):
+    num_ramais = len(ramais)
+    if num_ramais < 2: return 0, {}
+    if rede is None: rede = compilar_rede({'paralelo': ramais}, modo_atrito)
+    nu = FLUIDOS[fluido_selecionado]["nu"]
+    def equacoes_perda(vazoes_parciais_m3h):
+        vazao_ultimo_ramal = vazao_total_m3h - sum(vazoes_parciais_m3h)
+        if vazao_ultimo_ramal < -0.01: return [1e12] * (num_ramais - 1)
+        todas_vazoes = np.append(vazoes_parciais_m3h, vazao_ultimo_ramal)
+        perdas = rede.perdas_ramais(todas_vazoes, nu)
+        return perdas[:-1] - perdas[-1]
+    from scipy.optimize import root
+    chute_inicial = np.full(num_ramais - 1, vazao_total_m3h / num_ramais)
+    solucao = root(equacoes_perda, chute_inicial, method='hybr', options={'xtol': 1e-8})
+    registrar_solver('divisao_ramais_root', avaliacoes=solucao.nfev, residuo=float(np.abs(solucao.fun).max()), convergiu=bool(solucao.success))
+    if not solucao.success: return -1, {}
+    vazoes_finais = np.append(solucao.x, vazao_total_m3h - sum(solucao.x))
+    perda_final_paralelo = float(rede.perdas_ramais(vazoes_finais, nu)[0])
+    distribuicao_vazao = {nome_ramal: vazao for nome_ramal, vazao in zip(ramais.keys(), vazoes_finais)}
+    return perda_final_paralelo, distribuicao_vazao
+
+
+def criar_funcao_curva(df_curva, col_x, col_y, grau=2):
+    import pandas as pd
+    df_curva[col_x] = pd.to_numeric(df_curva[col_x], errors='coerce')
+    df_curva[col_y] = pd.to_numeric(df_curva[col_y], errors='coerce')
+    df_curva = df_curva.dropna(subset=[col_x, col_y])
+    if len(df_curva) < grau + 1: return None
+    coeficientes = np.polyfit(df_curva[col_x], df_curva[col_y], grau)
+    return np.poly1d(coeficientes)
+
+
+def encontrar_ponto_operacao(sistema, h_geometrica, fluido, func_curva_bomba, rede=None, metodo='acoplado', info=None, modo_atrito=MODO_PADRAO):
+    # `modo_atrito` só é usado ao compilar a rede aqui; uma `rede` já compilada traz o seu.
+    if rede is None: rede = compilar_rede(sistema, modo_atrito)
+    if info is None: info = {}
+    nu = FLUIDOS[fluido]["nu"]
+    def curva_sistema(vazao_m3h):
+        if vazao_m3h < 0: return h_geometrica
+        perda_total = rede.perda_series(vazao_m3h, nu)
+        perda_par, _ = calcular_perdas_paralelo(sistema['paralelo'], vazao_m3h, fluido, rede=rede)
+        if perda_par == -1: return 1e12
+        perda_total += perda_par
+        return h_geometrica + perda_total
+    # Newton acoplado (vazão total + ramais); se falhar, volta ao método aninhado original.
+    if metodo == 'acoplado' and isinstance(func_curva_bomba, np.poly1d):
+        resultado = resolver_ponto_operacao_acoplado(rede, h_geometrica, nu, func_curva_bomba)
+        info.update(metodo='acoplado', iteracoes=resultado['iteracoes'], avaliacoes=resultado['avaliacoes'], residuo=resultado['residuo'], convergiu=resultado['convergiu'])
+        if resultado['convergiu'] and resultado['vazao'] > 1e-3:
+            vazao_op = resultado['vazao']
+            return vazao_op, func_curva_bomba(vazao_op), curva_sistema
+    def erro(vazao_m3h):
+        if vazao_m3h < 0: return 1e12
+        return func_curva_bomba(vazao_m3h) - curva_sistema(vazao_m3h)
+    from scipy.optimize import root
+    solucao = root(erro, 50.0, method='hybr', options={'xtol': 1e-8})
+    registrar_solver('ponto_operacao_root', avaliacoes=solucao.nfev, residuo=float(np.abs(solucao.fun).max()), convergiu=bool(solucao.success))
+    if info.get('metodo') == 'acoplado': info['iteracoes_acoplado'] = info['iteracoes']
+    info.update(metodo='aninhado', iteracoes=None, avaliacoes=solucao.nfev, residuo=float(np.abs(solucao.fun).max()), convergiu=bool(solucao.success), fallback='iteracoes_acoplado' in info)
+    if solucao.success and solucao.x[0] > 1e-3:
+        vazao_op = solucao.x[0]
+        altura_op = func_curva_bomba(vazao_op)
+        return vazao_op, altura_op, curva_sistema
+    else:
+        return None, None, curva_sistema
@@ -0,0 +1,450 @@
+# hidraulica/otimizacao_diametros.py
+# Escolha de diâmetros comerciais por trecho minimizando investimento + custo de energia em valor presente.
+
+import copy
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .motor import (FLUIDOS, RedeCompilada, avaliar_curva_sistema, calcular_analise_energetica,
+                    calcular_coeficientes_trechos, calcular_perdas_coeficientes)
+from .varredura import dividir_vazao_lote
+
+# Diâmetro nominal (mm) -> custo instalado indicativo (R$/m). Substitua pelo catálogo do fornecedor.
+CATALOGO_PADRAO = {dn: round(0.9 * dn**1.3, 2) for dn in (25, 32, 40, 50, 65, 80, 100, 125, 150, 200, 250, 300, 350, 400, 450, 500)}
+VELOCIDADE_MIN_PADRAO = 0.3  # m/s
+VELOCIDADE_MAX_PADRAO = 3.0  # m/s
+MAX_NOS_PADRAO = 500_000
+TEMPO_MAX_PADRAO_S = 10.0  # limite de tempo do branch-and-bound; depois disso vale a melhor solução encontrada
+PONTOS_GRADE_VAZAO = 128  # resolução em vazão das tabelas do limite inferior do branch-and-bound
+PONTOS_GRADE_ALTURA = 1024  # resolução em perda de carga das mesmas tabelas
+TAMANHO_LOTE_FOLHAS = 256  # atribuições completas resolvidas juntas pela divisão de vazão em lote
+SUBARVORES_POR_PROCESSO = 4  # com vários processos, a raiz é expandida até haver esse tanto de subárvores por processo
+
+
+def fator_valor_presente(taxa_desconto, vida_util_anos):
+    """Fator que leva um custo anual constante a valor presente (série uniforme)."""
+    if taxa_desconto == 0: return float(vida_util_anos)
+    return (1 - (1 + taxa_desconto)**-vida_util_anos) / taxa_desconto
+
+
+class _BlocoParalelo:
+    """Dados do bloco paralelo para o branch-and-bound (serializável para os processos trabalhadores).
+
+    Os trechos paralelos são as variáveis, na ordem da `RedeCompilada` (os de um mesmo ramal são
+    contíguos). `opcoes[t]` são os índices do catálogo admissíveis para o trecho t, `custos[t]` o
+    investimento de cada opção do catálogo.
+
+    Limite inferior: todos os ramais têm a mesma perda h e, com a vazão de um ramal fixa, os trechos
+    dele só se acoplam pela soma das perdas. Para cada ramal, uma tabela [g, u] guarda o menor
+    investimento com perda <= u unidades de altura na vazão g da grade (mochila de múltipla escolha,
+    por programação dinâmica); o custo do bloco fica limitado por min_u k·u·Δ + min Σ tabela_i[g_i, u]
+    sobre as divisões de vazão. Vazões arredondadas para baixo na grade e perdas de cada trecho
+    truncadas em unidades inteiras só subestimam o custo, o que mantém o limite válido.
+
+    Um nó do branch-and-bound é a tupla (prefixo, limite, combinados, outros, custo_fixo,
+    unidades_fixas, linhas, colunas): `combinados` junta os ramais já completos, `outros` todos os
+    ramais exceto o atual, `custo_fixo`/`unidades_fixas` (por vazão da grade) os trechos já escolhidos
+    do ramal atual e `linhas`/`colunas` a faixa de vazões e perdas ainda promissora. `outros` None
+    indica um ramal recém-completado, combinado só quando o nó é aberto.
+    """
+
+    def __init__(self, rede, vazao_m3h, nu, diametros, custos_metro, velocidade_min, velocidade_max, custo_metro_altura):
+        mascara = rede.secao == RedeCompilada.PARALELO
+        self.comprimentos = rede.comprimentos[mascara]
+        self.rugosidades_mm = rede.rugosidades_mm[mascara]
+        self.k_totais = rede.k_totais[mascara]
+        self.ramal = rede.ramal[mascara]
+        self.num_ramais = rede.num_ramais
+        self.modo_atrito = rede.modo_atrito
+        self.vazao, self.nu = vazao_m3h, nu
+        self.diametros = diametros
+        self.areas = np.pi * (diametros / 1000)**2 / 4
+        self.custos = self.comprimentos[:, None] * custos_metro[None, :]
+        self.velocidade_min, self.velocidade_max = velocidade_min, velocidade_max
+        self.custo_metro_altura = custo_metro_altura
+        # Nenhum ramal recebe mais que a vazão total: diâmetros com velocidade < mínima mesmo assim são descartados.
+        admissiveis = self.vazao / 3600 / self.areas >= velocidade_min
+        admissiveis[0] |= not admissiveis.any()
+        self.opcoes = [np.flatnonzero(admissiveis) for _ in range(len(self.comprimentos))]
+        self.indice_maximo = np.array([op.max() for op in self.opcoes])
+        self.membros = (self.ramal[None, :] == np.arange(self.num_ramais)[:, None]).astype(float)
+        self.fim_ramal = np.append(self.ramal[1:] != self.ramal[:-1], True)
+        self.inicios = [int(np.flatnonzero(self.ramal == r)[0]) for r in range(self.num_ramais)]
+        self.coeficientes = calcular_coeficientes_trechos(self.comprimentos[:, None, None], diametros[None, :, None], self.rugosidades_mm[:, None, None])
+        self.perdas_totais = self._perdas(np.full((self.num_trechos, 1), self.vazao))[:, :, 0]
+        pontos = np.arange(PONTOS_GRADE_VAZAO + 1)
+        self._indice_alvo = np.maximum(PONTOS_GRADE_VAZAO - self.num_ramais + 1 - pontos, 0)
+
+    def _perdas(self, vazoes):
+        """Perda de cada trecho (m, opção do catálogo, k) nas vazões (m, k) dadas para o trecho."""
+        perdas = calcular_perdas_coeficientes(self.coeficientes, self.k_totais[:, None, None], vazoes[:, None, :], self.nu, self.modo_atrito)
+        return perdas["principal"] + perdas["localizada"]
+
+    @property
+    def num_trechos(self):
+        return len(self.comprimentos)
+
+    def altura_maxima(self, melhor_custo=np.inf):
+        """Perda do bloco acima da qual nenhuma solução custa menos que `melhor_custo` (sem ele, a maior perda possível)."""
+        menores = np.array([self.perdas_totais[t, op.min()] for t, op in enumerate(self.opcoes)])
+        altura = float((self.membros @ menores).max())
+        if np.isfinite(melhor_custo):
+            investimento_minimo = sum(self.custos[t, op].min() for t, op in enumerate(self.opcoes))
+            altura = min(altura, (melhor_custo - investimento_minimo) / self.custo_metro_altura)
+        return max(altura, 1e-6)
+
+    def preparar_limites(self, altura_max, vazoes_min):
+        """Monta as tabelas do limite inferior para perdas do bloco até `altura_max` (acima dela, custo infinito).
+
+        A vazão do ramal r fica em vazoes_min[r] + g·δ, g = 0..PONTOS_GRADE_VAZAO, com δ tal que a grade
+        cubra a vazão que sobra depois dos mínimos dos demais ramais.
+        """
+        passo = max(self.vazao - vazoes_min.sum(), 1e-9 * self.vazao) / PONTOS_GRADE_VAZAO
+        grade = vazoes_min[self.ramal][:, None] + passo * np.arange(PONTOS_GRADE_VAZAO + 1)[None, :]
+        perdas_grade = self._perdas(grade)
+        # A vazão real do ramal está em [g, g + 1): a opção vale se alguma velocidade desse intervalo cabe nos limites.
+        areas = self.areas[None, :, None]
+        velocidade_ok = (np.minimum(grade + passo, self.vazao)[:, None, :] / 3600 / areas >= self.velocidade_min) & (grade[:, None, :] / 3600 / areas <= self.velocidade_max)
+        self.custos_grade = np.where(velocidade_ok, self.custos[:, :, None], np.inf)
+        self.delta = altura_max / PONTOS_GRADE_ALTURA
+        with np.errstate(invalid='ignore', over='ignore'):
+            unidades = np.floor(perdas_grade / self.delta)
+        self.unidades = np.where(unidades <= PONTOS_GRADE_ALTURA, unidades, PONTOS_GRADE_ALTURA + 1).astype(int)
+        self._alturas = np.arange(PONTOS_GRADE_ALTURA + 1)
+        # sufixos[t][g, u]: menor investimento dos trechos t.. até o fim do ramal com perda <= u unidades na vazão g.
+        self.sufixos = [None] * self.num_trechos
+        vazio = np.zeros((PONTOS_GRADE_VAZAO + 1, PONTOS_GRADE_ALTURA + 1))
+        for t in range(self.num_trechos - 1, -1, -1):
+            seguinte = vazio if self.fim_ramal[t] else self.sufixos[t + 1]
+            self.sufixos[t] = self._acrescentar(seguinte, self.custos_grade[t, self.opcoes[t]], self.unidades[t, self.opcoes[t]]).min(axis=0)
+        # livres_depois[r]: ramais r + 1.. sem trechos escolhidos, já combinados pela divisão de vazão.
+        self.livres_depois = [None] * self.num_ramais
+        acumulado = self._identidade()
+        for r in range(self.num_ramais - 1, -1, -1):
+            self.livres_depois[r] = acumulado
+            acumulado = self._combinar(acumulado, self._pelo_menos(self.sufixos[self.inicios[r]]))
+        self._energia = self.custo_metro_altura * self.delta * self._alturas
+        self.limite_raiz = float((self.sufixos[0] + self.livres_depois[0][self._indice_alvo] + self._energia).min())
+
+    def estreitar(self, melhor_custo, prazo, max_rodadas=6):
+        """Prepara as tabelas, estreitando-as enquanto der (e até o instante `prazo`): a faixa de perdas do bloco e a
+        vazão mínima de cada ramal são reduzidas às regiões em que o limite inferior ainda fica abaixo de
+        `melhor_custo`, o que refina as grades."""
+        altura_max, vazoes_min = self.altura_maxima(melhor_custo), np.zeros(self.num_ramais)
+        self.limite_raiz = -np.inf
+        for _ in range(max_rodadas):
+            anterior = self.limite_raiz
+            self.preparar_limites(altura_max, vazoes_min)
+            # Rodada que fechou menos de 10% da distância ao melhor custo: não compensa montar as tabelas de novo.
+            if not np.isfinite(melhor_custo) or self.limite_raiz - anterior < 0.1 * (melhor_custo - self.limite_raiz) or time.time() > prazo: return
+            antes, primeiros, ultima = self._identidade(), np.zeros(self.num_ramais, dtype=int), 0
+            for r in range(self.num_ramais):
+                # limites[g, u]: ramal r com vazão g e perda u, demais ramais livres.
+                outros = self._combinar(self.livres_depois[r], antes)
+                limites = self.sufixos[self.inicios[r]] + outros[self._indice_alvo] + self._energia
+                abaixo = np.flatnonzero(limites.min(axis=1) < melhor_custo)
+                if not len(abaixo): return
+                primeiros[r] = abaixo[0]
+                if r == 0: ultima = np.flatnonzero(limites.min(axis=0) < melhor_custo)[-1]
+                antes = self._combinar(antes, self._pelo_menos(self.sufixos[self.inicios[r]]))
+            passo = max(self.vazao - vazoes_min.sum(), 1e-9 * self.vazao) / PONTOS_GRADE_VAZAO
+            vazoes_min, altura_max = vazoes_min + primeiros * passo, (ultima + 1) * self.delta
+
+    def _identidade(self):
+        acumulado = np.full((PONTOS_GRADE_VAZAO + 1, PONTOS_GRADE_ALTURA + 1), np.inf); acumulado[0] = 0.0
+        return acumulado
+
+    def _acrescentar(self, tabela, custos, unidades, linhas=slice(None), colunas=slice(None)):
+        """Tabelas (opção, g, u) com um trecho a mais: `custos` (opção, g) + `tabela` com as `unidades` da opção descontadas.
+
+        `linhas`/`colunas` limitam o cálculo a uma faixa de vazões e de perdas.
+        """
+        # Janela j da tabela com PONTOS_GRADE_ALTURA + 1 colunas infinitas à esquerda = tabela deslocada de
+        # PONTOS_GRADE_ALTURA + 1 - j unidades; cada linha (opção, g) é copiada de uma vez.
+        janelas = np.lib.stride_tricks.sliding_window_view(np.concatenate([np.full_like(tabela, np.inf), tabela], axis=1), PONTOS_GRADE_ALTURA + 1, axis=1)
+        janelas, custos, unidades = janelas[linhas, :, colunas], custos[:, linhas], unidades[:, linhas]
+        return custos[:, :, None] + janelas[np.arange(custos.shape[1])[None, :], PONTOS_GRADE_ALTURA + 1 - np.minimum(unidades, PONTOS_GRADE_ALTURA + 1)]
+
+    def _pelo_menos(self, valores):
+        """g[s] -> menor valor com índice de vazão >= s (mínimo dos sufixos)."""
+        return np.minimum.accumulate(valores[..., ::-1, :], axis=-2)[..., ::-1, :]
+
+    def _combinar(self, acumulado, tabela):
+        """Junta um ramal (tabela "pelo menos g") aos já combinados: índices de vazão somados, mesma perda u.
+
+        As duas tabelas não decrescem com g, então basta somar pares com g <= s.
+        """
+        combinada = tabela[0] + acumulado
+        for g in range(1, PONTOS_GRADE_VAZAO + 1):
+            np.minimum(combinada[g:], tabela[g] + acumulado[:PONTOS_GRADE_VAZAO + 1 - g], out=combinada[g:])
+        return combinada
+
+    def raiz(self):
+        zeros = np.zeros(PONTOS_GRADE_VAZAO + 1)
+        return ((), self.limite_raiz, self._identidade(), self.livres_depois[0], zeros, zeros.astype(int),
+                slice(0, PONTOS_GRADE_VAZAO + 1), slice(0, PONTOS_GRADE_ALTURA + 1))
+
+    def abrir(self, no):
+        """Completa um nó cujo ramal anterior acabou de ser fechado (`outros` None)."""
+        prefixo, limite, combinados, outros, custo_fixo, unidades_fixas, _, colunas = no
+        if outros is not None: return no
+        tabela = np.where(self._alturas[None, :] >= unidades_fixas[:, None], custo_fixo[:, None], np.inf)
+        combinados = self._combinar(combinados, self._pelo_menos(tabela))
+        zeros = np.zeros(PONTOS_GRADE_VAZAO + 1)
+        # As linhas passam a ser as vazões do ramal seguinte; a faixa de perdas do bloco continua valendo.
+        return (prefixo, limite, combinados, self._combinar(combinados, self.livres_depois[self.ramal[len(prefixo)]]), zeros, zeros.astype(int),
+                slice(0, PONTOS_GRADE_VAZAO + 1), colunas)
+
+    def filhos(self, no, melhor_custo):
+        """Filhos de um nó aberto com limite < `melhor_custo`, do pior para o melhor limite (o melhor sai primeiro da pilha).
+
+        Cada filho guarda a faixa (vazão do ramal atual, perda do bloco) em que ainda pode ficar abaixo de
+        `melhor_custo`: as tabelas dos filhos nunca são menores que a do pai, então os netos só olham essa faixa.
+        """
+        prefixo, _, combinados, outros, custo_fixo, unidades_fixas, linhas, colunas = no
+        t = len(prefixo)
+        opcoes = self.opcoes[t]
+        custos, unidades = custo_fixo[None] + self.custos_grade[t, opcoes], unidades_fixas[None] + self.unidades[t, opcoes]
+        if self.fim_ramal[t]: tabelas = np.where(self._alturas[None, None, colunas] >= unidades[:, linhas, None], custos[:, linhas, None], np.inf)
+        else: tabelas = self._acrescentar(self.sufixos[t + 1], custos, unidades, linhas, colunas)
+        # outros[alvo[g]] não cresce com g, então a tabela exata na vazão g basta (sem o mínimo dos sufixos).
+        totais = tabelas + outros[self._indice_alvo[linhas], colunas][None] + self._energia[None, None, colunas]
+        limites = totais.min(axis=(1, 2))
+        resultado = []
+        for i in np.argsort(-limites):
+            if not limites[i] < melhor_custo: continue
+            g, u = np.nonzero(totais[i] < melhor_custo)
+            faixa = slice(linhas.start + g.min(), linhas.start + g.max() + 1)
+            # Vazões fora da faixa já não levam a nada melhor: infinitas também quando o ramal for combinado.
+            custo = np.full(PONTOS_GRADE_VAZAO + 1, np.inf); custo[faixa] = custos[i, faixa]
+            resultado.append((prefixo + (int(opcoes[i]),), float(limites[i]), combinados, None if self.fim_ramal[t] else outros, custo, unidades[i],
+                              faixa, slice(colunas.start + u.min(), colunas.start + u.max() + 1)))
+        return resultado
+
+    def avaliar(self, indices):
+        """Perda do bloco, vazões dos ramais e convergência para P atribuições (P, m) de índices do catálogo."""
+        coeficientes = calcular_coeficientes_trechos(self.comprimentos, self.diametros[indices], self.rugosidades_mm)
+        # Partida pela resistência de cada ramal na vazão total (H ≈ r·q²  =>  q_i ∝ r_i^-1/2).
+        resistencia = self.perdas_totais[np.arange(self.num_trechos), indices] @ self.membros.T
+        condutancia = 1 / np.sqrt(np.maximum(resistencia, 1e-12))
+        iniciais = self.vazao * condutancia / condutancia.sum(axis=1, keepdims=True)
+        vazoes, perdas, convergiu = dividir_vazao_lote(coeficientes, self.k_totais, self.ramal, self.num_ramais, self.vazao, self.nu,
+                                                       modo_atrito=self.modo_atrito, vazoes_iniciais=iniciais)
+        return perdas[:, 0], vazoes, convergiu
+
+    def investimento(self, indices):
+        return self.custos[np.arange(self.num_trechos), indices].sum(axis=-1)
+
+    def velocidades_ok(self, indices, vazoes_ramais):
+        velocidades = vazoes_ramais[:, self.ramal] / 3600 / self.areas[indices]
+        return np.all((velocidades >= self.velocidade_min) & (velocidades <= self.velocidade_max), axis=1)
+
+
+def _ramificar(bloco, raiz, melhor_custo, melhor, max_nos, prazo, compartilhado=None):
+    """Branch-and-bound em profundidade a partir do nó `raiz`, podando pelo limite de `_BlocoParalelo`.
+
+    Só as atribuições completas que ainda podem melhorar a solução são resolvidas pela divisão de
+    vazão exata, acumuladas em lotes de `TAMANHO_LOTE_FOLHAS`, e precisam respeitar os limites de
+    velocidade. `compartilhado` (multiprocessing.Value) é o melhor custo entre os processos: lido a
+    cada nó para podar e atualizado a cada melhora. Para ao atingir `max_nos` ou o instante `prazo`
+    (time.time()). Retorna (melhor_custo, melhor, nos_avaliados, menor limite dos nós não explorados
+    ou inf se a subárvore foi esgotada).
+    """
+    nos, m = 0, bloco.num_trechos
+    folhas, limites_folhas = [], []
+
+    def incumbente():
+        return melhor_custo if compartilhado is None else min(melhor_custo, compartilhado.value)
+
+    def avaliar_folhas():
+        nonlocal melhor_custo, melhor
+        indices, limites = np.array(folhas, dtype=int), np.array(limites_folhas)
+        folhas.clear(); limites_folhas.clear()
+        indices = indices[limites < incumbente()]
+        if not len(indices): return
+        perdas, vazoes, convergiu = bloco.avaliar(indices)
+        custos = np.where(convergiu & bloco.velocidades_ok(indices, vazoes), bloco.investimento(indices) + bloco.custo_metro_altura * perdas, np.inf)
+        i = int(np.argmin(custos))
+        if custos[i] < incumbente():
+            melhor_custo, melhor = float(custos[i]), indices[i].copy()
+            if compartilhado is not None:
+                with compartilhado.get_lock(): compartilhado.value = min(compartilhado.value, melhor_custo)
+
+    pilha = [raiz]
+    while pilha:
+        if nos >= max_nos or time.time() > prazo: break
+        no = pilha.pop()
+        if not no[1] < incumbente(): continue
+        t = len(no[0])
+        filhos = bloco.filhos(bloco.abrir(no), incumbente())
+        nos += len(bloco.opcoes[t])
+        if t < m - 1:
+            pilha.extend(filhos)
+            continue
+        folhas.extend(filho[0] for filho in filhos); limites_folhas.extend(filho[1] for filho in filhos)
+        if len(folhas) >= TAMANHO_LOTE_FOLHAS: avaliar_folhas()
+    if folhas: avaliar_folhas()
+    return melhor_custo, melhor, nos, min((no[1] for no in pilha if no[1] < incumbente()), default=np.inf)
+
+
+def _busca_local(bloco, indices, max_passes=10):
+    """Solução inicial: melhora um trecho por vez (todas as opções avaliadas em lote) até não haver ganho."""
+    def custo(atribuicoes):
+        perdas, vazoes, convergiu = bloco.avaliar(atribuicoes)
+        total = bloco.investimento(atribuicoes) + bloco.custo_metro_altura * perdas
+        return np.where(convergiu & bloco.velocidades_ok(atribuicoes, vazoes), total, np.inf)
+    atual = float(custo(indices[None, :])[0])
+    for _ in range(max_passes):
+        melhorou = False
+        for t in range(bloco.num_trechos):
+            candidatos = np.tile(indices, (len(bloco.opcoes[t]), 1)); candidatos[:, t] = bloco.opcoes[t]
+            custos = custo(candidatos)
+            i = int(np.argmin(custos))
+            if custos[i] < atual - 1e-9:
+                indices, atual, melhorou = candidatos[i].copy(), float(custos[i]), True
+        if not melhorou: break
+    return atual, indices
+
+
+_trabalhador = None
+
+
+def _iniciar_trabalhador(bloco, compartilhado):
+    """Executado uma vez em cada processo trabalhador: o bloco (com as tabelas) e o melhor custo compartilhado."""
+    global _trabalhador
+    _trabalhador = (bloco, compartilhado)
+
+
+def _ramificar_subarvore(argumentos):
+    """Executado no processo trabalhador."""
+    bloco, compartilhado = _trabalhador
+    return _ramificar(bloco, *argumentos, compartilhado=compartilhado)
+
+
+def _otimizar_paralelo(bloco, indices_iniciais, max_nos, tempo_max_s, processos):
+    """Busca local + branch-and-bound. Retorna (custo, índices, nós, limite inferior do custo do bloco)."""
+    prazo = time.time() + tempo_max_s
+    melhor_custo, melhor = _busca_local(bloco, indices_iniciais)
+    if not np.isfinite(melhor_custo): melhor = None
+    bloco.estreitar(melhor_custo, prazo)
+    if processos is not None and processos <= 1:
+        custo, melhor, nos, limite = _ramificar(bloco, bloco.raiz(), melhor_custo, melhor, max_nos, prazo)
+        return custo, melhor, nos, min(limite, custo)
+    # Expande a raiz nível a nível até haver subárvores para todos os processos; as de menor limite saem primeiro.
+    subarvores, nos = [bloco.raiz()], 0
+    while subarvores and len(subarvores) < SUBARVORES_POR_PROCESSO * (processos or os.cpu_count() or 1) and len(subarvores[0][0]) < bloco.num_trechos - 1 and time.time() < prazo:
+        nos += len(subarvores) * len(bloco.opcoes[len(subarvores[0][0])])
+        subarvores = [filho for no in subarvores for filho in bloco.filhos(bloco.abrir(no), melhor_custo)]
+    subarvores.sort(key=lambda no: no[1])
+    compartilhado = multiprocessing.Value('d', melhor_custo)
+    with ProcessPoolExecutor(max_workers=processos, initializer=_iniciar_trabalhador, initargs=(bloco, compartilhado)) as executor:
+        resultados = list(executor.map(_ramificar_subarvore, [(no, melhor_custo, melhor, max(max_nos // len(subarvores), 1), prazo) for no in subarvores]))
+    limite = np.inf
+    for custo, indices, nos_subarvore, limite_subarvore in resultados:
+        nos, limite = nos + nos_subarvore, min(limite, limite_subarvore)
+        if indices is not None and custo < melhor_custo: melhor_custo, melhor = custo, indices
+    return melhor_custo, melhor, nos, min(limite, melhor_custo)
+
+
+def _otimizar_series(rede, vazao_m3h, nu, diametros, custos_metro, velocidade_min, velocidade_max, custo_metro_altura):
+    """Trechos em série têm a vazão fixa: cada um é escolhido independentemente, avaliando todo o catálogo em lote."""
+    mascara = rede.secao != RedeCompilada.PARALELO
+    if not mascara.any(): return mascara, np.array([], dtype=int), np.array([], dtype=bool)
+    comprimentos, rugosidades = rede.comprimentos[mascara][:, None], rede.rugosidades_mm[mascara][:, None]
+    coeficientes = calcular_coeficientes_trechos(comprimentos, diametros[None, :], rugosidades)
+    perdas = calcular_perdas_coeficientes(coeficientes, rede.k_totais[mascara][:, None], vazao_m3h, nu, rede.modo_atrito)
+    custo = comprimentos * custos_metro[None, :] + custo_metro_altura * (perdas["principal"] + perdas["localizada"])
+    velocidade = perdas["velocidade"]
+    viavel = (velocidade >= velocidade_min) & (velocidade <= velocidade_max)
+    # Sem opção viável, fica com a de menor violação do limite de velocidade.
+    violacao = np.maximum(velocidade_min - velocidade, 0) + np.maximum(velocidade - velocidade_max, 0)
+    escolha = np.where(viavel.any(axis=1), np.argmin(np.where(viavel, custo, np.inf), axis=1), np.argmin(violacao, axis=1))
+    return mascara, escolha, viavel.any(axis=1)
+
+
+def otimizar_diametros(rede, vazao_m3h, h_geometrica, fluido, eficiencia_bomba_percent, eficiencia_motor_percent, horas_dia, custo_kwh,
+                       catalogo=None, taxa_desconto=0.08, vida_util_anos=20, velocidade_min=VELOCIDADE_MIN_PADRAO,
+                       velocidade_max=VELOCIDADE_MAX_PADRAO, max_nos=MAX_NOS_PADRAO, tempo_max_s=TEMPO_MAX_PADRAO_S, processos=1):
+    """Escolhe um diâmetro do `catalogo` ({diâmetro mm: R$/m}) para cada trecho da rede.
+
+    Minimiza investimento em tubos + custo de energia (de `calcular_analise_energetica`) trazido a
+    valor presente, com a vazão fixa em `vazao_m3h` (como na análise de sensibilidade) e a
+    velocidade de cada trecho entre os limites. Os trechos em série são independentes entre si; os
+    do bloco paralelo são acoplados pela divisão de vazão e resolvidos por branch-and-bound, com as
+    folhas resolvidas em lote e, com `processos` > 1, subárvores em processos separados que
+    compartilham o melhor custo encontrado. Se
+    `max_nos` ou `tempo_max_s` for atingido, retorna a melhor solução encontrada com
+    `otimo_comprovado` = False; `limite_inferior` mostra o quanto ela pode estar acima do ótimo.
+    """
+    inicio = time.perf_counter()
+    catalogo = CATALOGO_PADRAO if catalogo is None else catalogo
+    diametros = np.array(sorted(catalogo), dtype=float)
+    custos_metro = np.array([catalogo[d] for d in sorted(catalogo)], dtype=float)
+    nu = FLUIDOS[fluido]["nu"]
+    fvp = fator_valor_presente(taxa_desconto, vida_util_anos)
+    custo_metro_altura = calcular_analise_energetica(vazao_m3h, 1.0, eficiencia_bomba_percent, eficiencia_motor_percent, horas_dia, custo_kwh, fluido)["custo_anual"] * fvp
+
+    indices = np.searchsorted(diametros, rede.diametros_mm).clip(0, len(diametros) - 1)
+    series, escolha_series, series_viaveis = _otimizar_series(rede, vazao_m3h, nu, diametros, custos_metro, velocidade_min, velocidade_max, custo_metro_altura)
+    indices[series] = escolha_series
+    viavel, otimo_comprovado, nos, folga = bool(series_viaveis.all()), True, 0, 0.0
+    paralelo = rede.secao == RedeCompilada.PARALELO
+    if rede.num_ramais >= 2 and paralelo.any():
+        bloco = _BlocoParalelo(rede, vazao_m3h, nu, diametros, custos_metro, velocidade_min, velocidade_max, custo_metro_altura)
+        # Ponto de partida: cada trecho escolhido como se estivesse em série com a vazão total dividida igualmente.
+        rede_ramais = RedeCompilada(bloco.comprimentos, bloco.diametros[bloco.indice_maximo], bloco.rugosidades_mm, bloco.k_totais,
+                                    np.full(bloco.num_trechos, RedeCompilada.ANTES), np.full(bloco.num_trechos, -1), [], rede.modo_atrito)
+        _, iniciais, _ = _otimizar_series(rede_ramais, vazao_m3h / rede.num_ramais, nu, diametros, custos_metro, velocidade_min, velocidade_max, custo_metro_altura)
+        custo_paralelo, melhor, nos, limite_paralelo = _otimizar_paralelo(bloco, iniciais, max_nos, tempo_max_s, processos)
+        otimo_comprovado = limite_paralelo >= custo_paralelo
+        if melhor is None: viavel = False
+        else: indices[paralelo] = melhor
+        if melhor is not None: folga = max(custo_paralelo - limite_paralelo, 0.0)
+    # Com menos de dois ramais o motor ignora o bloco paralelo: esses trechos mantêm o diâmetro atual.
+    diametros_otimos = np.where(paralelo & (rede.num_ramais < 2), rede.diametros_mm, diametros[indices])
+    projeto = _avaliar_projeto(rede, diametros_otimos, catalogo, vazao_m3h, h_geometrica, fluido, eficiencia_bomba_percent, eficiencia_motor_percent,
+                               horas_dia, custo_kwh, fvp, velocidade_min, velocidade_max)
+    return {**projeto, 'limite_inferior': projeto['custo_total'] - folga,
+            'custo_atual': _avaliar_projeto(rede, rede.diametros_mm, catalogo, vazao_m3h, h_geometrica, fluido, eficiencia_bomba_percent, eficiencia_motor_percent,
+                                            horas_dia, custo_kwh, fvp, velocidade_min, velocidade_max)['custo_total'],
+            'viavel': viavel, 'otimo_comprovado': otimo_comprovado, 'nos_avaliados': nos, 'tempo_s': time.perf_counter() - inicio}
+
+
+def _avaliar_projeto(rede, diametros_mm, catalogo, vazao_m3h, h_geometrica, fluido, eficiencia_bomba_percent, eficiencia_motor_percent,
+                     horas_dia, custo_kwh, fvp, velocidade_min, velocidade_max):
+    """Custos e velocidades de um conjunto de diâmetros, calculados pelo motor (mesmo critério da interface)."""
+    import pandas as pd
+    projeto = RedeCompilada(rede.comprimentos, np.asarray(diametros_mm, dtype=float), rede.rugosidades_mm, rede.k_totais,
+                            rede.secao, rede.ramal, rede.nomes_ramais, rede.modo_atrito)
+    curva = avaliar_curva_sistema(projeto, [vazao_m3h], h_geometrica, FLUIDOS[fluido]["nu"])
+    altura = float(curva["altura"][0])
+    # Diâmetros fora do catálogo (a rede atual) têm o custo por metro interpolado entre os vizinhos.
+    custo_metro = np.interp(projeto.diametros_mm, sorted(catalogo), [catalogo[d] for d in sorted(catalogo)])
+    investimento = float(np.sum(custo_metro * projeto.comprimentos))
+    energia_vp = calcular_analise_energetica(vazao_m3h, altura, eficiencia_bomba_percent, eficiencia_motor_percent, horas_dia, custo_kwh, fluido)["custo_anual"] * fvp
+    velocidades = curva["velocidades"][0]
+    nomes_secao = {RedeCompilada.ANTES: "Antes", RedeCompilada.PARALELO: "Paralelo", RedeCompilada.DEPOIS: "Depois"}
+    trechos = pd.DataFrame({
+        'Seção': [nomes_secao[s] for s in projeto.secao],
+        'Ramal': [projeto.nomes_ramais[r] if r >= 0 else "" for r in projeto.ramal],
+        'Comprimento (m)': projeto.comprimentos,
+        'Diâmetro Atual (mm)': rede.diametros_mm,
+        'Diâmetro (mm)': projeto.diametros_mm,
+        'Velocidade (m/s)': velocidades,
+        'Investimento (R$)': custo_metro * projeto.comprimentos,
+    })
+    trechos['Dentro dos Limites'] = (velocidades >= velocidade_min) & (velocidades <= velocidade_max)
+    return {'diametros': projeto.diametros_mm, 'trechos': trechos, 'altura_manometrica': altura, 'investimento': investimento,
+            'custo_energia_vp': float(energia_vp), 'custo_total': investimento + float(energia_vp)}
+
+
+def aplicar_diametros(sistema, diametros_mm):
+    """Cópia de `sistema` com os diâmetros substituídos, na ordem da `RedeCompilada` (antes -> ramais -> depois)."""
+    novo = copy.deepcopy(sistema)
+    trechos = list(novo.get('antes', [])) + [t for ramal in novo.get('paralelo', {}).values() for t in ramal] + list(novo.get('depois', []))
+    for trecho, diametro in zip(trechos, diametros_mm): trecho['diametro'] = float(diametro)
+    return novo
@@ -0,0 +1,154 @@
+# hidraulica/rede_malhada.py
+# Modelo geral nós/tubos com malhas e solver de gradiente global (Todini-Pilati) em matrizes esparsas.
+
+import numpy as np
+
+from .atrito import MODO_PADRAO
+from .motor import MATERIAIS, calcular_coeficientes_trechos, calcular_perdas_coeficientes, calcular_derivadas_coeficientes
+
+DERIVADA_MINIMA = 1e-10  # m por m³/h; mantém G invertível em tubos sem perda
+RELAXACAO_MINIMA = 1e-4
+
+
+class RedeMalhada:
+    """Rede arbitrária de nós e tubos.
+
+    Nós de carga fixa (reservatórios) têm a carga conhecida; os demais são junções com demanda
+    (m³/h, positiva saindo da rede). Cada tubo liga `de` -> `para`; vazões negativas indicam
+    escoamento no sentido contrário. Cada componente conexo precisa de ao menos um nó de carga fixa.
+    """
+
+    def __init__(self):
+        self.nomes_nos = []
+        self._indices = {}
+        self.cargas_fixas = []
+        self.demandas = []
+        self.nomes_tubos = []
+        self.de, self.para = [], []
+        self.comprimentos, self.diametros_mm, self.rugosidades_mm, self.k_totais = [], [], [], []
+
+    def adicionar_no(self, nome, demanda=0.0, carga_fixa=None):
+        if nome in self._indices: raise ValueError(f"Nó '{nome}' já existe.")
+        self._indices[nome] = len(self.nomes_nos)
+        self.nomes_nos.append(nome)
+        self.demandas.append(float(demanda))
+        self.cargas_fixas.append(np.nan if carga_fixa is None else float(carga_fixa))
+        return nome
+
+    def adicionar_tubo(self, de, para, comprimento, diametro_mm, rugosidade_mm, k_total=0.0, nome=None):
+        self.nomes_tubos.append(nome if nome is not None else f"{de}->{para}")
+        self.de.append(self._indices[de]); self.para.append(self._indices[para])
+        self.comprimentos.append(float(comprimento)); self.diametros_mm.append(float(diametro_mm))
+        self.rugosidades_mm.append(float(rugosidade_mm)); self.k_totais.append(float(k_total))
+        return len(self.nomes_tubos) - 1
+
+    def adicionar_trecho(self, de, para, trecho, nome=None):
+        """Adiciona um trecho no formato de dicionário usado pela interface (material e acessórios)."""
+        k_total = sum(ac["k"] * ac["quantidade"] for ac in trecho["acessorios"])
+        return self.adicionar_tubo(de, para, trecho["comprimento"], trecho["diametro"], MATERIAIS[trecho["material"]], k_total, nome)
+
+    def indice_no(self, nome):
+        return self._indices[nome]
+
+    @property
+    def num_nos(self):
+        return len(self.nomes_nos)
+
+    @property
+    def num_tubos(self):
+        return len(self.nomes_tubos)
+
+
+def _perdas_com_sinal(coeficientes, k_totais, vazoes, nu, modo_atrito):
+    """Perda com o sinal da vazão, h(Q) = sinal(Q)·perda(|Q|), e sua derivada perda'(|Q|)."""
+    modulo = np.abs(vazoes)
+    perdas = calcular_perdas_coeficientes(coeficientes, k_totais, modulo, nu, modo_atrito)
+    perda = perdas["principal"] + perdas["localizada"]
+    derivada = np.maximum(calcular_derivadas_coeficientes(coeficientes, k_totais, modulo, nu, modo_atrito), DERIVADA_MINIMA)
+    return np.sign(vazoes) * perda, derivada
+
+
+def resolver_rede_malhada(rede, nu, tol=1e-6, max_iter=100, vazoes_iniciais=None, modo_atrito=MODO_PADRAO):
+    """Resolve vazões nos tubos e cargas nos nós pelo método do gradiente global.
+
+    A cada iteração resolve o sistema esparso (A12ᵀ G⁻¹ A12) H = ... nas cargas das junções e
+    atualiza as vazões, com G = diag(dh/dQ) analítico (Darcy e o fator de atrito de `modo_atrito`). Para quando
+    sum|ΔQ| / sum|Q| < tol. Retorna um dicionário com vazoes (m³/h, por tubo), cargas (m, por nó),
+    iteracoes, erro_relativo e convergiu.
+    """
+    import scipy.sparse as sp  # SciPy só é carregado quando uma rede malhada é resolvida
+    from scipy.sparse.linalg import spsolve
+    n_tubos, n_nos = rede.num_tubos, rede.num_nos
+    cargas_fixas = np.array(rede.cargas_fixas)
+    fixos = ~np.isnan(cargas_fixas)
+    if not fixos.any(): raise ValueError("A rede precisa de ao menos um nó de carga fixa.")
+    juncoes = np.flatnonzero(~fixos)
+
+    de, para = np.array(rede.de, dtype=int), np.array(rede.para, dtype=int)
+    linhas = np.arange(n_tubos)
+    incidencia = sp.csr_matrix((np.concatenate([np.ones(n_tubos), -np.ones(n_tubos)]),
+                                (np.concatenate([linhas, linhas]), np.concatenate([de, para]))), shape=(n_tubos, n_nos))
+    A12 = incidencia[:, juncoes].tocsr()
+    carga_fixa_tubos = incidencia[:, np.flatnonzero(fixos)] @ cargas_fixas[fixos]  # A10 H0
+    demandas = np.array(rede.demandas)[juncoes]
+
+    coeficientes = calcular_coeficientes_trechos(rede.comprimentos, rede.diametros_mm, rede.rugosidades_mm)
+    k_totais = np.array(rede.k_totais)
+    if vazoes_iniciais is not None:
+        vazoes = np.array(vazoes_iniciais, dtype=float)
+    else:
+        vazoes = coeficientes[1] * 3600.0  # 1 m/s em cada tubo, como no EPANET
+
+    cargas_juncoes = np.zeros(len(juncoes))
+    convergiu, erro_relativo, erro_anterior, iteracao, relaxacao = False, np.inf, np.inf, 0, 1.0
+    for iteracao in range(1, max_iter + 1):
+        perda, derivada = _perdas_com_sinal(coeficientes, k_totais, vazoes, nu, modo_atrito)
+        inv_G = 1.0 / derivada
+        matriz = (A12.T @ sp.diags(inv_G) @ A12).tocsc()
+        lado_direito = -demandas - A12.T @ vazoes - A12.T @ (inv_G * (carga_fixa_tubos - perda))
+        cargas_juncoes = np.atleast_1d(spsolve(matriz, lado_direito))
+        delta = inv_G * (A12 @ cargas_juncoes + carga_fixa_tubos - perda)
+        # Tubos presos na descontinuidade laminar/turbulenta (Re = 4000) oscilam; se o erro parar de
+        # cair, a atualização passa a ser amortecida para que a oscilação se feche.
+        vazoes = vazoes + relaxacao * delta
+        erro_relativo = np.abs(relaxacao * delta).sum() / max(np.abs(vazoes).sum(), 1e-12)
+        if not np.isfinite(erro_relativo): break
+        if iteracao > 5 and erro_relativo >= erro_anterior: relaxacao = max(relaxacao * 0.5, RELAXACAO_MINIMA)
+        erro_anterior = erro_relativo
+        if erro_relativo < tol:
+            convergiu = True
+            break
+
+    cargas = cargas_fixas.copy()
+    cargas[juncoes] = cargas_juncoes
+    return {"vazoes": vazoes, "cargas": cargas, "iteracoes": iteracao, "erro_relativo": float(erro_relativo), "convergiu": convergiu}
+
+
+def sistema_para_rede_malhada(sistema, vazao_total_m3h):
+    """Expressa a topologia antes -> paralelo -> depois como `RedeMalhada`.
+
+    O nó 'inicio' tem carga fixa zero e o último nó retira a vazão total. Retorna
+    (rede, divisao, juncao, fim): -carga(fim) é a perda total e carga(divisao) - carga(juncao) a
+    perda do bloco paralelo. Como em `calcular_perdas_paralelo`, menos de dois ramais são ignorados.
+    """
+    rede = RedeMalhada()
+    ultimo = rede.adicionar_no('inicio', carga_fixa=0.0)
+    for i, trecho in enumerate(sistema.get('antes', [])):
+        proximo = rede.adicionar_no(f'antes_{i+1}')
+        rede.adicionar_trecho(ultimo, proximo, trecho, nome=f'Trecho Antes {i+1}'); ultimo = proximo
+    ramais = sistema.get('paralelo', {})
+    divisao = juncao = ultimo
+    if len(ramais) >= 2:
+        juncao = rede.adicionar_no('juncao')
+        for nome_ramal, trechos_ramal in ramais.items():
+            ultimo_ramal = divisao
+            for i, trecho in enumerate(trechos_ramal):
+                proximo = juncao if i == len(trechos_ramal) - 1 else rede.adicionar_no(f'{nome_ramal}_{i+1}')
+                rede.adicionar_trecho(ultimo_ramal, proximo, trecho, nome=f'{nome_ramal} (T{i+1})'); ultimo_ramal = proximo
+        ultimo = juncao
+    for i, trecho in enumerate(sistema.get('depois', [])):
+        proximo = rede.adicionar_no(f'depois_{i+1}')
+        rede.adicionar_trecho(ultimo, proximo, trecho, nome=f'Trecho Depois {i+1}'); ultimo = proximo
+    if ultimo == 'inicio': raise ValueError("O sistema não possui trechos.")
+    rede.demandas[rede.indice_no(ultimo)] = float(vazao_total_m3h)
+    return rede, divisao, juncao, ultimo
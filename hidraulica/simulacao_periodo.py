@@ -0,0 +1,228 @@
+# hidraulica/simulacao_periodo.py
+# Simulação de período estendido (ex.: 8760 h): ponto de operação em cada passo de tempo a partir de perfis em CSV.
+
+import numpy as np
+
+from .instrumentacao import registrar_solver
+from .motor import (FLUIDOS, GRAVIDADE, RedeCompilada, avaliar_curva_sistema, calcular_derivadas_coeficientes,
+                    calcular_perdas_coeficientes, _newton_amortecido_lote)
+
+TAMANHO_BLOCO_PADRAO = 2000  # linhas do CSV lidas e resolvidas por vez
+PONTOS_CURVA_PARTIDA = 256   # pontos da curva de perdas usada como ponto de partida
+FAIXA_BEP_PADRAO = (0.7, 1.2)  # região de operação preferencial: fração da vazão de melhor eficiência
+COLUNAS_PERFIL = {'h_geometrica': None, 'tarifa_kwh': None, 'k_valvula': 0.0, 'ligada': 1.0, 'duracao_h': None}
+
+
+def ler_perfis(fonte, tamanho_bloco=TAMANHO_BLOCO_PADRAO, passo_h=1.0, custo_kwh=None):
+    """Lê o CSV de perfis em blocos, sem carregar o arquivo inteiro.
+
+    Colunas: `h_geometrica` (m, obrigatória), `tarifa_kwh` (R$/kWh; sem ela usa `custo_kwh`),
+    `k_valvula` (K adicional da válvula de controle, padrão 0), `ligada` (0/1, padrão 1) e a duração
+    do passo: `duracao_h`, ou `data_hora` (diferença até a linha seguinte), ou `passo_h` fixo.
+    `fonte` é um caminho ou arquivo aberto. Gera DataFrames com as colunas normalizadas.
+    """
+    import pandas as pd
+    pendente, ultima_duracao = None, passo_h  # última linha do bloco anterior: a duração depende da próxima data_hora
+    for bloco in pd.read_csv(fonte, chunksize=tamanho_bloco):
+        if 'h_geometrica' not in bloco.columns: raise ValueError("O perfil precisa da coluna 'h_geometrica'.")
+        if 'tarifa_kwh' not in bloco.columns:
+            if custo_kwh is None: raise ValueError("Informe a coluna 'tarifa_kwh' ou um custo de energia fixo.")
+            bloco['tarifa_kwh'] = custo_kwh
+        for coluna, padrao in COLUNAS_PERFIL.items():
+            if padrao is not None and coluna not in bloco.columns: bloco[coluna] = padrao
+        if 'duracao_h' in bloco.columns or 'data_hora' not in bloco.columns:
+            if 'duracao_h' not in bloco.columns: bloco['duracao_h'] = passo_h
+            yield _normalizar_perfil(bloco)
+            continue
+        bloco['data_hora'] = pd.to_datetime(bloco['data_hora'])
+        if pendente is not None: bloco = pd.concat([pendente, bloco], ignore_index=True)
+        bloco['duracao_h'] = (bloco['data_hora'].shift(-1) - bloco['data_hora']).dt.total_seconds() / 3600
+        pendente = bloco.iloc[-1:].copy()
+        if len(bloco) > 1:
+            ultima_duracao = float(bloco['duracao_h'].iloc[-2])
+            yield _normalizar_perfil(bloco.iloc[:-1])
+    if pendente is not None:
+        # A última linha repete a duração do passo anterior (ou `passo_h` se o arquivo tiver uma linha só).
+        pendente['duracao_h'] = ultima_duracao
+        yield _normalizar_perfil(pendente)
+
+
+def _normalizar_perfil(bloco):
+    import pandas as pd
+    perfil = pd.DataFrame({coluna: pd.to_numeric(bloco[coluna], errors='coerce').to_numpy(dtype=float) for coluna in COLUNAS_PERFIL})
+    if 'data_hora' in bloco.columns: perfil.insert(0, 'data_hora', bloco['data_hora'].to_numpy())
+    if perfil['h_geometrica'].isna().any(): raise ValueError("Valores inválidos na coluna 'h_geometrica'.")
+    return perfil
+
+
+def resolver_ponto_operacao_lote(rede, h_geometrica, coef_valvula, nu, func_curva_bomba, vazoes_iniciais, vazoes_ramais_iniciais=None,
+                                 tol=1e-8, max_iter=30, coeficientes=None, k_totais=None, fator_altura=None):
+    """Ponto de operação de P passos de tempo de uma só vez (Newton acoplado em lote).
+
+    Mesmo sistema de `resolver_ponto_operacao_acoplado`, com altura geométrica `h_geometrica` (P,)
+    e uma perda extra `coef_valvula` (P,) · Q² (Q em m³/h) em série por passo. Opcionalmente cada
+    linha tem a própria rede (`coeficientes` de `calcular_coeficientes_trechos` e `k_totais`, em
+    arrays (P, m)) e a própria curva da bomba, `fator_altura` (P,) × H(Q). Incógnitas por linha:
+    [Q, q_1..q_n]. Retorna (vazoes (P,), vazoes_ramais (P, n), convergiu (P,)).
+    """
+    h_geometrica, coef_valvula = np.asarray(h_geometrica, dtype=float), np.asarray(coef_valvula, dtype=float)
+    P = len(h_geometrica)
+    n = rede.num_ramais if rede.num_ramais >= 2 else 0
+    derivada_bomba = np.polyder(func_curva_bomba)
+    fator_altura = np.ones(P) if fator_altura is None else np.asarray(fator_altura, dtype=float)
+    series = rede.secao != RedeCompilada.PARALELO
+    paralelo = ~series
+    if coeficientes is None:
+        coef_series, k_series = rede._subconjunto(series)
+        coef_paralelo, k_paralelo = rede._subconjunto(paralelo)
+    else:
+        coeficientes = tuple(np.broadcast_to(c, (P, rede.num_trechos)) for c in coeficientes)
+        k_totais = np.broadcast_to(rede.k_totais if k_totais is None else k_totais, (P, rede.num_trechos))
+        coef_series, k_series = tuple(c[:, series] for c in coeficientes), k_totais[:, series]
+        coef_paralelo, k_paralelo = tuple(c[:, paralelo] for c in coeficientes), k_totais[:, paralelo]
+    por_linha = coeficientes is not None
+
+    def da_linha(coef, k, linhas):
+        # Redes por linha acompanham as linhas ativas; a rede única vale para todas.
+        return (tuple(c[linhas] for c in coef), k[linhas]) if por_linha else (coef, k)
+    ramal = rede.ramal[paralelo]
+    membros = np.zeros((len(ramal), max(n, 1))); membros[np.arange(len(ramal)), ramal] = 1.0
+    x = np.empty((P, n + 1))
+    x[:, 0] = vazoes_iniciais
+    if n: x[:, 1:] = vazoes_ramais_iniciais if vazoes_ramais_iniciais is not None else x[:, :1] / n
+
+    def residuos(x, linhas):
+        Q = x[:, 0]
+        F = np.empty_like(x); J = np.zeros((len(x), n + 1, n + 1))
+        F[:, 0] = fator_altura[linhas] * func_curva_bomba(Q) - h_geometrica[linhas] - coef_valvula[linhas] * Q**2
+        J[:, 0, 0] = fator_altura[linhas] * derivada_bomba(Q) - 2 * coef_valvula[linhas] * Q
+        if series.any():
+            coef, k = da_linha(coef_series, k_series, linhas)
+            perdas = calcular_perdas_coeficientes(coef, k, Q[:, None], nu, rede.modo_atrito)
+            F[:, 0] -= np.sum(perdas["principal"] + perdas["localizada"], axis=1)
+            J[:, 0, 0] -= np.sum(calcular_derivadas_coeficientes(coef, k, Q[:, None], nu, rede.modo_atrito), axis=1)
+        if n:
+            coef, k = da_linha(coef_paralelo, k_paralelo, linhas)
+            vazoes_trechos = x[:, 1 + ramal]
+            perdas = calcular_perdas_coeficientes(coef, k, vazoes_trechos, nu, rede.modo_atrito)
+            perdas = (perdas["principal"] + perdas["localizada"]) @ membros
+            derivadas = calcular_derivadas_coeficientes(coef, k, vazoes_trechos, nu, rede.modo_atrito) @ membros
+            F[:, 0] -= perdas[:, -1]; J[:, 0, n] = -derivadas[:, -1]
+            F[:, 1:n] = perdas[:, :-1] - perdas[:, -1:]
+            diag = np.arange(1, n)
+            J[:, diag, diag] = derivadas[:, :-1]; J[:, 1:n, n] = -derivadas[:, -1:]
+            F[:, n] = x[:, 1:].sum(axis=1) - Q; J[:, n, 0] = -1.0; J[:, n, 1:] = 1.0
+        return F, J
+
+    x, convergiu, iteracoes = _newton_amortecido_lote(residuos, x, tol, max_iter)
+    registrar_solver('ponto_operacao_lote', iteracoes=iteracoes, casos=P, falhas=int(P - convergiu.sum()))
+    return x[:, 0], x[:, 1:], convergiu
+
+
+class _CurvaPartida:
+    """Curva de perdas da rede (sem altura geométrica) numa grade de vazões, calculada uma vez.
+
+    A rede é a mesma em todos os passos: só a altura geométrica e a válvula mudam. Por isso a
+    interseção aproximada com a bomba, lida nesta curva, é o ponto de partida de cada passo.
+    """
+
+    def __init__(self, rede, nu, vazao_maxima):
+        self.vazoes = np.linspace(0.0, vazao_maxima, PONTOS_CURVA_PARTIDA)
+        curva = avaliar_curva_sistema(rede, self.vazoes, 0.0, nu)
+        valido = curva['convergiu']
+        self.vazoes, self.perdas = self.vazoes[valido], curva['altura'][valido]
+        self.vazoes_ramais = curva['vazoes_ramais'][valido]
+
+    def partida(self, func_curva_bomba, h_geometrica, coef_valvula):
+        """(vazões iniciais (P,), vazões dos ramais iniciais (P, n), existe ponto de operação (P,))."""
+        Q = self.vazoes[None, :]
+        folga = func_curva_bomba(Q) - h_geometrica[:, None] - coef_valvula[:, None] * Q**2 - self.perdas[None, :]
+        positiva = folga > 0
+        # Primeira troca de sinal (+ -> -): interpolação linear entre os dois pontos da grade.
+        troca = positiva[:, :-1] & ~positiva[:, 1:]
+        existe = positiva[:, 0]
+        k = np.where(troca.any(axis=1), np.argmax(troca, axis=1), len(self.vazoes) - 2)
+        linhas = np.arange(len(h_geometrica))
+        f0, f1 = folga[linhas, k], folga[linhas, k + 1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fracao = np.where(troca.any(axis=1), np.clip(f0 / (f0 - f1), 0.0, 1.0), 1.0)
+        vazoes = self.vazoes[k] + fracao * (self.vazoes[k + 1] - self.vazoes[k])
+        vazoes_ramais = np.column_stack([np.interp(vazoes, self.vazoes, coluna) for coluna in self.vazoes_ramais.T]) if self.vazoes_ramais.shape[1] else None
+        return np.maximum(vazoes, 1e-3), vazoes_ramais, existe
+
+
+def _vazao_maxima(func_curva_bomba):
+    """Vazão em que a altura da bomba chega a zero (menor raiz real positiva da curva ajustada)."""
+    raizes = np.roots(func_curva_bomba.coeffs)
+    positivas = np.sort(raizes[(np.abs(raizes.imag) < 1e-9) & (raizes.real > 0)].real)
+    if not len(positivas): raise ValueError("A curva da bomba não chega a altura zero; informe `vazao_maxima`.")
+    return float(positivas[0])
+
+
+def simular_periodo_em_fluxo(rede, perfis, func_curva_bomba, func_curva_eficiencia, fluido, eficiencia_motor_percent,
+                             diametro_valvula_mm=None, vazao_maxima=None, faixa_bep=FAIXA_BEP_PADRAO):
+    """Resolve o ponto de operação de cada passo dos `perfis` (iterável de blocos de `ler_perfis`).
+
+    A válvula de controle fica em série, com diâmetro `diametro_valvula_mm` (padrão: o do primeiro
+    trecho da rede). Passos com a bomba desligada ou sem ponto de operação não consomem energia.
+    `fora_da_faixa` marca vazões fora de `faixa_bep` × vazão de melhor eficiência. Gera um DataFrame
+    de resultados por bloco, à medida que cada bloco é resolvido.
+    """
+    nu, rho = FLUIDOS[fluido]["nu"], FLUIDOS[fluido]["rho"]
+    vazao_maxima = _vazao_maxima(func_curva_bomba) if vazao_maxima is None else float(vazao_maxima)
+    curva = _CurvaPartida(rede, nu, vazao_maxima)
+    grade_bep = np.linspace(0.0, vazao_maxima, 512)
+    vazao_bep = float(grade_bep[np.argmax(func_curva_eficiencia(grade_bep))])
+    diametro_valvula_mm = float(rede.diametros_mm[0]) if diametro_valvula_mm is None else float(diametro_valvula_mm)
+    # K·v²/2g com v em m/s e Q em m³/h  =>  coeficiente de Q².
+    fator_valvula = 1 / (2 * GRAVIDADE * (3600 * np.pi * (diametro_valvula_mm / 1000)**2 / 4)**2)
+    for perfil in perfis:
+        h_geometrica = perfil['h_geometrica'].to_numpy()
+        coef_valvula = perfil['k_valvula'].to_numpy() * fator_valvula
+        ligada = perfil['ligada'].to_numpy() > 0
+        vazoes, vazoes_ramais, existe = curva.partida(func_curva_bomba, h_geometrica, coef_valvula)
+        resolver = np.flatnonzero(ligada & existe)
+        vazao_op = np.zeros(len(perfil))
+        convergiu = ~ligada | ~existe
+        if len(resolver):
+            vazoes_sol, _, convergiu_sol = resolver_ponto_operacao_lote(
+                rede, h_geometrica[resolver], coef_valvula[resolver], nu, func_curva_bomba, vazoes[resolver],
+                None if vazoes_ramais is None else vazoes_ramais[resolver])
+            convergiu[resolver] = convergiu_sol & (vazoes_sol > 1e-3)
+            vazao_op[resolver] = np.where(convergiu[resolver], vazoes_sol, np.nan)
+        operando = ligada & existe & convergiu
+        altura_op = np.where(operando, func_curva_bomba(vazao_op), np.nan)
+        eficiencia = np.where(operando, np.clip(func_curva_eficiencia(vazao_op), 0.0, 100.0), np.nan)
+        # Mesma potência de `calcular_analise_energetica`, em lote.
+        rendimento = eficiencia / 100 * eficiencia_motor_percent / 100
+        with np.errstate(divide='ignore', invalid='ignore'):
+            potencia = np.where(operando & (rendimento > 0), vazao_op / 3600 * rho * 9.81 * altura_op / rendimento / 1000, 0.0)
+        energia = potencia * perfil['duracao_h'].to_numpy()
+        resultado = perfil.copy()
+        resultado['vazao_m3h'], resultado['altura_m'], resultado['eficiencia_percent'] = np.where(operando, vazao_op, 0.0), altura_op, eficiencia
+        resultado['potencia_kW'], resultado['energia_kWh'], resultado['custo'] = potencia, energia, energia * perfil['tarifa_kwh'].to_numpy()
+        resultado['sem_ponto'] = ligada & ~existe
+        resultado['convergiu'] = convergiu
+        resultado['fora_da_faixa'] = operando & ((vazao_op < faixa_bep[0] * vazao_bep) | (vazao_op > faixa_bep[1] * vazao_bep))
+        yield resultado
+
+
+def resumir_simulacao(resultados):
+    """Totais do período a partir dos blocos de `simular_periodo_em_fluxo` (consumidos em fluxo)."""
+    totais = dict.fromkeys(['horas_total', 'horas_operando', 'horas_fora_faixa', 'horas_sem_ponto', 'horas_nao_convergidas',
+                            'energia_kWh', 'custo_total', 'volume_m3'], 0.0)
+    for bloco in resultados:
+        duracao = bloco['duracao_h'].to_numpy()
+        operando = bloco['vazao_m3h'].to_numpy() > 0
+        totais['horas_total'] += duracao.sum()
+        totais['horas_operando'] += duracao[operando].sum()
+        totais['horas_fora_faixa'] += duracao[bloco['fora_da_faixa'].to_numpy()].sum()
+        totais['horas_sem_ponto'] += duracao[bloco['sem_ponto'].to_numpy()].sum()
+        totais['horas_nao_convergidas'] += duracao[~bloco['convergiu'].to_numpy()].sum()
+        totais['energia_kWh'] += bloco['energia_kWh'].sum()
+        totais['custo_total'] += bloco['custo'].sum()
+        totais['volume_m3'] += (bloco['vazao_m3h'].to_numpy() * duracao).sum()
+    totais = {chave: float(valor) for chave, valor in totais.items()}
+    totais['custo_medio_kwh'] = totais['custo_total'] / totais['energia_kWh'] if totais['energia_kWh'] > 0 else 0.0
+    totais['energia_especifica_kWh_m3'] = totais['energia_kWh'] / totais['volume_m3'] if totais['volume_m3'] > 0 else 0.0
+    return totais
@@ -0,0 +1,169 @@
+# hidraulica/varredura.py
+# Varreduras de sensibilidade multiparâmetro, avaliadas em lote (NumPy) e opcionalmente em vários processos.
+
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from .atrito import MODO_PADRAO
+from .instrumentacao import registrar_solver
+from .motor import (FLUIDOS, RedeCompilada, calcular_coeficientes_trechos, calcular_perdas_coeficientes,
+                    calcular_derivadas_coeficientes, calcular_analise_energetica, compilar_rede, _newton_amortecido_lote)
+
+# Parâmetros que alteram as perdas (exigem cálculo hidráulico) e parâmetros que só entram no custo.
+PARAMETROS_HIDRAULICOS = ('escala_diametro', 'escala_diametro_antes', 'escala_diametro_paralelo', 'escala_diametro_depois', 'escala_rugosidade')
+PARAMETROS_ECONOMICOS = ('h_geometrica', 'horas_dia', 'custo_kwh')
+TAMANHO_BLOCO_PADRAO = 2000
+
+
+def _perdas_totais(coeficientes, k_totais, vazoes, nu, modo_atrito):
+    perdas = calcular_perdas_coeficientes(coeficientes, k_totais, vazoes, nu, modo_atrito)
+    return perdas["principal"] + perdas["localizada"]
+
+
+def dividir_vazao_lote(coeficientes, k_totais, ramal, num_ramais, vazao_total_m3h, nu, tol=1e-8, max_iter=50, modo_atrito=MODO_PADRAO,
+                       vazoes_iniciais=None):
+    """Divide a vazão entre os ramais para P variantes da rede de uma só vez (Newton em lote).
+
+    `coeficientes` contém arrays (P, m) dos m trechos paralelos e `ramal` (m,) o ramal de cada
+    trecho. `vazoes_iniciais` (P, n), se dada, substitui a divisão igual como ponto de partida.
+    Linhas em que o Newton não converge são refeitas uma a uma com o `root` de `calcular_perdas_paralelo`.
+    Retorna (vazoes_ramais (P, n), perdas_ramais (P, n), convergiu (P,)).
+    """
+    P = coeficientes[0].shape[0]
+    membros = np.zeros((len(ramal), num_ramais)); membros[np.arange(len(ramal)), ramal] = 1.0
+    x = np.full((P, num_ramais), vazao_total_m3h / num_ramais) if vazoes_iniciais is None else np.array(vazoes_iniciais, dtype=float)
+    if vazao_total_m3h <= 0:
+        return np.zeros((P, num_ramais)), np.zeros((P, num_ramais)), np.ones(P, dtype=bool)
+    diag = np.arange(num_ramais - 1)
+
+    def residuos(x, linhas):
+        coef = tuple(c[linhas] for c in coeficientes)
+        vazoes_trechos = x[:, ramal]
+        perdas = _perdas_totais(coef, k_totais, vazoes_trechos, nu, modo_atrito) @ membros
+        derivadas = calcular_derivadas_coeficientes(coef, k_totais, vazoes_trechos, nu, modo_atrito) @ membros
+        F = np.empty_like(x)
+        F[:, :-1] = perdas[:, :-1] - perdas[:, -1:]
+        F[:, -1] = x.sum(axis=1) - vazao_total_m3h
+        J = np.zeros((len(x), num_ramais, num_ramais))
+        J[:, diag, diag] = derivadas[:, :-1]; J[:, :-1, -1] = -derivadas[:, -1:]; J[:, -1, :] = 1.0
+        return F, J
+
+    x, convergiu, iteracoes = _newton_amortecido_lote(residuos, x, tol, max_iter)
+    registrar_solver('divisao_ramais_lote', iteracoes=iteracoes, casos=P, falhas=int(P - convergiu.sum()))
+    pendentes = np.flatnonzero(~convergiu)
+    if len(pendentes):
+        from scipy.optimize import root
+        chute_inicial = np.full(num_ramais - 1, vazao_total_m3h / num_ramais)
+        for linha in pendentes:
+            def equacoes_perda(vazoes_parciais, linhas=np.array([linha])):
+                vazao_ultimo_ramal = vazao_total_m3h - vazoes_parciais.sum()
+                if vazao_ultimo_ramal < -0.01: return np.full(num_ramais - 1, 1e12)
+                return residuos(np.append(vazoes_parciais, vazao_ultimo_ramal)[None], linhas)[0][0, :-1]
+            solucao = root(equacoes_perda, chute_inicial, method='hybr', options={'xtol': 1e-8})
+            if solucao.success:
+                x[linha], convergiu[linha] = np.append(solucao.x, vazao_total_m3h - solucao.x.sum()), True
+        registrar_solver('divisao_ramais_lote_root', casos=len(pendentes), falhas=int(len(pendentes) - convergiu[pendentes].sum()))
+    perdas = _perdas_totais(coeficientes, k_totais, x[:, ramal], nu, modo_atrito) @ membros
+    return x, perdas, convergiu
+
+
+def calcular_perdas_lote(rede, vazao_m3h, nu, escalas_secao, escalas_rugosidade):
+    """Perda total da rede em uma vazão fixa para P variantes, sem copiar a rede.
+
+    `escalas_secao` (P, 3) multiplica os diâmetros de cada seção (antes, paralelo, depois) e
+    `escalas_rugosidade` (P,) as rugosidades. Retorna (perdas (P,), convergiu (P,)); pontos cuja
+    divisão entre ramais não converge ficam com NaN, como em `gerar_grafico_sensibilidade_diametro`.
+    """
+    escalas_secao = np.asarray(escalas_secao, dtype=float)
+    fator = escalas_secao[:, rede.secao]
+    coeficientes = calcular_coeficientes_trechos(rede.comprimentos, rede.diametros_mm * fator,
+                                                 rede.rugosidades_mm * np.asarray(escalas_rugosidade, dtype=float)[:, None])
+    perdas = np.zeros(len(escalas_secao))
+    series = rede.secao != RedeCompilada.PARALELO
+    if series.any():
+        perdas += _perdas_totais(tuple(c[:, series] for c in coeficientes), rede.k_totais[series], vazao_m3h, nu, rede.modo_atrito).sum(axis=1)
+    convergiu = np.ones(len(escalas_secao), dtype=bool)
+    if rede.num_ramais >= 2:
+        paralelo = ~series
+        _, perdas_ramais, convergiu = dividir_vazao_lote(tuple(c[:, paralelo] for c in coeficientes), rede.k_totais[paralelo],
+                                                         rede.ramal[paralelo], rede.num_ramais, vazao_m3h, nu, modo_atrito=rede.modo_atrito)
+        perdas += perdas_ramais[:, 0]
+    return np.where(convergiu, perdas, np.nan), convergiu
+
+
+def _avaliar_bloco(rede, vazao_m3h, nu, combinacoes_hidraulicas):
+    """Executado no processo trabalhador: perdas de um bloco de combinações hidráulicas."""
+    escala_global = combinacoes_hidraulicas[:, 0:1]
+    escalas_secao = escala_global * combinacoes_hidraulicas[:, 1:4]
+    perdas, _ = calcular_perdas_lote(rede, vazao_m3h, nu, escalas_secao, combinacoes_hidraulicas[:, 4])
+    return perdas
+
+
+def _grade(grade, nomes, padrao):
+    valores = [np.atleast_1d(np.asarray(grade.get(nome, [padrao[nome]]), dtype=float)) for nome in nomes]
+    return np.array(list(itertools.product(*valores)), dtype=float).reshape(-1, len(nomes))
+
+
+def _montar_resultados(combinacoes_hidraulicas, perdas, combinacoes_economicas, grade, vazao_m3h, fluido, eficiencia_bomba_percent, eficiencia_motor_percent):
+    import pandas as pd
+    n_h, n_e = len(combinacoes_hidraulicas), len(combinacoes_economicas)
+    h_geo, horas, custo = (np.tile(combinacoes_economicas[:, i], n_h) for i in range(3))
+    h_man = h_geo + np.repeat(perdas, n_e)
+    energia = calcular_analise_energetica(vazao_m3h, h_man, eficiencia_bomba_percent, eficiencia_motor_percent, horas, custo, fluido)
+    colunas = {}
+    for i, nome in enumerate(PARAMETROS_HIDRAULICOS):
+        if nome in grade: colunas[nome] = np.repeat(combinacoes_hidraulicas[:, i], n_e)
+    for i, nome in enumerate(PARAMETROS_ECONOMICOS):
+        if nome in grade: colunas[nome] = np.tile(combinacoes_economicas[:, i], n_h)
+    colunas['Altura Manométrica (m)'] = h_man
+    colunas['Potência Elétrica (kW)'] = np.broadcast_to(energia['potencia_eletrica_kW'], h_man.shape)
+    colunas['Custo Anual de Energia (R$)'] = np.broadcast_to(energia['custo_anual'], h_man.shape)
+    return pd.DataFrame(colunas)
+
+
+def varrer_parametros_em_fluxo(rede, grade, vazao_m3h, fluido, base, eficiencia_bomba_percent, eficiencia_motor_percent,
+                               tamanho_bloco=TAMANHO_BLOCO_PADRAO, processos=1):
+    """Gera DataFrames parciais de uma varredura em grade, na ordem em que os blocos terminam.
+
+    `grade` mapeia nomes de PARAMETROS_HIDRAULICOS / PARAMETROS_ECONOMICOS para listas de valores;
+    parâmetros ausentes usam `base` (h_geometrica, horas_dia, custo_kwh) ou 1.0 nas escalas. A vazão é
+    mantida fixa, como na análise de sensibilidade original. As perdas são calculadas uma única vez por
+    combinação hidráulica e combinadas com todos os valores econômicos. Com `processos` > 1 os blocos são
+    distribuídos em um ProcessPoolExecutor.
+    """
+    desconhecidos = set(grade) - set(PARAMETROS_HIDRAULICOS) - set(PARAMETROS_ECONOMICOS)
+    if desconhecidos: raise ValueError(f"Parâmetros de varredura desconhecidos: {', '.join(sorted(desconhecidos))}")
+    nu = FLUIDOS[fluido]["nu"]
+    combinacoes_hidraulicas = _grade(grade, PARAMETROS_HIDRAULICOS, dict.fromkeys(PARAMETROS_HIDRAULICOS, 1.0))
+    combinacoes_economicas = _grade(grade, PARAMETROS_ECONOMICOS, base)
+    blocos = [combinacoes_hidraulicas[i:i + tamanho_bloco] for i in range(0, len(combinacoes_hidraulicas), tamanho_bloco)]
+    argumentos_resultado = (combinacoes_economicas, grade, vazao_m3h, fluido, eficiencia_bomba_percent, eficiencia_motor_percent)
+    if processos is None or processos > 1:
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            futuros = {executor.submit(_avaliar_bloco, rede, vazao_m3h, nu, bloco): bloco for bloco in blocos}
+            for futuro in as_completed(futuros):
+                yield _montar_resultados(futuros[futuro], futuro.result(), *argumentos_resultado)
+    else:
+        for bloco in blocos:
+            yield _montar_resultados(bloco, _avaliar_bloco(rede, vazao_m3h, nu, bloco), *argumentos_resultado)
+
+
+def varrer_parametros(rede, grade, vazao_m3h, fluido, base, eficiencia_bomba_percent, eficiencia_motor_percent,
+                      tamanho_bloco=TAMANHO_BLOCO_PADRAO, processos=1):
+    """Executa a varredura completa e retorna um único DataFrame (ver `varrer_parametros_em_fluxo`)."""
+    import pandas as pd
+    partes = list(varrer_parametros_em_fluxo(rede, grade, vazao_m3h, fluido, base, eficiencia_bomba_percent,
+                                             eficiencia_motor_percent, tamanho_bloco, processos))
+    return pd.concat(partes, ignore_index=True) if partes else pd.DataFrame()
+
+
+def gerar_grafico_sensibilidade_diametro(sistema_base, fator_escala_range, rede=None, **params_fixos):
+    import pandas as pd
+    if rede is None: rede = compilar_rede(sistema_base)
+    fatores = np.arange(fator_escala_range[0], fator_escala_range[1] + 5, 5)
+    equipamentos = params_fixos['equipamentos']
+    base = {'h_geometrica': params_fixos['h_geo'], 'horas_dia': equipamentos['horas_dia'], 'custo_kwh': equipamentos['custo_kwh']}
+    resultado = varrer_parametros(rede, {'escala_diametro': fatores / 100.0}, params_fixos['vazao_op'], params_fixos['fluido'], base, equipamentos['eficiencia_bomba_percent'], equipamentos['eficiencia_motor_percent'])
+    return pd.DataFrame({'Fator de Escala nos Diâmetros (%)': fatores, 'Custo Anual de Energia (R$)': resultado['Custo Anual de Energia (R$)'].to_numpy()})
@@ -0,0 +1,95 @@
+# processamento_lote.py
+# Reavaliação em lote (sem interface) dos cenários salvos, distribuída em vários processos.
+#
+# Uso: python processamento_lote.py --usuario pedro --tarifa 0.92 --saida relatorio.csv
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import database
+from hidraulica import MODO_PADRAO, calcular_analise_energetica, compilar_rede, criar_funcao_curva, encontrar_ponto_operacao
+
+
+def avaliar_cenario(dados, eficiencia_motor_percent, horas_dia, custo_kwh):
+    """Calcula ponto de operação, eficiência e custo de energia de um cenário salvo (mesmo fluxo da interface)."""
+    fluido = dados.get('fluido_selecionado', "Água a 20°C")
+    h_geometrica = dados.get('h_geometrica', 15.0)
+    modo_atrito = dados.get('modo_atrito', MODO_PADRAO)
+    resultado = {'status': 'ok', 'vazao_op': None, 'altura_op': None, 'eficiencia_op': None, 'potencia_eletrica_kW': None, 'custo_anual': None}
+    func_curva_bomba = criar_funcao_curva(pd.DataFrame(dados['curva_altura']), "Vazão (m³/h)", "Altura (m)")
+    func_curva_eficiencia = criar_funcao_curva(pd.DataFrame(dados['curva_eficiencia']), "Vazão (m³/h)", "Eficiência (%)")
+    if func_curva_bomba is None or func_curva_eficiencia is None:
+        return {**resultado, 'status': 'curva da bomba insuficiente'}
+    if func_curva_bomba(0) < h_geometrica:
+        return {**resultado, 'status': 'bomba incompatível'}
+    sistema = {'antes': dados['trechos_antes'], 'paralelo': dados['ramais_paralelos'], 'depois': dados['trechos_depois']}
+    if not (sistema['antes'] or sistema['depois'] or any(sistema['paralelo'].values())):
+        return {**resultado, 'status': 'rede vazia'}
+    vazao_op, altura_op, _ = encontrar_ponto_operacao(sistema, h_geometrica, fluido, func_curva_bomba, rede=compilar_rede(sistema, modo_atrito))
+    if vazao_op is None:
+        return {**resultado, 'status': 'sem ponto de operação'}
+    eficiencia_op = min(max(float(func_curva_eficiencia(vazao_op)), 0.0), 100.0)
+    energia = calcular_analise_energetica(vazao_op, altura_op, eficiencia_op, eficiencia_motor_percent, horas_dia, custo_kwh, fluido)
+    return {**resultado, 'vazao_op': float(vazao_op), 'altura_op': float(altura_op), 'eficiencia_op': eficiencia_op, **energia}
+
+
+def _avaliar_cenario_salvo(argumentos):
+    """Executado no processo trabalhador: carrega o cenário do banco e o avalia."""
+    banco, username, project_name, scenario_name, eficiencia_motor_percent, horas_dia, custo_kwh = argumentos
+    database.DB_NAME = banco
+    linha = {'usuario': username, 'projeto': project_name, 'cenario': scenario_name}
+    try:
+        dados = database.load_scenario(username, project_name, scenario_name)
+        if dados is None: return {**linha, 'status': 'cenário não encontrado'}
+        return {**linha, **avaliar_cenario(dados, eficiencia_motor_percent, horas_dia, custo_kwh)}
+    except Exception as e:
+        return {**linha, 'status': f'erro: {e}'}
+
+
+def listar_cenarios(username, projetos=None):
+    """Lista (projeto, cenário) do usuário, opcionalmente restrito a alguns projetos."""
+    projetos = projetos or database.get_user_projects(username)
+    return [(projeto, cenario) for projeto in projetos for cenario in database.get_scenarios_for_project(username, projeto)]
+
+
+def processar_cenarios(username, projetos=None, eficiencia_motor_percent=90, horas_dia=8.0, custo_kwh=0.75, processos=None):
+    """Avalia todos os cenários do usuário em paralelo e retorna um DataFrame consolidado."""
+    tarefas = [(database.DB_NAME, username, projeto, cenario, eficiencia_motor_percent, horas_dia, custo_kwh)
+               for projeto, cenario in listar_cenarios(username, projetos)]
+    if processos == 1:
+        linhas = [_avaliar_cenario_salvo(tarefa) for tarefa in tarefas]
+    else:
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            linhas = list(executor.map(_avaliar_cenario_salvo, tarefas, chunksize=max(1, len(tarefas) // (4 * (processos or os.cpu_count() or 1)))))
+    return pd.DataFrame(linhas, columns=['usuario', 'projeto', 'cenario', 'status', 'vazao_op', 'altura_op', 'eficiencia_op', 'potencia_eletrica_kW', 'custo_anual'])
+
+
+def salvar_relatorio(df, caminho):
+    """Grava o relatório em CSV ou Parquet (pela extensão; Parquet exige pyarrow ou fastparquet)."""
+    if caminho.lower().endswith('.parquet'): df.to_parquet(caminho, index=False)
+    else: df.to_csv(caminho, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reavalia em lote os cenários salvos de um usuário.")
+    parser.add_argument('--usuario', required=True)
+    parser.add_argument('--projeto', action='append', help="Restringe a um projeto (pode ser repetido).")
+    parser.add_argument('--motor', type=float, default=90.0, help="Eficiência do motor (%%).")
+    parser.add_argument('--horas', type=float, default=8.0, help="Horas de operação por dia.")
+    parser.add_argument('--tarifa', type=float, default=0.75, help="Custo da energia (R$/kWh).")
+    parser.add_argument('--processos', type=int, default=None, help="Número de processos (padrão: núcleos disponíveis).")
+    parser.add_argument('--banco', default=database.DB_NAME, help="Arquivo do banco SQLite.")
+    parser.add_argument('--saida', default='relatorio_cenarios.csv', help="Arquivo .csv ou .parquet.")
+    args = parser.parse_args(argv)
+    database.DB_NAME = args.banco
+    database.setup_database()  # migra bancos criados por versões anteriores antes de ler os cenários
+    df = processar_cenarios(args.usuario, args.projeto, args.motor, args.horas, args.tarifa, args.processos)
+    salvar_relatorio(df, args.saida)
+    print(f"{len(df)} cenário(s) avaliados; relatório salvo em {args.saida}")
+
+
+if __name__ == '__main__':
+    main()
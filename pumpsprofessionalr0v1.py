@@ -1,198 +1,416 @@
 import streamlit as st
 import pandas as pd
-import math
 import time
 import numpy as np
-from scipy.optimize import root
-import graphviz
-import matplotlib.pyplot as plt
+import copy
 import io
+from contextlib import contextmanager
+import os
 import yaml
 from yaml.loader import SafeLoader
 import streamlit_authenticator as stauth
 
 # Importando as funções de cenário do banco de dados
-from database import setup_database, save_scenario, load_scenario, get_user_projects, get_scenarios_for_project, delete_scenario
+from database import (setup_database, save_scenario, load_scenario, get_user_projects, get_scenarios_for_project, delete_scenario,
+                      get_scenario_summaries, get_scenario_revisions, load_scenario_revision, save_pump_models, load_pump_model, count_pump_models)
+from cache_resultados import PipelineResultados, obter_cache_usuario
+from catalogo_bombas import ORDENACOES, LIMITE_LISTA_PADRAO, ajustar_modelo, importar_catalogo_csv, pontos_do_modelo, triar_bombas
+# Constantes e motor de cálculo (pacote importável sem a interface; submódulos carregados sob demanda)
+from hidraulica import (MATERIAIS, K_FACTORS, FLUIDOS, MODO_PADRAO, MODOS_ATRITO, compilar_rede, avaliar_curva_sistema, calcular_analise_energetica,
+                        calcular_perdas_trecho, criar_funcao_curva, encontrar_ponto_operacao, Diagnostico, coletor_ativo, configurar_log_json,
+                        varrer_parametros_em_fluxo, gerar_grafico_sensibilidade_diametro, VELOCIDADE_MIN_PADRAO, VELOCIDADE_MAX_PADRAO,
+                        otimizar_diametros, aplicar_diametros, ler_perfis, simular_periodo_em_fluxo, resumir_simulacao, ARRANJOS,
+                        ROTACAO_MIN_PADRAO, CurvaBomba, EstacaoBombeamento, AMOSTRAS_PADRAO, DISTRIBUICOES, INCERTEZAS_PADRAO,
+                        PARAMETROS_DISTRIBUICAO, ROTULOS_INCERTEZAS, VARIAVEIS, analisar_incerteza_em_fluxo, tabela_percentis)
 
 # --- CONFIGURAÇÕES E CONSTANTES ---
 st.set_page_config(layout="wide", page_title="Análise de Redes Hidráulicas")
-plt.style.use('seaborn-v0_8-whitegrid')
-
-MATERIAIS = {
-    "Aço Carbono (novo)": 0.046, "Aço Carbono (pouco uso)": 0.1, "Aço Carbono (enferrujado)": 0.2,
-    "Aço Inox": 0.002, "Ferro Fundido": 0.26, "PVC / Plástico": 0.0015, "Concreto": 0.5
-}
-K_FACTORS = {
-    "Entrada de Borda Viva": 0.5, "Entrada Levemente Arredondada": 0.2, "Entrada Bem Arredondada": 0.04,
-    "Saída de Tubulação": 1.0, "Válvula Gaveta (Totalmente Aberta)": 0.2, "Válvula Gaveta (1/2 Aberta)": 5.6,
-    "Válvula Globo (Totalmente Aberta)": 10.0, "Válvula de Retenção (Tipo Portinhola)": 2.5,
-    "Cotovelo 90° (Raio Longo)": 0.6, "Cotovelo 90° (Raio Curto)": 0.9, "Cotovelo 45°": 0.4,
-    "Curva de Retorno 180°": 2.2, "Tê (Fluxo Direto)": 0.6, "Tê (Fluxo Lateral)": 1.8,
-}
-FLUIDOS = { "Água a 20°C": {"rho": 998.2, "nu": 1.004e-6}, "Etanol a 20°C": {"rho": 789.0, "nu": 1.51e-6} }
-
-# --- FUNÇÕES DE CÁLCULO (O MOTOR DA APLICAÇÃO) ---
-def calcular_perda_serie(lista_trechos, vazao_m3h, fluido_selecionado):
-    perda_total = 0
-    for trecho in lista_trechos:
-        perdas = calcular_perdas_trecho(trecho, vazao_m3h, fluido_selecionado)
-        perda_total += perdas["principal"] + perdas["localizada"]
-    return perda_total
-
-def calcular_perdas_trecho(trecho, vazao_m3h, fluido_selecionado):
-    if vazao_m3h < 0: vazao_m3h = 0
-    rugosidade_mm = MATERIAIS[trecho["material"]]
-    vazao_m3s, diametro_m = vazao_m3h / 3600, trecho["diametro"] / 1000
-    nu = FLUIDOS[fluido_selecionado]["nu"]
-    if diametro_m <= 0: return {"principal": 1e12, "localizada": 0, "velocidade": 0}
-    area = (math.pi * diametro_m**2) / 4
-    velocidade = vazao_m3s / area if area > 0 else 0
-    reynolds = (velocidade * diametro_m) / nu if nu > 0 else 0
-    fator_atrito = 0
-    if reynolds > 4000:
-        rugosidade_m = rugosidade_mm / 1000
-        if diametro_m <= 0: return {"principal": 1e12, "localizada": 0, "velocidade": 0}
-        log_term = math.log10((rugosidade_m / (3.7 * diametro_m)) + (5.74 / reynolds**0.9))
-        fator_atrito = 0.25 / (log_term**2)
-    elif reynolds > 0:
-        fator_atrito = 64 / reynolds
-    perda_principal = fator_atrito * (trecho["comprimento"] / diametro_m) * (velocidade**2 / (2 * 9.81))
-    k_total_trecho = sum(ac["k"] * ac["quantidade"] for ac in trecho["acessorios"])
-    perda_localizada = k_total_trecho * (velocidade**2 / (2 * 9.81))
-    return {"principal": perda_principal, "localizada": perda_localizada, "velocidade": velocidade}
-
-def calcular_perdas_paralelo(ramais, vazao_total_m3h, fluido_selecionado):
-    num_ramais = len(ramais)
-    if num_ramais < 2: return 0, {}
-    lista_ramais = list(ramais.values())
-    def equacoes_perda(vazoes_parciais_m3h):
-        vazao_ultimo_ramal = vazao_total_m3h - sum(vazoes_parciais_m3h)
-        if vazao_ultimo_ramal < -0.01: return [1e12] * (num_ramais - 1)
-        todas_vazoes = np.append(vazoes_parciais_m3h, vazao_ultimo_ramal)
-        perdas = [calcular_perda_serie(ramal, vazao, fluido_selecionado) for ramal, vazao in zip(lista_ramais, todas_vazoes)]
-        erros = [perdas[i] - perdas[-1] for i in range(num_ramais - 1)]
-        return erros
-    chute_inicial = np.full(num_ramais - 1, vazao_total_m3h / num_ramais)
-    solucao = root(equacoes_perda, chute_inicial, method='hybr', options={'xtol': 1e-8})
-    if not solucao.success: return -1, {}
-    vazoes_finais = np.append(solucao.x, vazao_total_m3h - sum(solucao.x))
-    perda_final_paralelo = calcular_perda_serie(lista_ramais[0], vazoes_finais[0], fluido_selecionado)
-    distribuicao_vazao = {nome_ramal: vazao for nome_ramal, vazao in zip(ramais.keys(), vazoes_finais)}
-    return perda_final_paralelo, distribuicao_vazao
-
-def calcular_analise_energetica(vazao_m3h, h_man, eficiencia_bomba_percent, eficiencia_motor_percent, horas_dia, custo_kwh, fluido_selecionado):
-    rho = FLUIDOS[fluido_selecionado]["rho"]
-    ef_bomba = eficiencia_bomba_percent / 100
-    ef_motor = eficiencia_motor_percent / 100
-    potencia_eletrica_kW = (vazao_m3h / 3600 * rho * 9.81 * h_man) / (ef_bomba * ef_motor) / 1000 if ef_bomba * ef_motor > 0 else 0
-    custo_anual = potencia_eletrica_kW * horas_dia * 30 * 12 * custo_kwh
-    return {"potencia_eletrica_kW": potencia_eletrica_kW, "custo_anual": custo_anual}
-
-def criar_funcao_curva(df_curva, col_x, col_y, grau=2):
-    df_curva[col_x] = pd.to_numeric(df_curva[col_x], errors='coerce')
-    df_curva[col_y] = pd.to_numeric(df_curva[col_y], errors='coerce')
-    df_curva = df_curva.dropna(subset=[col_x, col_y])
-    if len(df_curva) < grau + 1: return None
-    coeficientes = np.polyfit(df_curva[col_x], df_curva[col_y], grau)
-    return np.poly1d(coeficientes)
-
-def encontrar_ponto_operacao(sistema, h_geometrica, fluido, func_curva_bomba):
-    def curva_sistema(vazao_m3h):
-        if vazao_m3h < 0: return h_geometrica
-        perda_total = 0
-        perda_total += calcular_perda_serie(sistema['antes'], vazao_m3h, fluido)
-        perda_par, _ = calcular_perdas_paralelo(sistema['paralelo'], vazao_m3h, fluido)
-        if perda_par == -1: return 1e12
-        perda_total += perda_par
-        perda_total += calcular_perda_serie(sistema['depois'], vazao_m3h, fluido)
-        return h_geometrica + perda_total
-    def erro(vazao_m3h):
-        if vazao_m3h < 0: return 1e12
-        return func_curva_bomba(vazao_m3h) - curva_sistema(vazao_m3h)
-    solucao = root(erro, 50.0, method='hybr', options={'xtol': 1e-8})
-    if solucao.success and solucao.x[0] > 1e-3:
-        vazao_op = solucao.x[0]
-        altura_op = func_curva_bomba(vazao_op)
-        return vazao_op, altura_op, curva_sistema
-    else:
-        return None, None, curva_sistema
-
-def gerar_diagrama_rede(sistema, vazao_total, distribuicao_vazao, fluido):
+configurar_log_json()
+
+# --- RECURSOS DO PROCESSO (carregados uma vez, não a cada rerun) ---
+@st.cache_resource
+def carregar_pyplot():
+    # matplotlib só é importado quando o primeiro gráfico é desenhado
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    plt.style.use('seaborn-v0_8-whitegrid')
+    return plt
+
+@st.cache_resource
+def inicializar_aplicacao():
+    setup_database()
+    with open('config.yaml') as file:
+        return yaml.load(file, Loader=SafeLoader)
+
+# --- FUNÇÕES DE INTERFACE (o motor de cálculo está no pacote hidraulica) ---
+def gerar_diagrama_rede(sistema, vazao_total, distribuicao_vazao, fluido, velocidades=None):
+    # `velocidades` segue a ordem da RedeCompilada (antes -> ramais -> depois); sem ele, calcula trecho a trecho.
+    def velocidade_trecho(indice, trecho, vazao): return float(velocidades[indice]) if velocidades is not None else calcular_perdas_trecho(trecho, vazao, fluido)['velocidade']
+    n_antes = len(sistema['antes']); indice_ramal = n_antes; n_depois_inicio = n_antes + sum(len(r) for r in sistema['paralelo'].values())
+    import graphviz
     dot = graphviz.Digraph(comment='Rede de Tubulação'); dot.attr('graph', rankdir='LR', splines='ortho'); dot.attr('node', shape='point'); dot.node('start', 'Bomba', shape='circle', style='filled', fillcolor='lightblue'); ultimo_no = 'start'
     for i, trecho in enumerate(sistema['antes']):
-        proximo_no = f"no_antes_{i+1}"; velocidade = calcular_perdas_trecho(trecho, vazao_total, fluido)['velocidade']; label = f"Trecho Antes {i+1}\\n{vazao_total:.1f} m³/h\\n{velocidade:.2f} m/s"; dot.edge(ultimo_no, proximo_no, label=label); ultimo_no = proximo_no
+        proximo_no = f"no_antes_{i+1}"; velocidade = velocidade_trecho(i, trecho, vazao_total); label = f"Trecho Antes {i+1}\\n{vazao_total:.1f} m³/h\\n{velocidade:.2f} m/s"; dot.edge(ultimo_no, proximo_no, label=label); ultimo_no = proximo_no
     if len(sistema['paralelo']) >= 2 and distribuicao_vazao:
         no_divisao = ultimo_no; no_juncao = 'no_juncao'; dot.node(no_juncao)
         for nome_ramal, trechos_ramal in sistema['paralelo'].items():
             vazao_ramal = distribuicao_vazao.get(nome_ramal, 0); ultimo_no_ramal = no_divisao
             for i, trecho in enumerate(trechos_ramal):
-                velocidade = calcular_perdas_trecho(trecho, vazao_ramal, fluido)['velocidade']; label_ramal = f"{nome_ramal} (T{i+1})\\n{vazao_ramal:.1f} m³/h\\n{velocidade:.2f} m/s"
+                velocidade = velocidade_trecho(indice_ramal + i, trecho, vazao_ramal); label_ramal = f"{nome_ramal} (T{i+1})\\n{vazao_ramal:.1f} m³/h\\n{velocidade:.2f} m/s"
                 if i == len(trechos_ramal) - 1: dot.edge(ultimo_no_ramal, no_juncao, label=label_ramal)
                 else: proximo_no_ramal = f"no_{nome_ramal}_{i+1}".replace(" ", "_"); dot.edge(ultimo_no_ramal, proximo_no_ramal, label=label_ramal); ultimo_no_ramal = proximo_no_ramal
+            indice_ramal += len(trechos_ramal)
         ultimo_no = no_juncao
     for i, trecho in enumerate(sistema['depois']):
-        proximo_no = f"no_depois_{i+1}"; velocidade = calcular_perdas_trecho(trecho, vazao_total, fluido)['velocidade']; label = f"Trecho Depois {i+1}\\n{vazao_total:.1f} m³/h\\n{velocidade:.2f} m/s"; dot.edge(ultimo_no, proximo_no, label=label); ultimo_no = proximo_no
+        proximo_no = f"no_depois_{i+1}"; velocidade = velocidade_trecho(n_depois_inicio + i, trecho, vazao_total); label = f"Trecho Depois {i+1}\\n{vazao_total:.1f} m³/h\\n{velocidade:.2f} m/s"; dot.edge(ultimo_no, proximo_no, label=label); ultimo_no = proximo_no
     dot.node('end', 'Fim', shape='circle', style='filled', fillcolor='lightgray'); dot.edge(ultimo_no, 'end')
     return dot
 
-def gerar_grafico_sensibilidade_diametro(sistema_base, fator_escala_range, **params_fixos):
-    custos, fatores = [], np.arange(fator_escala_range[0], fator_escala_range[1] + 5, 5)
-    for fator in fatores:
-        escala = fator / 100.0
-        sistema_escalado = {'antes': [t.copy() for t in sistema_base['antes']], 'paralelo': {k: [t.copy() for t in v] for k, v in sistema_base['paralelo'].items()}, 'depois': [t.copy() for t in sistema_base['depois']]}
-        for t_list in sistema_escalado.values():
-            if isinstance(t_list, list):
-                for t in t_list: t['diametro'] *= escala
-            elif isinstance(t_list, dict):
-                for _, ramal in t_list.items():
-                    for t in ramal: t['diametro'] *= escala
-        vazao_ref = params_fixos['vazao_op']
-        perda_antes = calcular_perda_serie(sistema_escalado['antes'], vazao_ref, params_fixos['fluido'])
-        perda_par, _ = calcular_perdas_paralelo(sistema_escalado['paralelo'], vazao_ref, params_fixos['fluido'])
-        perda_depois = calcular_perda_serie(sistema_escalado['depois'], vazao_ref, params_fixos['fluido'])
-        if perda_par == -1: custos.append(np.nan); continue
-        h_man = params_fixos['h_geo'] + perda_antes + perda_par + perda_depois
-        resultado_energia = calcular_analise_energetica(vazao_ref, h_man, **params_fixos['equipamentos'])
-        custos.append(resultado_energia['custo_anual'])
-    return pd.DataFrame({'Fator de Escala nos Diâmetros (%)': fatores, 'Custo Anual de Energia (R$)': custos})
+def aplicar_cenario(data):
+    st.session_state.h_geometrica = data.get('h_geometrica', 15.0)
+    st.session_state.fluido_selecionado = data.get('fluido_selecionado', "Água a 20°C")
+    st.session_state.modo_atrito = data.get('modo_atrito', MODO_PADRAO)
+    st.session_state.curva_altura_df = pd.DataFrame(data['curva_altura'])
+    st.session_state.curva_eficiencia_df = pd.DataFrame(data['curva_eficiencia'])
+    st.session_state.trechos_antes = data['trechos_antes']
+    st.session_state.trechos_depois = data['trechos_depois']
+    st.session_state.ramais_paralelos = data['ramais_paralelos']
+    estacao = data.get('estacao', {})
+    st.session_state.estacao_arranjo = estacao.get('arranjo', 'paralelo')
+    st.session_state.estacao_num_bombas = estacao.get('num_bombas', 1)
+    st.session_state.estacao_curvas = {int(i): {k: pd.DataFrame(v) for k, v in c.items()} for i, c in estacao.get('curvas', {}).items()}
+    st.session_state.resultado_estacao = None
+    # Os widgets das bombas extras guardam o estado anterior pela chave: descarta para refletirem o cenário.
+    for chave in [c for c in st.session_state if str(c).startswith(("curva_propria_", "editor_altura_", "editor_eficiencia_"))]: del st.session_state[chave]
+    invalidar_rede()
+
+def renderizar_painel_diagnostico(dados):
+    with st.expander("🩺 Diagnóstico da Execução", expanded=dados['erro'] is not None):
+        st.caption(f"Execução {dados['id']}{' (fragmento ' + dados['fragmento'] + ')' if dados.get('fragmento') else ''} | {dados['tempo_total_ms']:.1f} ms | Cache: {dados.get('cache_acertos', 0)} acertos, {dados.get('cache_falhas', 0)} falhas | Etapas recalculadas: {', '.join(dados.get('etapas_recalculadas') or []) or 'nenhuma'}")
+        if dados['etapas']: st.dataframe(pd.DataFrame(dados['etapas']), use_container_width=True, hide_index=True)
+        if dados['solvers']: st.dataframe(pd.DataFrame.from_dict(dados['solvers'], orient='index'), use_container_width=True)
+        else: st.caption("Nenhum solver executado (resultados vindos do cache).")
+        if dados['erro']: st.code(dados['erro']['traceback'])
+
+@contextmanager
+def diagnostico_fragmento(nome, pipeline):
+    # Num rerun completo as etapas entram no diagnóstico da execução; num rerun só do fragmento, em um diagnóstico próprio.
+    diagnostico = coletor_ativo()
+    if diagnostico is not None:
+        yield diagnostico
+        return
+    diagnostico = Diagnostico(usuario=st.session_state.get('username'), fragmento=nome, fluido=st.session_state.fluido_selecionado, modo_atrito=st.session_state.modo_atrito)
+    cache, recalculadas = pipeline.cache, len(pipeline.recalculadas)
+    acertos_cache, falhas_cache = cache.acertos, cache.falhas
+    try:
+        with diagnostico.ativo(): yield diagnostico
+    except Exception as e:
+        diagnostico.registrar_erro(e)
+        st.error(f"Ocorreu um erro inesperado durante a execução. Detalhe: {str(e)}")
+    finally:
+        diagnostico.contexto.update(cache_acertos=cache.acertos - acertos_cache, cache_falhas=cache.falhas - falhas_cache, etapas_recalculadas=pipeline.recalculadas[recalculadas:])
+        diagnostico.emitir_log()
+        if st.session_state.get("mostrar_diagnostico"): renderizar_painel_diagnostico(diagnostico.para_dict())
+
+def desenhar_grafico_curvas(rede, func_curva_bomba, max_vazao_curva, vazao_op, altura_op, h_geometrica, nu):
+    # Retorna o PNG (bytes) para st.image: a figura é fechada logo após salva e só é redesenhada quando uma dependência muda.
+    max_plot_vazao = max(vazao_op * 1.2, max_vazao_curva * 1.2)
+    vazao_range = np.linspace(0, max_plot_vazao, 100)
+    altura_bomba = func_curva_bomba(vazao_range)
+    altura_sistema = avaliar_curva_sistema(rede, vazao_range, h_geometrica, nu)['altura']
+    plt = carregar_pyplot()
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.plot(vazao_range, altura_bomba, label='Curva da Bomba', color='royalblue', lw=2)
+    ax.plot(vazao_range, altura_sistema, label='Curva do Sistema', color='seagreen', lw=2)
+    ax.scatter(vazao_op, altura_op, color='red', s=100, zorder=5, label=f'Ponto de Operação ({vazao_op:.1f} m³/h, {altura_op:.1f} m)')
+    ax.set_xlabel("Vazão (m³/h)"); ax.set_ylabel("Altura Manométrica (m)"); ax.set_title("Curva da Bomba vs. Curva do Sistema"); ax.legend(); ax.grid(True)
+    ax.set_xlim(left=0, right=max_plot_vazao)
+    max_altura_relevante = max(altura_op, np.nanmax(altura_sistema) if any(~np.isnan(altura_sistema)) else altura_op)
+    ax.set_ylim(bottom=h_geometrica * 0.9, top=max_altura_relevante * 1.15)
+    buffer = io.BytesIO(); fig.savefig(buffer, format='png', dpi=200, bbox_inches='tight'); plt.close(fig)
+    return buffer.getvalue()
+
+# --- SEÇÕES DE RESULTADOS (fragmentos: um widget dentro de uma seção reexecuta só a seção) ---
+CHAVES_EQUIPAMENTOS = ('eficiencia_bomba_percent', 'eficiencia_motor_percent', 'horas_dia', 'custo_kwh', 'fluido_selecionado')
+
+@st.fragment
+def renderizar_diagrama(pipeline, sistema, rede, vazao_op, h_geometrica, fluido):
+    st.header("🗺️ Diagrama da Rede")
+    with diagnostico_fragmento('diagrama', pipeline) as diagnostico:
+        with diagnostico.etapa('divisao_paralelo'):
+            curva_op = pipeline.etapa('curva_sistema_operacao', lambda: avaliar_curva_sistema(rede, [vazao_op], h_geometrica, FLUIDOS[fluido]["nu"]), depende=('ponto_operacao',))
+        distribuicao_vazao_op = dict(zip(rede.nomes_ramais, curva_op['vazoes_ramais'][0])) if rede.num_ramais >= 2 and curva_op['convergiu'][0] else {}
+        with diagnostico.etapa('diagrama'):
+            diagrama = pipeline.etapa('diagrama', lambda: gerar_diagrama_rede(sistema, vazao_op, distribuicao_vazao_op, fluido, velocidades=curva_op['velocidades'][0]).source, depende=('curva_sistema_operacao',), persistir=False)
+            st.graphviz_chart(diagrama)
+
+@st.fragment
+def renderizar_grafico_curvas(pipeline, rede, func_curva_bomba, max_vazao_curva, vazao_op, altura_op, h_geometrica, fluido):
+    st.header("📈 Gráfico de Curvas: Bomba vs. Sistema")
+    with diagnostico_fragmento('grafico', pipeline) as diagnostico, diagnostico.etapa('grafico'):
+        st.image(pipeline.etapa('grafico_curvas', lambda: desenhar_grafico_curvas(rede, func_curva_bomba, max_vazao_curva, vazao_op, altura_op, h_geometrica, FLUIDOS[fluido]["nu"]), depende=('curva_altura', 'ponto_operacao'), persistir=False))
+
+@st.fragment
+def renderizar_sensibilidade(pipeline, sistema, rede, vazao_op, h_geometrica, params_equipamentos):
+    # Mover o slider reexecuta só este fragmento: a varredura de diâmetros, sem nada acima dela.
+    st.header("📈 Análise de Sensibilidade de Custo por Diâmetro")
+    escala_range = st.slider("Fator de Escala para Diâmetros (%)", 50, 200, (80, 120), key="sensibilidade_slider")
+    params_fixos_sens = {'vazao_op': vazao_op, 'h_geo': h_geometrica, 'fluido': params_equipamentos['fluido_selecionado'], 'equipamentos': params_equipamentos}
+    with diagnostico_fragmento('sensibilidade', pipeline) as diagnostico:
+        with diagnostico.etapa('sensibilidade'):
+            chart_data_sensibilidade = pipeline.etapa('sensibilidade_diametro', lambda: gerar_grafico_sensibilidade_diametro(sistema, escala_range, rede=rede, **params_fixos_sens),
+                                                      entradas={'faixa': escala_range, 'equipamentos': params_equipamentos}, depende=('ponto_operacao',))
+        st.line_chart(chart_data_sensibilidade.set_index('Fator de Escala nos Diâmetros (%)'))
+
+@st.fragment
+def renderizar_varredura(pipeline, rede, vazao_op, h_geometrica, params_equipamentos):
+    eficiencia_op, rend_motor, horas_por_dia, tarifa_energia, fluido = (params_equipamentos[c] for c in CHAVES_EQUIPAMENTOS)
+    with diagnostico_fragmento('varredura', pipeline) as diagnostico, st.expander("🧮 Varredura Multiparâmetro"):
+        st.info("Parâmetros com 1 ponto ficam fixos no valor atual. A vazão é mantida no ponto de operação.")
+        grade_varredura = {}
+        for nome, rotulo, minimo, maximo, padrao, divisor in [
+            ('escala_diametro_antes', "Escala Ø Trechos Antes (%)", 50, 200, (80, 120), 100), ('escala_diametro_paralelo', "Escala Ø Ramais (%)", 50, 200, (80, 120), 100),
+            ('escala_diametro_depois', "Escala Ø Trechos Depois (%)", 50, 200, (80, 120), 100), ('escala_rugosidade', "Escala da Rugosidade (%)", 50, 500, (100, 300), 100),
+            ('h_geometrica', "Altura Geométrica (m)", 0.0, 200.0, (float(h_geometrica), float(h_geometrica) + 10), 1), ('horas_dia', "Horas por Dia", 1.0, 24.0, (8.0, 24.0), 1),
+            ('custo_kwh', "Custo da Energia (R$/kWh)", 0.10, 5.00, (0.50, 1.00), 1)]:
+            c1, c2 = st.columns([3, 1]); faixa = c1.slider(rotulo, minimo, maximo, padrao, key=f"varr_{nome}"); pontos = c2.number_input("Pontos", 1, 100, 1, key=f"varr_pts_{nome}")
+            if pontos > 1: grade_varredura[nome] = np.linspace(faixa[0], faixa[1], int(pontos)) / divisor
+        processos_varredura = st.number_input("Processos", 1, os.cpu_count() or 1, 1, help="Acima de 1, os blocos da grade são distribuídos em vários processos.")
+        if st.button("Executar Varredura", use_container_width=True, disabled=not grade_varredura):
+            with diagnostico.etapa('varredura'):
+                base_varredura = {'h_geometrica': h_geometrica, 'horas_dia': horas_por_dia, 'custo_kwh': tarifa_energia}
+                espaco_varredura, partes_varredura = st.empty(), []
+                for parte in varrer_parametros_em_fluxo(rede, grade_varredura, vazao_op, fluido, base_varredura, eficiencia_op, rend_motor, processos=processos_varredura):
+                    partes_varredura.append(parte)
+                    espaco_varredura.dataframe(pd.concat(partes_varredura, ignore_index=True), use_container_width=True)
+                st.session_state.resultado_varredura = pd.concat(partes_varredura, ignore_index=True)
+        if st.session_state.get('resultado_varredura') is not None:
+            st.download_button("Baixar Resultados (CSV)", st.session_state.resultado_varredura.to_csv(index=False).encode('utf-8'), "varredura.csv", "text/csv", use_container_width=True)
+
+@st.fragment
+def renderizar_otimizacao(pipeline, sistema, rede, vazao_op, h_geometrica, params_equipamentos):
+    eficiencia_op, rend_motor, horas_por_dia, tarifa_energia, fluido = (params_equipamentos[c] for c in CHAVES_EQUIPAMENTOS)
+    with diagnostico_fragmento('otimizacao_diametros', pipeline) as diagnostico, st.expander("🛠️ Otimização de Diâmetros"):
+        st.info("Escolhe um diâmetro comercial por trecho minimizando investimento em tubos + energia em valor presente, na vazão do ponto de operação.")
+        c1, c2, c3, c4, c5 = st.columns(5)
+        vida_util = c1.number_input("Vida Útil (anos)", 1, 50, 20); taxa_desconto = c2.number_input("Taxa de Desconto (% a.a.)", 0.0, 30.0, 8.0, 0.5)
+        velocidade_min = c3.number_input("Velocidade Mín. (m/s)", 0.0, 5.0, VELOCIDADE_MIN_PADRAO, 0.1); velocidade_max = c4.number_input("Velocidade Máx. (m/s)", 0.5, 10.0, VELOCIDADE_MAX_PADRAO, 0.1)
+        processos_otimizacao = c5.number_input("Processos", 1, os.cpu_count() or 1, 1, key="processos_otimizacao", help="Acima de 1, as subárvores do branch-and-bound são distribuídas em vários processos.")
+        if st.button("Otimizar Diâmetros", use_container_width=True):
+            with diagnostico.etapa('otimizacao_diametros'):
+                st.session_state.resultado_otimizacao = otimizar_diametros(rede, vazao_op, h_geometrica, fluido, eficiencia_op, rend_motor, horas_por_dia, tarifa_energia,
+                                                                           taxa_desconto=taxa_desconto / 100, vida_util_anos=vida_util, velocidade_min=velocidade_min, velocidade_max=velocidade_max, processos=processos_otimizacao)
+        resultado_otimizacao = st.session_state.get('resultado_otimizacao')
+        if resultado_otimizacao is not None and len(resultado_otimizacao['diametros']) == rede.num_trechos:
+            c1, c2, c3, c4 = st.columns(4); c1.metric("Custo Total (VP)", f"R$ {resultado_otimizacao['custo_total']:,.2f}", f"R$ {resultado_otimizacao['custo_total'] - resultado_otimizacao['custo_atual']:,.2f}", delta_color="inverse")
+            c2.metric("Investimento em Tubos", f"R$ {resultado_otimizacao['investimento']:,.2f}"); c3.metric("Energia (VP)", f"R$ {resultado_otimizacao['custo_energia_vp']:,.2f}"); c4.metric("Altura Manométrica", f"{resultado_otimizacao['altura_manometrica']:.2f} m")
+            if not resultado_otimizacao['viavel']: st.warning("Nenhuma combinação do catálogo respeita os limites de velocidade em todos os trechos; veja a coluna 'Dentro dos Limites'.")
+            if resultado_otimizacao['otimo_comprovado']: st.caption(f"Ótimo comprovado | {resultado_otimizacao['nos_avaliados']} nós avaliados em {resultado_otimizacao['tempo_s']:.2f} s")
+            else:
+                folga_otimizacao = resultado_otimizacao['custo_total'] - resultado_otimizacao['limite_inferior']
+                st.warning(f"Busca interrompida (limite de tempo ou de nós): esta é a melhor solução encontrada, sem garantia de ser a de menor custo. Diferença máxima para o ótimo: {folga_otimizacao / resultado_otimizacao['custo_total']:.2%} (R$ {folga_otimizacao:,.2f}).")
+                st.caption(f"{resultado_otimizacao['nos_avaliados']} nós avaliados em {resultado_otimizacao['tempo_s']:.2f} s")
+            st.dataframe(resultado_otimizacao['trechos'], use_container_width=True, hide_index=True)
+            if st.button("Aplicar Diâmetros à Rede", use_container_width=True):
+                rede_otimizada = aplicar_diametros(sistema, resultado_otimizacao['diametros'])
+                st.session_state.trechos_antes, st.session_state.ramais_paralelos, st.session_state.trechos_depois = rede_otimizada['antes'], rede_otimizada['paralelo'], rede_otimizada['depois']
+                st.session_state.resultado_otimizacao = None
+                # Os campos "Ø (mm)" guardam o valor anterior pela chave do widget: descarta para exibirem os novos diâmetros.
+                for chave in [c for c in st.session_state if str(c).startswith("diam_")]: del st.session_state[chave]
+                invalidar_rede(); st.rerun()  # dentro do fragmento, o padrão é reexecutar o app inteiro: a rede mudou
+
+@st.fragment
+def renderizar_periodo(pipeline, rede, func_curva_bomba, func_curva_eficiencia, vazao_op, params_equipamentos):
+    eficiencia_op, rend_motor, horas_por_dia, tarifa_energia, fluido = (params_equipamentos[c] for c in CHAVES_EQUIPAMENTOS)
+    with diagnostico_fragmento('periodo_estendido', pipeline) as diagnostico, st.expander("📅 Simulação de Período Estendido"):
+        st.info("CSV com uma linha por passo de tempo: 'h_geometrica' (m) e, opcionais, 'data_hora' ou 'duracao_h', 'tarifa_kwh', 'k_valvula' e 'ligada' (0/1). Sem 'tarifa_kwh', usa o custo da energia da barra lateral.")
+        arquivo_perfis = st.file_uploader("Perfis (CSV)", type="csv", key="perfis_periodo")
+        if st.button("Simular Período", use_container_width=True, disabled=arquivo_perfis is None):
+            with diagnostico.etapa('periodo_estendido'):
+                max_vazao_bomba = st.session_state.curva_altura_df['Vazão (m³/h)'].max()
+                blocos_periodo = list(simular_periodo_em_fluxo(rede, ler_perfis(arquivo_perfis, custo_kwh=tarifa_energia), func_curva_bomba, func_curva_eficiencia,
+                                                               fluido, rend_motor, vazao_maxima=max(max_vazao_bomba * 1.5, vazao_op * 1.5)))
+                st.session_state.resultado_periodo = (resumir_simulacao(blocos_periodo), pd.concat(blocos_periodo, ignore_index=True) if blocos_periodo else pd.DataFrame())
+        if st.session_state.get('resultado_periodo') is not None:
+            resumo_periodo, serie_periodo = st.session_state.resultado_periodo
+            c1, c2, c3, c4 = st.columns(4); c1.metric("Energia", f"{resumo_periodo['energia_kWh'] / 1000:,.1f} MWh"); c2.metric("Custo", f"R$ {resumo_periodo['custo_total']:,.2f}")
+            c3.metric("Horas Operando", f"{resumo_periodo['horas_operando']:,.0f} / {resumo_periodo['horas_total']:,.0f} h"); c4.metric("Horas Fora da Faixa de Eficiência", f"{resumo_periodo['horas_fora_faixa']:,.0f} h")
+            st.caption(f"Custo médio: R$ {resumo_periodo['custo_medio_kwh']:.3f}/kWh | Energia específica: {resumo_periodo['energia_especifica_kWh_m3']:.3f} kWh/m³ | Sem ponto de operação: {resumo_periodo['horas_sem_ponto']:,.0f} h | Não convergidas: {resumo_periodo['horas_nao_convergidas']:,.0f} h")
+            if len(serie_periodo): st.line_chart(serie_periodo.set_index('data_hora')[['vazao_m3h', 'potencia_kW']] if 'data_hora' in serie_periodo else serie_periodo[['vazao_m3h', 'potencia_kW']])
+            st.download_button("Baixar Resultados por Passo (CSV)", serie_periodo.to_csv(index=False).encode('utf-8'), "periodo_estendido.csv", "text/csv", use_container_width=True)
+
+@st.fragment
+def renderizar_estacao(pipeline, rede, func_curva_bomba, func_curva_eficiencia, vazao_op, h_geometrica, params_equipamentos):
+    eficiencia_op, rend_motor, horas_por_dia, tarifa_energia, fluido = (params_equipamentos[c] for c in CHAVES_EQUIPAMENTOS)
+    with diagnostico_fragmento('estacao_bombeamento', pipeline) as diagnostico, st.expander("🏭 Estação de Bombeamento (Inversor de Frequência)"):
+        st.info("Várias bombas em série ou paralelo, cada uma com inversor (leis de afinidade: H ∝ n², Q ∝ n). A Bomba 1 usa a curva da barra lateral; as demais podem ter curva própria.")
+        c1, c2, c3, c4 = st.columns(4)
+        st.session_state.estacao_arranjo = c1.selectbox("Arranjo", list(ARRANJOS.keys()), index=list(ARRANJOS.keys()).index(st.session_state.estacao_arranjo), format_func=ARRANJOS.get)
+        st.session_state.estacao_num_bombas = c2.number_input("Número de Bombas", 1, 6, st.session_state.estacao_num_bombas)
+        vazao_alvo = c3.number_input("Vazão Alvo (m³/h)", 0.1, value=float(round(vazao_op, 1))); rotacao_min = c4.number_input("Rotação Mínima (%)", 10, 100, int(ROTACAO_MIN_PADRAO * 100), 5)
+        for i in range(2, st.session_state.estacao_num_bombas + 1):
+            if st.checkbox(f"Curva própria para a Bomba {i}", value=i in st.session_state.estacao_curvas, key=f"curva_propria_{i}"):
+                curvas = st.session_state.estacao_curvas.setdefault(i, {'curva_altura': st.session_state.curva_altura_df.copy(), 'curva_eficiencia': st.session_state.curva_eficiencia_df.copy()})
+                c1, c2 = st.columns(2)
+                curvas['curva_altura'] = c1.data_editor(curvas['curva_altura'], num_rows="dynamic", key=f"editor_altura_{i}"); curvas['curva_eficiencia'] = c2.data_editor(curvas['curva_eficiencia'], num_rows="dynamic", key=f"editor_eficiencia_{i}")
+            else: st.session_state.estacao_curvas.pop(i, None)
+        if st.button("Analisar Estação", use_container_width=True):
+            with diagnostico.etapa('estacao_bombeamento'):
+                bombas = [CurvaBomba(func_curva_bomba, func_curva_eficiencia, "B1")]
+                for i in range(2, st.session_state.estacao_num_bombas + 1):
+                    curvas = st.session_state.estacao_curvas.get(i)
+                    if curvas is None: bombas.append(CurvaBomba(func_curva_bomba, func_curva_eficiencia, f"B{i}")); continue
+                    altura_i = pipeline.memoizar('curva_altura', {'pontos': curvas['curva_altura']}, lambda: criar_funcao_curva(curvas['curva_altura'], "Vazão (m³/h)", "Altura (m)"))
+                    eficiencia_i = pipeline.memoizar('curva_eficiencia', {'pontos': curvas['curva_eficiencia']}, lambda: criar_funcao_curva(curvas['curva_eficiencia'], "Vazão (m³/h)", "Eficiência (%)"))
+                    if altura_i is None or eficiencia_i is None: raise ValueError(f"Insira pelo menos 3 pontos nas curvas da Bomba {i}.")
+                    bombas.append(CurvaBomba(altura_i, eficiencia_i, f"B{i}"))
+                estacao = EstacaoBombeamento(rede, bombas, st.session_state.estacao_arranjo, h_geometrica, fluido, rend_motor)
+                tabela_estacao, melhor_estacao = estacao.escalonar(vazao_alvo, rotacao_min / 100)
+                rotacoes_varredura = np.linspace(rotacao_min / 100, 1.0, 51)
+                varredura_estacao = estacao.varrer(rotacoes_varredura, vazao_alvo)
+                todas = np.ones(len(bombas))
+                curvas_estacao = {f"{r:.0%}": estacao.curva_combinada(todas * r) for r in (1.0, 0.9, 0.8, 0.7) if r >= rotacao_min / 100}
+                curva_sistema_estacao = (estacao.curva_sistema.vazoes, estacao.curva_sistema.alturas)
+                st.session_state.resultado_estacao = (tabela_estacao, melhor_estacao, varredura_estacao, curvas_estacao, curva_sistema_estacao, vazao_alvo)
+        if st.session_state.get('resultado_estacao') is not None:
+            tabela_estacao, melhor_estacao, varredura_estacao, curvas_estacao, curva_sistema_estacao, vazao_alvo_estacao = st.session_state.resultado_estacao
+            if melhor_estacao is None: st.warning(f"Nenhuma combinação de bombas entrega {vazao_alvo_estacao:.1f} m³/h na rotação nominal.")
+            else:
+                c1, c2, c3, c4 = st.columns(4); c1.metric("Melhor Configuração", melhor_estacao['bombas']); c2.metric("Rotação", f"{melhor_estacao['rotacoes'].max():.1%}")
+                c3.metric("Potência Elétrica", f"{melhor_estacao['potencia_kW']:.2f} kW"); c4.metric("Ponto de Operação", f"{melhor_estacao['vazao']:.1f} m³/h @ {melhor_estacao['altura']:.1f} m")
+                ligadas = melhor_estacao['rotacoes'] > 0
+                st.dataframe(pd.DataFrame({'Bomba': [f"B{i + 1}" for i in np.flatnonzero(ligadas)], 'Rotação (%)': melhor_estacao['rotacoes'][ligadas] * 100, 'Vazão (m³/h)': melhor_estacao['vazoes_bombas'][ligadas],
+                                           'Altura (m)': melhor_estacao['alturas_bombas'][ligadas], 'Eficiência (%)': melhor_estacao['eficiencias_bombas'][ligadas], 'Potência (kW)': melhor_estacao['potencias_bombas'][ligadas]}), use_container_width=True, hide_index=True)
+            plt = carregar_pyplot(); fig, ax = plt.subplots(figsize=(10, 5))
+            ax.plot(*curva_sistema_estacao, label='Curva do Sistema', color='seagreen', lw=2)
+            for rotulo, (vazoes_curva, alturas_curva) in curvas_estacao.items(): ax.plot(vazoes_curva, alturas_curva, label=f'Estação (todas as bombas, {rotulo})', lw=1.5)
+            if melhor_estacao is not None: ax.scatter(melhor_estacao['vazao'], melhor_estacao['altura'], color='red', s=100, zorder=5, label=f"Melhor: {melhor_estacao['bombas']}")
+            ax.set_xlabel("Vazão (m³/h)"); ax.set_ylabel("Altura Manométrica (m)"); ax.set_title("Curva Combinada da Estação vs. Curva do Sistema"); ax.legend(); ax.grid(True); ax.set_xlim(left=0); ax.set_ylim(bottom=0)
+            st.pyplot(fig); plt.close(fig)
+            st.dataframe(tabela_estacao, use_container_width=True, hide_index=True)
+            st.caption("Potência elétrica por rotação e combinação de bombas (pontos fora da curva útil omitidos):")
+            st.line_chart(varredura_estacao[varredura_estacao['viavel']].pivot_table(index='rotacao_percent', columns='bombas', values='potencia_kW'))
+
+@st.fragment
+def renderizar_catalogo(pipeline, rede, vazao_op, h_geometrica, params_equipamentos):
+    eficiencia_op, rend_motor, horas_por_dia, tarifa_energia, fluido = (params_equipamentos[c] for c in CHAVES_EQUIPAMENTOS)
+    with diagnostico_fragmento('catalogo_bombas', pipeline) as diagnostico, st.expander("📚 Catálogo de Bombas"):
+        st.info(f"{count_pump_models()} modelos no catálogo. Importe um CSV com um ponto de curva por linha ('fabricante', 'modelo', 'vazao_m3h', 'altura_m', 'eficiencia_percent'; opcionais 'rotacao_rpm' e 'diametro_rotor_mm'): as curvas são ajustadas uma vez, na importação.")
+        c1, c2 = st.columns(2)
+        arquivo_catalogo = c1.file_uploader("Catálogo (CSV)", type="csv", key="arquivo_catalogo")
+        if c1.button("Importar Catálogo", use_container_width=True, disabled=arquivo_catalogo is None):
+            importados, rejeitados = importar_catalogo_csv(arquivo_catalogo)
+            c1.success(f"{importados} modelos importados.")
+            if rejeitados: c1.warning(f"{len(rejeitados)} modelos rejeitados:\n" + "\n".join(f"- {mensagem}" for mensagem in rejeitados))
+        fabricante_atual = c2.text_input("Fabricante", key="catalogo_fabricante"); modelo_atual = c2.text_input("Modelo", key="catalogo_modelo")
+        if c2.button("Adicionar Bomba Atual ao Catálogo", use_container_width=True, disabled=not (fabricante_atual and modelo_atual)):
+            df_altura, df_eficiencia = st.session_state.curva_altura_df, st.session_state.curva_eficiencia_df
+            save_pump_models([ajustar_modelo(fabricante_atual, modelo_atual, pd.to_numeric(df_altura["Vazão (m³/h)"], errors='coerce'), pd.to_numeric(df_altura["Altura (m)"], errors='coerce'),
+                                             pd.to_numeric(df_eficiencia["Eficiência (%)"], errors='coerce'), vazoes_eficiencia=pd.to_numeric(df_eficiencia["Vazão (m³/h)"], errors='coerce'))])
+            c2.success(f"'{fabricante_atual} {modelo_atual}' salvo no catálogo.")
+        c1, c2, c3, c4 = st.columns(4)
+        vazao_min_catalogo = c1.number_input("Vazão Mínima (m³/h)", 0.0, value=float(round(vazao_op, 1)), key="catalogo_vazao_min"); vazao_max_catalogo = c2.number_input("Vazão Máxima (m³/h, 0 = sem limite)", 0.0, value=0.0, key="catalogo_vazao_max")
+        ordenar_catalogo = c3.selectbox("Ordenar por", list(ORDENACOES.keys()), format_func=ORDENACOES.get, key="catalogo_ordenacao"); limite_catalogo = c4.number_input("Modelos na Lista", 1, 200, LIMITE_LISTA_PADRAO, key="catalogo_limite")
+        if st.button("Buscar no Catálogo", use_container_width=True):
+            with diagnostico.etapa('catalogo_bombas'):
+                st.session_state.resultado_catalogo = triar_bombas(rede, h_geometrica, fluido, rend_motor, horas_por_dia, tarifa_energia,
+                                                                   vazao_min=vazao_min_catalogo, vazao_max=vazao_max_catalogo or None, ordenar_por=ordenar_catalogo, limite=limite_catalogo)
+        if st.session_state.get('resultado_catalogo') is not None:
+            lista_catalogo, estatisticas_catalogo = st.session_state.resultado_catalogo
+            st.caption(f"{estatisticas_catalogo['catalogo']} modelos | {estatisticas_catalogo['candidatos']} após a poda pelo índice | {estatisticas_catalogo['com_ponto']} com ponto de operação na faixa")
+            if len(lista_catalogo):
+                st.dataframe(lista_catalogo.drop(columns='id'), use_container_width=True, hide_index=True)
+                escolhido = st.selectbox("Modelo", lista_catalogo.index, format_func=lambda i: f"{lista_catalogo.at[i, 'fabricante']} {lista_catalogo.at[i, 'modelo']}", key="catalogo_escolhido")
+                if st.button("Usar Este Modelo como Bomba", use_container_width=True):
+                    st.session_state.curva_altura_df, st.session_state.curva_eficiencia_df = pontos_do_modelo(load_pump_model(lista_catalogo.at[escolhido, 'id']))
+                    # Os editores guardam as edições pela chave do widget: descarta para exibirem as curvas do modelo.
+                    for chave in ("editor_altura", "editor_eficiencia"): st.session_state.pop(chave, None)
+                    st.session_state.resultado_catalogo = None; st.rerun()
+
+@st.fragment
+def renderizar_incerteza(pipeline, rede, func_curva_bomba, func_curva_eficiencia, h_geometrica, params_equipamentos):
+    eficiencia_op, rend_motor, horas_por_dia, tarifa_energia, fluido = (params_equipamentos[c] for c in CHAVES_EQUIPAMENTOS)
+    with diagnostico_fragmento('incerteza', pipeline) as diagnostico, st.expander("🎲 Análise de Incerteza (Monte Carlo)"):
+        st.info("Amostra rugosidades e fatores K (trecho a trecho), altura geométrica e degradação da bomba das distribuições abaixo e resolve o ponto de operação de cada amostra. Fatores multiplicam os valores nominais.")
+        incertezas = {}
+        for chave, rotulo in ROTULOS_INCERTEZAS.items():
+            padrao = INCERTEZAS_PADRAO[chave] or ('fixo', (h_geometrica,))
+            c1, c2, c3, c4 = st.columns([2, 1, 1, 1])
+            tipo = c1.selectbox(rotulo, list(DISTRIBUICOES.keys()), index=list(DISTRIBUICOES.keys()).index(padrao[0]), format_func=DISTRIBUICOES.get, key=f"incerteza_tipo_{chave}")
+            parametros = [coluna.number_input(f"Parâmetro {j + 1}", value=float(padrao[1][j]) if j < len(padrao[1]) else 0.0, format="%.3f", key=f"incerteza_{chave}_{j}")
+                          for j, coluna in enumerate((c2, c3, c4)[:PARAMETROS_DISTRIBUICAO[tipo]])]
+            incertezas[chave] = (tipo, tuple(parametros))
+        c1, c2, c3 = st.columns(3)
+        amostras_incerteza = c1.number_input("Amostras", 1000, 1_000_000, AMOSTRAS_PADRAO, 1000); semente_incerteza = c2.number_input("Semente", 0, value=0)
+        processos_incerteza = c3.number_input("Processos", 1, os.cpu_count() or 1, 1, key="processos_incerteza", help="Acima de 1, os blocos de amostras são resolvidos em vários processos.")
+        if st.button("Executar Monte Carlo", use_container_width=True):
+            with diagnostico.etapa('incerteza'):
+                progresso = st.progress(0.0)
+                for resumo_incerteza in analisar_incerteza_em_fluxo(rede, func_curva_bomba, func_curva_eficiencia, h_geometrica, fluido, rend_motor,
+                                                                   horas_por_dia, tarifa_energia, incertezas=incertezas, amostras=amostras_incerteza, processos=processos_incerteza, semente=semente_incerteza):
+                    progresso.progress(resumo_incerteza['amostras'] / amostras_incerteza)
+                st.session_state.resultado_incerteza = resumo_incerteza
+        if st.session_state.get('resultado_incerteza') is not None:
+            resumo_incerteza = st.session_state.resultado_incerteza
+            estatisticas_vazao, estatisticas_custo = resumo_incerteza['estatisticas']['vazao_m3h'], resumo_incerteza['estatisticas']['custo_anual']
+            c1, c2, c3 = st.columns(3)
+            for coluna, p in zip((c1, c2, c3), (10, 50, 90)):
+                coluna.metric(f"Vazão P{p}", f"{estatisticas_vazao.percentil(p):.2f} m³/h"); coluna.metric(f"Custo Anual P{p}", f"R$ {estatisticas_custo.percentil(p):,.2f}")
+            st.caption(f"{resumo_incerteza['validas']} de {resumo_incerteza['amostras']} amostras com ponto de operação | sem ponto: {resumo_incerteza['sem_ponto']} | não convergidas: {resumo_incerteza['nao_convergidas']}")
+            st.dataframe(tabela_percentis(resumo_incerteza['estatisticas']), use_container_width=True, hide_index=True)
+            plt = carregar_pyplot(); fig, eixos = plt.subplots(1, 2, figsize=(12, 4))
+            for ax, variavel in zip(eixos, ('vazao_m3h', 'custo_anual')):
+                bordas, contagens = resumo_incerteza['estatisticas'][variavel].histograma()
+                ax.bar(bordas[:-1], contagens, width=np.diff(bordas), align='edge', color='royalblue', alpha=0.7)
+                for p, estilo in zip((10, 50, 90), (':', '-', ':')): ax.axvline(resumo_incerteza['estatisticas'][variavel].percentil(p), color='red', ls=estilo, label=f"P{p}")
+                ax.set_xlabel(VARIAVEIS[variavel]); ax.set_ylabel("Amostras"); ax.legend()
+            st.pyplot(fig); plt.close(fig)
+
+def invalidar_rede():
+    # A rede compilada só é reconstruída quando algum trecho é adicionado, removido ou editado.
+    st.session_state.rede_compilada = None
 
 def render_trecho_ui(trecho, prefixo, lista_trechos):
     st.markdown(f"**Trecho**"); c1, c2, c3 = st.columns(3)
-    trecho['comprimento'] = c1.number_input("L (m)", min_value=0.1, value=trecho['comprimento'], key=f"comp_{prefixo}_{trecho['id']}")
-    trecho['diametro'] = c2.number_input("Ø (mm)", min_value=1.0, value=trecho['diametro'], key=f"diam_{prefixo}_{trecho['id']}")
-    trecho['material'] = c3.selectbox("Material", options=list(MATERIAIS.keys()), index=list(MATERIAIS.keys()).index(trecho.get('material', 'Aço Carbono (novo)')), key=f"mat_{prefixo}_{trecho['id']}")
+    comprimento = c1.number_input("L (m)", min_value=0.1, value=trecho['comprimento'], key=f"comp_{prefixo}_{trecho['id']}")
+    diametro = c2.number_input("Ø (mm)", min_value=1.0, value=trecho['diametro'], key=f"diam_{prefixo}_{trecho['id']}")
+    material = c3.selectbox("Material", options=list(MATERIAIS.keys()), index=list(MATERIAIS.keys()).index(trecho.get('material', 'Aço Carbono (novo)')), key=f"mat_{prefixo}_{trecho['id']}")
+    if (comprimento, diametro, material) != (trecho['comprimento'], trecho['diametro'], trecho.get('material')): invalidar_rede()
+    trecho['comprimento'], trecho['diametro'], trecho['material'] = comprimento, diametro, material
     st.markdown("**Acessórios (Fittings)**")
     for idx, acessorio in enumerate(trecho['acessorios']):
         col1, col2 = st.columns([0.8, 0.2])
         col1.info(f"{acessorio['quantidade']}x {acessorio['nome']} (K = {acessorio['k']})")
         if col2.button("X", key=f"rem_acc_{trecho['id']}_{idx}", help="Remover acessório"):
-            trecho['acessorios'].pop(idx); st.rerun()
+            trecho['acessorios'].pop(idx); invalidar_rede(); st.rerun()
     c1, c2 = st.columns([3, 1]); c1.selectbox("Selecionar Acessório", options=list(K_FACTORS.keys()), key=f"selectbox_acessorio_{trecho['id']}"); c2.number_input("Qtd", min_value=1, value=1, step=1, key=f"quantidade_acessorio_{trecho['id']}")
     st.button("Adicionar Acessório", on_click=adicionar_acessorio, args=(trecho['id'], lista_trechos), key=f"btn_add_acessorio_{trecho['id']}", use_container_width=True)
 
 def adicionar_item(tipo_lista):
     novo_id = time.time()
     st.session_state[tipo_lista].append({"id": novo_id, "comprimento": 10.0, "diametro": 100.0, "material": "Aço Carbono (novo)", "acessorios": []})
+    invalidar_rede()
 def remover_ultimo_item(tipo_lista):
-    if len(st.session_state[tipo_lista]) > 0: st.session_state[tipo_lista].pop()
+    if len(st.session_state[tipo_lista]) > 0: st.session_state[tipo_lista].pop(); invalidar_rede()
 def adicionar_ramal_paralelo():
     novo_nome_ramal = f"Ramal {len(st.session_state.ramais_paralelos) + 1}"
     novo_id = time.time()
     st.session_state.ramais_paralelos[novo_nome_ramal] = [{"id": novo_id, "comprimento": 50.0, "diametro": 80.0, "material": "Aço Carbono (novo)", "acessorios": []}]
+    invalidar_rede()
 def remover_ultimo_ramal():
-    if len(st.session_state.ramais_paralelos) > 1: st.session_state.ramais_paralelos.popitem()
+    if len(st.session_state.ramais_paralelos) > 1: st.session_state.ramais_paralelos.popitem(); invalidar_rede()
 def adicionar_acessorio(id_trecho, lista_trechos):
     nome_acessorio = st.session_state[f"selectbox_acessorio_{id_trecho}"]
     quantidade = st.session_state[f"quantidade_acessorio_{id_trecho}"]
     for trecho in lista_trechos:
         if trecho["id"] == id_trecho:
             trecho["acessorios"].append({"nome": nome_acessorio, "k": K_FACTORS[nome_acessorio], "quantidade": int(quantidade)})
+            invalidar_rede()
             break
 
 # --- INICIALIZAÇÃO E AUTENTICAÇÃO ---
-setup_database()
-with open('config.yaml') as file:
-    config = yaml.load(file, Loader=SafeLoader)
+config = copy.deepcopy(inicializar_aplicacao())  # o autenticador altera o dicionário; o recurso em cache fica intacto
 authenticator = stauth.Authenticate(
     config['credentials'],
     config['cookie']['name'],
@@ -217,6 +435,11 @@ if st.session_state.get("authentication_status"):
         st.session_state.curva_eficiencia_df = pd.DataFrame([{"Vazão (m³/h)": 0, "Eficiência (%)": 0}, {"Vazão (m³/h)": 50, "Eficiência (%)": 70}, {"Vazão (m³/h)": 100, "Eficiência (%)": 65}])
     if 'fluido_selecionado' not in st.session_state: st.session_state.fluido_selecionado = "Água a 20°C"
     if 'h_geometrica' not in st.session_state: st.session_state.h_geometrica = 15.0
+    if 'modo_atrito' not in st.session_state: st.session_state.modo_atrito = MODO_PADRAO
+    if 'rede_compilada' not in st.session_state: st.session_state.rede_compilada = None
+    if 'estacao_arranjo' not in st.session_state: st.session_state.estacao_arranjo = 'paralelo'
+    if 'estacao_num_bombas' not in st.session_state: st.session_state.estacao_num_bombas = 1
+    if 'estacao_curvas' not in st.session_state: st.session_state.estacao_curvas = {}  # bomba (2, 3, ...) -> curvas próprias; sem entrada usa a da Bomba 1
 
     # --- SIDEBAR ---
     with st.sidebar:
@@ -264,19 +487,19 @@ if st.session_state.get("authentication_status"):
             key="selected_scenario",
             placeholder="Nenhum cenário encontrado"
         )
+        # Resumo lido das colunas de metadados, sem carregar o cenário
+        if st.session_state.get("selected_project") and st.session_state.get("selected_scenario"):
+            resumo = next((r for r in get_scenario_summaries(username, st.session_state.selected_project) if r['scenario_name'] == st.session_state.selected_scenario), None)
+            if resumo:
+                texto_op = f" | Op.: {resumo['op_flow_m3h']:.1f} m³/h @ {resumo['op_head_m']:.1f} m" if resumo['op_flow_m3h'] is not None else ""
+                st.caption(f"Rev. {resumo['revision']} | {resumo['segment_count']} trechos, {resumo['total_length_m']:.1f} m | {resumo['fluid']}{texto_op}")
         
         # --- Botões de Ação ---
         col1, col2 = st.columns(2)
         if col1.button("Carregar Cenário", use_container_width=True, disabled=not st.session_state.get("selected_scenario")):
             data = load_scenario(username, st.session_state.selected_project, st.session_state.selected_scenario)
             if data:
-                st.session_state.h_geometrica = data.get('h_geometrica', 15.0)
-                st.session_state.fluido_selecionado = data.get('fluido_selecionado', "Água a 20°C")
-                st.session_state.curva_altura_df = pd.DataFrame(data['curva_altura'])
-                st.session_state.curva_eficiencia_df = pd.DataFrame(data['curva_eficiencia'])
-                st.session_state.trechos_antes = data['trechos_antes']
-                st.session_state.trechos_depois = data['trechos_depois']
-                st.session_state.ramais_paralelos = data['ramais_paralelos']
+                aplicar_cenario(data)
                 st.success(f"Cenário '{st.session_state.selected_scenario}' carregado.")
                 st.rerun()
 
@@ -288,24 +511,37 @@ if st.session_state.get("authentication_status"):
             st.session_state.scenario_to_select = None
             st.rerun()
 
+        if st.session_state.get("selected_scenario"):
+            with st.expander("Histórico de Versões"):
+                revisoes = get_scenario_revisions(username, st.session_state.selected_project, st.session_state.selected_scenario)
+                revisao = st.selectbox("Versão", [r for r, _ in revisoes], format_func=lambda r: f"Rev. {r} — {str(dict(revisoes)[r])[:16]}", key="revisao_selecionada")
+                if st.button("Restaurar Versão", use_container_width=True, disabled=revisao is None):
+                    aplicar_cenario(load_scenario_revision(username, st.session_state.selected_project, st.session_state.selected_scenario, revisao))
+                    st.success(f"Versão {revisao} restaurada (salve para torná-la a atual).")
+                    st.rerun()
+
         # --- Lógica para Salvar ---
         st.divider()
         st.subheader("Salvar Cenário")
         project_name_input = st.text_input("Nome do Projeto", value=st.session_state.get("selected_project", ""))
         scenario_name_input = st.text_input("Nome do Cenário", value=st.session_state.get("selected_scenario", ""))
 
+        st.checkbox("Guardar resultados calculados no banco", value=True, key="persistir_resultados", help="Cenários carregados reaproveitam os resultados já calculados.")
         if st.button("Salvar", use_container_width=True):
             if project_name_input and scenario_name_input:
                 scenario_data = {
                     'h_geometrica': st.session_state.h_geometrica,
                     'fluido_selecionado': st.session_state.fluido_selecionado,
+                    'modo_atrito': st.session_state.modo_atrito,
                     'curva_altura': st.session_state.curva_altura_df.to_dict('records'),
                     'curva_eficiencia': st.session_state.curva_eficiencia_df.to_dict('records'),
                     'trechos_antes': st.session_state.trechos_antes,
                     'trechos_depois': st.session_state.trechos_depois,
-                    'ramais_paralelos': st.session_state.ramais_paralelos
+                    'ramais_paralelos': st.session_state.ramais_paralelos,
+                    'estacao': {'arranjo': st.session_state.estacao_arranjo, 'num_bombas': st.session_state.estacao_num_bombas,
+                                'curvas': {str(i): {k: df.to_dict('records') for k, df in c.items()} for i, c in st.session_state.estacao_curvas.items()}}
                 }
-                save_scenario(username, project_name_input, scenario_name_input, scenario_data)
+                save_scenario(username, project_name_input, scenario_name_input, scenario_data, st.session_state.get('ultimo_ponto_operacao'))
                 st.success(f"Cenário '{scenario_name_input}' salvo.")
                 
                 # Guarda os nomes em variáveis temporárias para a seleção no próximo run
@@ -322,6 +558,8 @@ if st.session_state.get("authentication_status"):
         # --- Seção de Parâmetros da Simulação ---
         st.header("⚙️ Parâmetros da Simulação")
         st.session_state.fluido_selecionado = st.selectbox("Selecione o Fluido", list(FLUIDOS.keys()), index=list(FLUIDOS.keys()).index(st.session_state.fluido_selecionado))
+        modo_atrito = st.selectbox("Fator de Atrito", list(MODOS_ATRITO.keys()), index=list(MODOS_ATRITO.keys()).index(st.session_state.modo_atrito), format_func=MODOS_ATRITO.get, help="Swamee-Jain é o cálculo original; Colebrook é exato; Churchill é contínuo na transição laminar/turbulenta; a tabela aproxima Colebrook (erro < 0,05%).")
+        if modo_atrito != st.session_state.modo_atrito: st.session_state.modo_atrito = modo_atrito; invalidar_rede()
         st.session_state.h_geometrica = st.number_input("Altura Geométrica (m)", 0.0, value=st.session_state.h_geometrica)
         st.divider()
         with st.expander("📈 Curva da Bomba", expanded=True):
@@ -344,14 +582,22 @@ if st.session_state.get("authentication_status"):
                 with st.container(border=True): render_trecho_ui(trecho, f"depois_{i}", st.session_state.trechos_depois)
             c1, c2 = st.columns(2); c1.button("Adicionar Trecho (Depois)", on_click=adicionar_item, args=("trechos_depois",), use_container_width=True); c2.button("Remover Trecho (Depois)", on_click=remover_ultimo_item, args=("trechos_depois",), use_container_width=True)
         st.divider(); st.header("🔌 Equipamentos e Custo"); rend_motor = st.slider("Eficiência do Motor (%)", 1, 100, 90); horas_por_dia = st.number_input("Horas por Dia", 1.0, 24.0, 8.0, 0.5); tarifa_energia = st.number_input("Custo da Energia (R$/kWh)", 0.10, 5.00, 0.75, 0.01, format="%.2f")
+        st.divider(); st.checkbox("Mostrar painel de diagnóstico", key="mostrar_diagnostico", help="Tempos por etapa, iterações e resíduos dos solvers. Os mesmos dados vão para o log JSON do servidor.")
 
     # --- CORPO PRINCIPAL DA APLICAÇÃO ---
     st.title("💧 Análise de Redes de Bombeamento com Curva de Bomba")
     
+    # Tempos por etapa e estatísticas dos solvers deste rerun (painel opcional e log JSON).
+    diagnostico = Diagnostico(usuario=username, fluido=st.session_state.fluido_selecionado, modo_atrito=st.session_state.modo_atrito)
+    cache = obter_cache_usuario(username)
+    acertos_cache, falhas_cache = cache.acertos, cache.falhas
+    # Etapas com dependências declaradas: cada uma só recalcula quando suas entradas ou as etapas acima dela mudam.
+    pipeline = PipelineResultados(cache, st.session_state.setdefault('etapas_resultados', {}), persistir=st.session_state.get("persistir_resultados", True))
     try:
-        # ... (Restante do seu código principal, sem alterações) ...
-        func_curva_bomba = criar_funcao_curva(st.session_state.curva_altura_df, "Vazão (m³/h)", "Altura (m)")
-        func_curva_eficiencia = criar_funcao_curva(st.session_state.curva_eficiencia_df, "Vazão (m³/h)", "Eficiência (%)")
+        diagnostico.ativar()
+        with diagnostico.etapa('ajuste_curvas'):
+            func_curva_bomba = pipeline.etapa('curva_altura', lambda: criar_funcao_curva(st.session_state.curva_altura_df, "Vazão (m³/h)", "Altura (m)"), entradas={'pontos': st.session_state.curva_altura_df})
+            func_curva_eficiencia = pipeline.etapa('curva_eficiencia', lambda: criar_funcao_curva(st.session_state.curva_eficiencia_df, "Vazão (m³/h)", "Eficiência (%)"), entradas={'pontos': st.session_state.curva_eficiencia_df})
         if func_curva_bomba is None or func_curva_eficiencia is None:
             st.warning("Forneça pontos de dados suficientes (pelo menos 3) para as curvas da bomba.")
             st.stop()
@@ -368,7 +614,14 @@ if st.session_state.get("authentication_status"):
         if is_rede_vazia:
             st.warning("Adicione pelo menos um trecho à rede para realizar o cálculo.")
             st.stop()
-        vazao_op, altura_op, func_curva_sistema = encontrar_ponto_operacao(sistema_atual, st.session_state.h_geometrica, st.session_state.fluido_selecionado, func_curva_bomba)
+        with diagnostico.etapa('compilacao_rede'):
+            if st.session_state.rede_compilada is None: st.session_state.rede_compilada = compilar_rede(sistema_atual, st.session_state.modo_atrito)
+        rede_atual = st.session_state.rede_compilada
+        diagnostico.contexto.update(trechos=rede_atual.num_trechos, ramais=rede_atual.num_ramais)
+        entradas_rede = {'rede': sistema_atual, 'fluido': st.session_state.fluido_selecionado, 'h_geo': st.session_state.h_geometrica, 'atrito': st.session_state.modo_atrito}
+        with diagnostico.etapa('ponto_operacao'):
+            vazao_op, altura_op = pipeline.etapa('ponto_operacao', lambda: encontrar_ponto_operacao(sistema_atual, st.session_state.h_geometrica, st.session_state.fluido_selecionado, func_curva_bomba, rede=rede_atual)[:2], entradas=entradas_rede, depende=('curva_altura',))
+        st.session_state.ultimo_ponto_operacao = (float(vazao_op), float(altura_op)) if vazao_op is not None and altura_op is not None else None
         if vazao_op is not None and altura_op is not None:
             eficiencia_op = func_curva_eficiencia(vazao_op)
             if eficiencia_op > 100: eficiencia_op = 100
@@ -377,40 +630,29 @@ if st.session_state.get("authentication_status"):
             st.header("📊 Resultados no Ponto de Operação")
             c1,c2,c3,c4 = st.columns(4); c1.metric("Vazão de Operação", f"{vazao_op:.2f} m³/h"); c2.metric("Altura de Operação", f"{altura_op:.2f} m"); c3.metric("Eficiência da Bomba", f"{eficiencia_op:.1f} %"); c4.metric("Custo Anual", f"R$ {resultados_energia['custo_anual']:.2f}")
             st.divider()
-            st.header("🗺️ Diagrama da Rede")
-            _, distribuicao_vazao_op = calcular_perdas_paralelo(sistema_atual['paralelo'], vazao_op, st.session_state.fluido_selecionado)
-            diagrama = gerar_diagrama_rede(sistema_atual, vazao_op, distribuicao_vazao_op if len(sistema_atual['paralelo']) >= 2 else {}, st.session_state.fluido_selecionado)
-            st.graphviz_chart(diagrama)
+            renderizar_diagrama(pipeline, sistema_atual, rede_atual, vazao_op, st.session_state.h_geometrica, st.session_state.fluido_selecionado)
             st.divider()
-            st.header("📈 Gráfico de Curvas: Bomba vs. Sistema")
-            max_vazao_curva = st.session_state.curva_altura_df['Vazão (m³/h)'].max()
-            max_plot_vazao = max(vazao_op * 1.2, max_vazao_curva * 1.2) 
-            vazao_range = np.linspace(0, max_plot_vazao, 100)
-            altura_bomba = func_curva_bomba(vazao_range)
-            altura_sistema = [func_curva_sistema(q) if func_curva_sistema(q) < 1e10 else np.nan for q in vazao_range]
-            fig, ax = plt.subplots(figsize=(10, 6))
-            ax.plot(vazao_range, altura_bomba, label='Curva da Bomba', color='royalblue', lw=2)
-            ax.plot(vazao_range, altura_sistema, label='Curva do Sistema', color='seagreen', lw=2)
-            ax.scatter(vazao_op, altura_op, color='red', s=100, zorder=5, label=f'Ponto de Operação ({vazao_op:.1f} m³/h, {altura_op:.1f} m)')
-            ax.set_xlabel("Vazão (m³/h)"); ax.set_ylabel("Altura Manométrica (m)"); ax.set_title("Curva da Bomba vs. Curva do Sistema"); ax.legend(); ax.grid(True)
-            ax.set_xlim(left=0, right=max_plot_vazao)
-            max_altura_relevante = max(altura_op, np.nanmax(altura_sistema) if any(~np.isnan(altura_sistema)) else altura_op)
-            y_max_ajustado = max_altura_relevante * 1.15
-            y_min_ajustado = st.session_state.h_geometrica * 0.9
-            ax.set_ylim(bottom=y_min_ajustado, top=y_max_ajustado)
-            st.pyplot(fig)
+            renderizar_grafico_curvas(pipeline, rede_atual, func_curva_bomba, st.session_state.curva_altura_df['Vazão (m³/h)'].max(), vazao_op, altura_op, st.session_state.h_geometrica, st.session_state.fluido_selecionado)
             st.divider()
-            st.header("📈 Análise de Sensibilidade de Custo por Diâmetro")
-            escala_range = st.slider("Fator de Escala para Diâmetros (%)", 50, 200, (80, 120), key="sensibilidade_slider")
-            params_equipamentos_sens = {'eficiencia_bomba_percent': eficiencia_op, 'eficiencia_motor_percent': rend_motor, 'horas_dia': horas_por_dia, 'custo_kwh': tarifa_energia, 'fluido_selecionado': st.session_state.fluido_selecionado}
-            params_fixos_sens = {'vazao_op': vazao_op, 'h_geo': st.session_state.h_geometrica, 'fluido': st.session_state.fluido_selecionado, 'equipamentos': params_equipamentos_sens}
-            chart_data_sensibilidade = gerar_grafico_sensibilidade_diametro(sistema_atual, escala_range, **params_fixos_sens)
-            st.line_chart(chart_data_sensibilidade.set_index('Fator de Escala nos Diâmetros (%)'))
+            params_equipamentos = {'eficiencia_bomba_percent': eficiencia_op, 'eficiencia_motor_percent': rend_motor, 'horas_dia': horas_por_dia, 'custo_kwh': tarifa_energia, 'fluido_selecionado': st.session_state.fluido_selecionado}
+            renderizar_sensibilidade(pipeline, sistema_atual, rede_atual, vazao_op, st.session_state.h_geometrica, params_equipamentos)
+            renderizar_varredura(pipeline, rede_atual, vazao_op, st.session_state.h_geometrica, params_equipamentos)
+            renderizar_otimizacao(pipeline, sistema_atual, rede_atual, vazao_op, st.session_state.h_geometrica, params_equipamentos)
+            renderizar_periodo(pipeline, rede_atual, func_curva_bomba, func_curva_eficiencia, vazao_op, params_equipamentos)
+            renderizar_estacao(pipeline, rede_atual, func_curva_bomba, func_curva_eficiencia, vazao_op, st.session_state.h_geometrica, params_equipamentos)
+            renderizar_catalogo(pipeline, rede_atual, vazao_op, st.session_state.h_geometrica, params_equipamentos)
+            renderizar_incerteza(pipeline, rede_atual, func_curva_bomba, func_curva_eficiencia, st.session_state.h_geometrica, params_equipamentos)
         else:
             st.error("Não foi possível encontrar um ponto de operação. Verifique os parâmetros.")
 
     except Exception as e:
+        diagnostico.registrar_erro(e)
         st.error(f"Ocorreu um erro inesperado durante a execução. Detalhe: {str(e)}")
+    finally:
+        diagnostico.desativar()
+        diagnostico.contexto.update(cache_acertos=cache.acertos - acertos_cache, cache_falhas=cache.falhas - falhas_cache, etapas_recalculadas=list(pipeline.recalculadas))
+        diagnostico.emitir_log()
+        if st.session_state.get("mostrar_diagnostico"): renderizar_painel_diagnostico(diagnostico.para_dict())
 
 elif st.session_state.get("authentication_status") is False:
     st.error('Usuário/senha incorreto')